@@ -0,0 +1,79 @@
+# -*- coding: UTF-8 -*-
+"""
+    Benchmarks for DataValue construction: validating constructor against
+    from_validated, and memory per instance.
+
+    Run with: python -m benchmarks.bench_construction
+"""
+
+import timeit
+import tracemalloc
+
+from openehr.rm.datatypes.basic import DvBoolean, DvIdentifier, DvState
+from openehr.rm.datatypes.encapsulated import DvMultimedia, DvParsable
+from openehr.rm.datatypes.quantity import DvCount, DvOrdinal, DvProportion, DvQuantity, ProportionKind
+from openehr.rm.datatypes.quantity.datetime import DvDate, DvDuration
+from openehr.rm.datatypes.text import CodePhrase, DvCodedText, DvParagraph, DvText
+from openehr.rm.datatypes.uri import DvEHRURI, DvURI
+
+CODE = CodePhrase('local', 'at0001')
+SYMBOL = DvCodedText(CODE, 'mild')
+
+# type: (constructor, from_validated)
+CASES = {
+    DvBoolean: (lambda: DvBoolean(True),
+                lambda: DvBoolean.from_validated(value=True)),
+    DvIdentifier: (lambda: DvIdentifier('issuer', 'assigner', 'id', 'type'),
+                lambda: DvIdentifier.from_validated(issuer='issuer', assigner='assigner', id='id', type='type')),
+    DvState: (lambda: DvState(SYMBOL, False),
+                lambda: DvState.from_validated(value=SYMBOL, is_terminal=False)),
+    DvText: (lambda: DvText('blood pressure'),
+                lambda: DvText.from_validated(value='blood pressure')),
+    DvCodedText: (lambda: DvCodedText(CODE, 'mild'),
+                lambda: DvCodedText.from_validated(defining_code=CODE, value='mild')),
+    DvParagraph: (lambda: DvParagraph([SYMBOL]),
+                lambda: DvParagraph.from_validated(items=[SYMBOL])),
+    DvURI: (lambda: DvURI('http://www.openehr.org/'),
+                lambda: DvURI.from_validated(value='http://www.openehr.org/')),
+    DvEHRURI: (lambda: DvEHRURI('ehr://system/path'),
+                lambda: DvEHRURI.from_validated(value='ehr://system/path')),
+    DvParsable: (lambda: DvParsable('1 tablet', 'proforma'),
+                lambda: DvParsable.from_validated(value='1 tablet', formalism='proforma', size=8)),
+    DvMultimedia: (lambda: DvMultimedia(data=b'abc'),
+                lambda: DvMultimedia.from_validated(data=b'abc', size=3)),
+    DvOrdinal: (lambda: DvOrdinal(1, SYMBOL),
+                lambda: DvOrdinal.from_validated(value=1, symbol=SYMBOL)),
+    DvCount: (lambda: DvCount(5),
+                lambda: DvCount.from_validated(magnitude=5, accuracy=-1.0, accuracy_is_percent=False, magnitude_status='=')),
+    DvQuantity: (lambda: DvQuantity(72.0, 'kg', precision=1),
+                lambda: DvQuantity.from_validated(magnitude=72.0, units='kg', precision=1)),
+    DvProportion: (lambda: DvProportion(1, 2, ProportionKind.pk_fraction, 0),
+                lambda: DvProportion.from_validated(numerator=1, denominator=2, type=ProportionKind.pk_fraction, precision=0)),
+    DvDuration: (lambda: DvDuration('P1DT2H'),
+                lambda: DvDuration.from_validated(value='P1DT2H', sign='+', accuracy=-1.0, accuracy_is_percent=False)),
+    DvDate: (lambda: DvDate('2012-03-04'),
+                lambda: DvDate.from_validated(value_str='2012-03-04', value_list=[2012, 3, 4], magnitude=734566)),
+}
+
+
+def per_instance_bytes(factory, count=1000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    instances = [factory() for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del instances
+    return size / count
+
+
+def main(number=2000, repeat=5):
+    print('%-14s %12s %12s %12s' % ('type', 'init us', 'trusted us', 'bytes'))
+    for klass, (construct, trusted) in CASES.items():
+        init = min(timeit.repeat(construct, number=number, repeat=repeat)) / number * 1e6
+        fast = min(timeit.repeat(trusted, number=number, repeat=repeat)) / number * 1e6
+        print('%-14s %12.2f %12.2f %12.0f' % (klass.__name__, init, fast, per_instance_bytes(construct)))
+
+
+if __name__ == '__main__':
+    main()
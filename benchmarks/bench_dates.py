@@ -0,0 +1,69 @@
+# -*- coding: UTF-8 -*-
+"""
+    DvDateColumn ingest, range query and memory against a list of DvDate,
+    the cost of DvDate/DvDuration arithmetic, and recurrence expansion.
+
+    Run with: python -m benchmarks.bench_dates
+"""
+
+import datetime
+import random
+import time
+import timeit
+import tracemalloc
+
+from openehr.rm.datatypes.quantity.datetime import DvDate, DvDuration
+from openehr.rm.datatypes.quantity.series import DvDateColumn, recurrence
+
+
+def measure(build):
+    """ Seconds to run build(), and bytes held by its result. """
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, size
+
+
+def main(count=1000000):
+    random.seed(1)
+    first = datetime.date(1920, 1, 1).toordinal()
+    values = [datetime.date.fromordinal(first + random.randrange(36500)).isoformat() for i in range(count)]
+
+    elapsed, size = measure(lambda: DvDateColumn(values))
+    print('DvDateColumn  %9d dates %8.3f s %8.1f bytes/date' % (count, elapsed, size / count))
+
+    subset = values[:count // 10]
+    elapsed, size = measure(lambda: [DvDate(value) for value in subset])
+    print('DvDate list   %9d dates %8.3f s %8.1f bytes/date' % (len(subset), elapsed, size / len(subset)))
+
+    column = DvDateColumn(values)
+    column.between()
+    start = time.perf_counter()
+    for year in range(1920, 2020):
+        found = column.between('%d-03-01' % year, '%d-03-31' % year)
+    elapsed = time.perf_counter() - start
+    print('between       %9d queries %6.3f ms/query (%d dates)' % (100, elapsed * 10, len(found)))
+
+    date, other, week = DvDate('2001-02-01'), DvDate('2001-03-01'), DvDuration('P1W')
+    for name, operation in (('diff', lambda: other.diff(date)), ('date + duration', lambda: date + week),
+                            ('-duration', lambda: -week), ('duration + duration', lambda: week + week)):
+        elapsed = min(timeit.repeat(operation, number=20000, repeat=3)) / 20000
+        print('%-20s %8.2f us' % (name, elapsed * 1e6))
+
+    start, interval = DvDate('2001-01-31'), DvDuration('P1M')
+    begin = time.perf_counter()
+    schedule = recurrence(start, interval, count=90000)
+    elapsed = time.perf_counter() - begin
+    print('recurrence    %9d dates %8.3f s' % (len(schedule), elapsed))
+    begin = time.perf_counter()
+    dates = [start.add_calendar(k) for k in range(10000)]
+    elapsed = time.perf_counter() - begin
+    print('add_calendar  %9d dates %8.3f s' % (len(dates), elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+# -*- coding: UTF-8 -*-
+"""
+    Throughput of bulk ISO 8601 duration parsing against one DvDuration per
+    value.
+
+    Run with: python -m benchmarks.bench_durations
+"""
+
+import time
+
+from openehr.rm.datatypes.quantity.batch import parse_durations
+from openehr.rm.datatypes.quantity.datetime import DvDuration
+
+SAMPLES = ['PT8H', 'P1D', 'PT30M', 'P1W', 'PT4H30M', 'P1DT12H', 'PT0.5S', 'P3M']
+
+
+def main(count=1000000):
+    values = [SAMPLES[i % len(SAMPLES)] for i in range(count)]
+
+    start = time.perf_counter()
+    columns = parse_durations(values)
+    elapsed = time.perf_counter() - start
+    print('parse_durations  %9d values %8.3f s %12.0f values/s' % (count, elapsed, count / elapsed))
+
+    distinct = ['PT%dS' % i for i in range(count)]
+    start = time.perf_counter()
+    parse_durations(distinct)
+    elapsed = time.perf_counter() - start
+    print('  all distinct   %9d values %8.3f s %12.0f values/s' % (count, elapsed, count / elapsed))
+
+    subset = values[:count // 10]
+    start = time.perf_counter()
+    seconds = [DvDuration(value).magnitude() for value in subset]
+    elapsed = time.perf_counter() - start
+    print('DvDuration       %9d values %8.3f s %12.0f values/s' % (len(subset), elapsed, len(subset) / elapsed))
+
+    assert list(columns.total_seconds[:len(seconds)]) == seconds
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# -*- coding: UTF-8 -*-
+"""
+    Per-call cost of iso8601_.parse_date on the fixed width fast path against
+    the regex parser, of DvDateTime construction, and the throughput of
+    parse_dates.
+
+    Run with: python -m benchmarks.bench_iso8601
+"""
+
+import time
+import timeit
+
+from openehr.rm.datatypes.quantity import iso8601_
+from openehr.rm.datatypes.quantity.datetime import DvDateTime
+
+SAMPLES = ['2007-01-25T12:00:00Z', '2007-01-25T12:00:00.123456+01:00', '2007-01-25 12:30', '2007-01-25']
+
+
+def per_call(function, number=50000):
+    return min(timeit.repeat(function, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    for value in SAMPLES:
+        fast = per_call(lambda: iso8601_.parse_date(value))
+        regex = per_call(lambda: iso8601_._parse_regex(value, iso8601_.UTC))
+        print('%-34s parse_date %6.2f us   regex %6.2f us   x%.1f' % (value, fast, regex, regex / fast))
+    print('%-34s parse_date %6.2f us   (regex fallback)' % ('20070125T120000Z',
+            per_call(lambda: iso8601_.parse_date('20070125T120000Z'))))
+    print('%-34s DvDateTime %6.2f us' % (SAMPLES[0], per_call(lambda: DvDateTime(SAMPLES[0]))))
+
+    count = 1000000
+    values = ['2007-01-%02dT%02d:%02d:%02d.%06dZ' % (i % 28 + 1, i % 24, i % 60, i % 59, i) for i in range(count)]
+    start = time.perf_counter()
+    timestamps, invalid = iso8601_.parse_dates(values)
+    elapsed = time.perf_counter() - start
+    print('parse_dates %9d values %8.3f s %12.0f values/s' % (count, elapsed, count / elapsed))
+    assert not invalid.any()
+
+
+if __name__ == '__main__':
+    main()
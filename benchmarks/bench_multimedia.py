@@ -0,0 +1,60 @@
+# -*- coding: UTF-8 -*-
+"""
+    Benchmarks for streaming DvMultimedia data from memory mapped files and
+    for compressing it.
+
+    Run with: python -m benchmarks.bench_multimedia
+"""
+
+import os
+import tempfile
+import time
+
+from openehr.rm.datatypes.encapsulated import DvMultimedia, compute_integrity_checks
+
+
+def report(name, seconds, nbytes):
+    print('%-40s %8.3f s %8.0f MB/s' % (name, seconds, nbytes / seconds / 1e6))
+
+
+def main(files=16, size=16 << 20):
+    directory = tempfile.mkdtemp()
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, 'attachment%d.bin' % i)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        paths.append(path)
+    try:
+        total = files * size
+        for workers in (1, 4):
+            attachments = [DvMultimedia.from_file(path) for path in paths]
+            start = time.perf_counter()
+            compute_integrity_checks(attachments, 'SHA-256', max_workers=workers)
+            report('SHA-256, %d thread(s)' % workers, time.perf_counter() - start, total)
+
+        attachments = [DvMultimedia.from_file(path) for path in paths]
+        start = time.perf_counter()
+        for attachment in attachments:
+            with open(os.devnull, 'wb') as out:
+                for chunk in attachment.checked_chunks(algorithm='SHA-256'):
+                    out.write(chunk)
+        report('copy and SHA-256 in one pass', time.perf_counter() - start, total)
+
+        report_text = b''.join(b'<value id="%d">%d mmol/L</value>' % (i, i % 97) for i in range(500000))
+        for code in ('zlib', 'gzip', 'bzip2', 'lzma'):
+            attachment = DvMultimedia(data=report_text)
+            start = time.perf_counter()
+            attachment.compress(code)
+            elapsed = time.perf_counter() - start
+            stored = sum(len(chunk) for chunk in attachment.stored_chunks())
+            report('compress %s (%.1f%% of %d bytes)' % (code, 100.0 * stored / len(report_text), len(report_text)),
+                    elapsed, len(report_text))
+    finally:
+        for path in paths:
+            os.remove(path)
+        os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
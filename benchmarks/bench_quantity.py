@@ -0,0 +1,69 @@
+# -*- coding: UTF-8 -*-
+"""
+    Benchmarks for DvAmount arithmetic.
+
+    Run with: python -m benchmarks.bench_quantity
+"""
+
+import functools
+import operator
+import timeit
+
+from openehr.rm.datatypes.quantity import DvCount, DvQuantity
+
+
+def legacy_add(self, other):
+    """
+        Approximation of the eval() based addition DvAmount used to do:
+        _do_arithmetic_expression() as it was, except that it passes the
+        units on and reads an unset accuracy_is_percent as False, which the
+        old code did not (so a DvQuantity fold could not run through the old
+        operator itself). The timings are approximate.
+    """
+    assert self.is_strictly_comparable_to(other)
+    operator = "+"
+    new_obj_data = {}
+    if self.accuracy_unknown or other.accuracy_unknown:
+        new_obj_data['accuracy'] = self.UNKNOWN_ACCURACY_VALUE
+    elif bool(self.accuracy_is_percent) ^ bool(other.accuracy_is_percent):
+        chosen_accuracy = max(self.accuracy, other.accuracy)
+        new_obj_data['accuracy_is_percent'] = False
+        if chosen_accuracy == other.accuracy and other.accuracy_is_percent:
+            new_obj_data['accuracy_is_percent'] = True
+        elif chosen_accuracy == self.accuracy and self.accuracy_is_percent:
+            new_obj_data['accuracy_is_percent'] = True
+        new_obj_data['accuracy'] = chosen_accuracy
+    else:
+        if self.accuracy_is_percent and other.accuracy_is_percent:
+            new_obj_data['accuracy_is_percent'] = True
+        new_obj_data['accuracy'] = eval("float(self.accuracy" + operator + "other.accuracy)")
+    this_magnitude = self.magnitude() if callable(self.magnitude) else self.magnitude
+    other_magnitude = other.magnitude() if callable(other.magnitude) else other.magnitude
+    new_obj_data['magnitude'] = eval("this_magnitude" + operator + "other_magnitude")
+    return type(self)(units=self.units, **new_obj_data)
+
+
+def report(name, seconds, count):
+    print('%-40s %10.2f us/op' % (name, seconds / count * 1e6))
+
+
+def main(count=2000, repeat=5):
+    volumes = [DvQuantity(float(i % 500), 'mL', precision=0, accuracy=1.0, accuracy_is_percent=False)
+            for i in range(count)]
+    counts = [DvCount(i % 50) for i in range(count)]
+
+    best = min(timeit.repeat(lambda: functools.reduce(legacy_add, volumes), number=1, repeat=repeat))
+    report('DvQuantity eval() fold (approx.)', best, count)
+    best = min(timeit.repeat(lambda: functools.reduce(operator.add, volumes), number=1, repeat=repeat))
+    report('DvQuantity + fold', best, count)
+    best = min(timeit.repeat(lambda: DvQuantity.sum(volumes), number=1, repeat=repeat))
+    report('DvQuantity.sum', best, count)
+
+    best = min(timeit.repeat(lambda: functools.reduce(operator.add, counts), number=1, repeat=repeat))
+    report('DvCount + fold', best, count)
+    best = min(timeit.repeat(lambda: DvCount.sum(counts), number=1, repeat=repeat))
+    report('DvCount.sum', best, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: UTF-8 -*-
+"""
+    Benchmarks for flagging results against reference ranges, per value
+    with DvOrdered.is_normal and in batches with ReferenceRangeEvaluator.
+
+    Run with: python -m benchmarks.bench_reference
+"""
+
+import time
+
+import numpy
+
+from openehr.rm.datatypes.quantity import DvInterval, DvQuantity, ReferenceRange
+from openehr.rm.datatypes.quantity.reference import ReferenceRangeEvaluator
+from openehr.rm.datatypes.text import DvText
+
+
+def report(name, seconds, count):
+    print('%-40s %10.3f s %10.3f us/value' % (name, seconds, seconds / count * 1e6))
+
+
+def glucose_range(meaning, lower, upper):
+    return ReferenceRange(DvText(meaning), DvInterval(DvQuantity(lower, 'mmol/L'), DvQuantity(upper, 'mmol/L'), True, True))
+
+
+def main(count=1000000, objects=100000):
+    magnitudes = numpy.random.default_rng(1).normal(5.5, 2.0, count)
+
+    normal_range = glucose_range('normal', 3.9, 5.6).range
+    results = [DvQuantity(float(magnitude), 'mmol/L', normal_range=normal_range) for magnitude in magnitudes[:objects]]
+    start = time.perf_counter()
+    for result in results:
+        result.is_normal()
+    report('DvQuantity.is_normal', time.perf_counter() - start, objects)
+
+    evaluator = ReferenceRangeEvaluator()
+    for meaning, lower, upper in (('normal', 3.9, 5.6), ('borderline', 3.0, 7.0), ('critical', 2.2, 25.0)):
+        evaluator.register('glucose', glucose_range(meaning, lower, upper), molar_mass=180.16)
+    start = time.perf_counter()
+    evaluator.evaluate('glucose', results)
+    report('evaluate DvQuantity objects', time.perf_counter() - start, objects)
+    start = time.perf_counter()
+    evaluator.evaluate('glucose', magnitudes)
+    report('evaluate magnitudes (3 ranges)', time.perf_counter() - start, count)
+    start = time.perf_counter()
+    evaluator.evaluate('glucose', magnitudes * 18.016, units='mg/dL')
+    report('evaluate magnitudes in mg/dL', time.perf_counter() - start, count)
+    start = time.perf_counter()
+    evaluator.normal_status('glucose', magnitudes)
+    report('normal_status CodePhrases', time.perf_counter() - start, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: UTF-8 -*-
+"""
+    DvQuantityTimeSeries ingestion and windowed aggregation over a year of
+    minute-by-minute vital signs.
+
+    Run with: python -m benchmarks.bench_timeseries
+"""
+
+import time
+
+import numpy
+
+from openehr.rm.datatypes.quantity import DvQuantity
+from openehr.rm.datatypes.quantity.datetime import DvDateTime, DvDuration
+from openehr.rm.datatypes.quantity.series import DvQuantityTimeSeries
+
+
+def main(count=525600):
+    start = DvDateTime('2020-01-01T00:00:00Z').magnitude
+    times = start + numpy.arange(count, dtype=numpy.int64) * 60000000
+    rates = 60 + 40 * numpy.random.default_rng(1).random(count)
+
+    series = DvQuantityTimeSeries('/min')
+    begin = time.perf_counter()
+    series.extend(times, rates)
+    elapsed = time.perf_counter() - begin
+    print('extend arrays      %9d observations %8.3f s' % (count, elapsed))
+
+    streamed = DvQuantityTimeSeries('/min')
+    observations = [(int(t), DvQuantity(float(r), '/min')) for t, r in zip(times[:100000], rates[:100000])]
+    begin = time.perf_counter()
+    streamed.ingest(iter(observations))
+    elapsed = time.perf_counter() - begin
+    print('ingest DvQuantity  %9d observations %8.3f s' % (len(observations), elapsed))
+
+    for width, start_at, end_at in (('PT1H', None, None), ('P1D', None, None),
+                                    ('PT15M', '2020-06-01', '2020-07-01')):
+        begin = time.perf_counter()
+        windows = series.window(DvDuration(width), start_at, end_at)
+        elapsed = time.perf_counter() - begin
+        print('window %-6s %-11s %6d windows %8.2f ms' % (width, start_at or 'all', len(windows.count), elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -16,17 +16,62 @@ class DataValue(metaclass=ABCMeta):
 
     These types are intended to be very rigid, so it is enforcing run-time
     type checking.
+
+    Subclasses declare their storage in __slots__. Every slot starts as None,
+    which is what the class level defaults used to provide.
     """
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        """
+            Work out once per class the slots to initialise and the names
+            which may be assigned on instances.
+        """
+        super().__init_subclass__(**kwargs)
+        slots = []
+        for klass in reversed(cls.__mro__):
+            declared = klass.__dict__.get('__slots__', ())
+            if isinstance(declared, str):
+                declared = (declared,)
+            for name in declared:
+                if name not in slots and name not in ('__dict__', '__weakref__'):
+                    slots.append(name)
+        cls._slot_fields = tuple((name.lstrip('_'), name) for name in slots)
+        cls._attribute_names = frozenset(slots).union(dir(cls))
+
+    def __new__(cls, *args, **kwargs):
+        obj = object.__new__(cls)
+        for field, slot in cls._slot_fields:
+            object.__setattr__(obj, slot, None)
+        return obj
+
     def __setattr__(self, name, value):
         """
             Generally, you cannot set values on the subclasses of DataValue.
             The subclasses provide explicit mechanisms to do so. They must
             bypass this logic by having a value with that name on the class.
         """
-        if not hasattr(self, name):
+        if name not in self._attribute_names and not hasattr(self, name):
             raise AttributeError('Unknown attribute [%s] for type %s' % (name, self.__class__))
         object.__setattr__(self, name, value)
 
+    @classmethod
+    def from_validated(cls, **fields):
+        """
+            Build an instance from field values which are already known to
+            be valid (e.g. data validated when it was written), bypassing
+            __init__ and the validating setters. Fields are named without
+            the leading underscore; fields not given are None.
+        """
+        obj = object.__new__(cls)
+        for field, slot in cls._slot_fields:
+            object.__setattr__(obj, slot, fields.pop(field, None))
+        for name, value in fields.items():
+            if name not in cls._attribute_names:
+                raise AttributeError('Unknown attribute [%s] for type %s' % (name, cls))
+            object.__setattr__(obj, name, value)
+        return obj
+
     def _validate_invariant(self):
         """
             Specification defines a set of invariants. These are validated
@@ -54,7 +99,7 @@ class DvBoolean(DataValue):
 
     TODO: Boolean type allows NULL values - how to do this?
     """
-    _value = None
+    __slots__ = ('_value',)
     TRUE = FALSE = None
 
     @property
@@ -103,7 +148,7 @@ class DvIdentifier(DataValue):
     ture to refer to information items; the types OBJECT_ID and OBJECT_REF and
     subtypes are defined for this purpose.
     """
-    _issuer = _assigner = _id = _type = None
+    __slots__ = ('_issuer', '_assigner', '_id', '_type')
 
     @property
     def issuer(self):
@@ -179,7 +224,7 @@ class DvState(DataValue):
     For representing state values which obey a defined state machine, such as a vari-
     able representing the states of an instruction or care process.
     """
-    _value = _is_terminal = None
+    __slots__ = ('_value', '_is_terminal')
 
     @property
     def value(self):
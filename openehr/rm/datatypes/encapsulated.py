@@ -1,11 +1,36 @@
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from xml.etree import ElementTree
 
 from openehr.rm.datatypes.basic import DataValue
+from openehr.rm.datatypes.media import (COMPRESSION_ALGORITHMS, DEFAULT_CHUNK_SIZE, BufferSource, ChunkSource, FileSource,
+                                        compressing, decompressing, hashing, integrity_hash, media_source)
+from openehr.rm.datatypes.thumbnails import THUMBNAIL_SERVICE
 from openehr.rm.datatypes.uri import DvURI
 from openehr.rm.datatypes.text import CodePhrase
 
+INTEGRITY_CHECK_TERMINOLOGY = 'openehr_integrity_check_algorithms'
+COMPRESSION_TERMINOLOGY = 'openehr_compression_algorithms'
+
+# Algorithms supported which are not in the openEHR 'compression algorithms'
+# code set are coded in this terminology instead
+LOCAL_COMPRESSION_TERMINOLOGY = 'local'
+LOCAL_COMPRESSION_ALGORITHMS = ('bzip2', 'lzma')
+
+# Payloads smaller than this many bytes are not worth compressing
+COMPRESSION_THRESHOLD = 1024
+
+
+class IntegrityCheckError(ValueError):
+    """Raised when data does not match its integrity check"""
+
+
 class DvEncapsulated(DataValue):
     """Abstract class defining the common meta-data of all types of encapsulated data."""
-    _charset = _language = _size = None
+    __slots__ = ('_charset', '_language', '_size')
 
     @property
     def charset(self):
@@ -51,9 +76,19 @@ class DvMultimedia(DvEncapsulated):
     """
     A specialisation of DvEncapsulated for audiovisual and biosignal types. Includes further
     metadata relating to multimedia types which are not applicable to other subtypes of DvEncapsulated.
+
+    data may be a byte string or any MediaSource (see openehr.rm.datatypes.media): a
+    buffer used without copying, a memory mapped local file or a one-shot chunk iterator,
+    in which case size is known lazily and the data is best read through chunks() or open().
+
+    compress() replaces the data by its compressed form, kept as the stored form which
+    stored_chunks() returns; the data is decompressed as it is streamed, or once, on the
+    first access to data. Data given to the constructor with a compression_algorithm that
+    can be decoded, or to from_compressed(), is such a stored form; size is then the
+    uncompressed size, None until the data has been decompressed.
     """
-    _alternate_text = _media_type = _compression_algorithm  = _integrity_check = \
-            _integrity_check_algorithm = _thumbnail = _uri = _data = None
+    __slots__ = ('_alternate_text', '_media_type', '_compression_algorithm', '_integrity_check',
+            '_integrity_check_algorithm', '_thumbnail', '_uri', '_data', '_source', '_compressed')
 
     @property
     def alternate_text(self):
@@ -85,8 +120,40 @@ class DvMultimedia(DvEncapsulated):
 
     @property
     def data(self):
+        """
+            The byte string given, otherwise a read-only memoryview over the
+            source. Chunk iterators are joined in memory, and compressed data
+            decompressed, by the first call.
+        """
+        if self._data is None:
+            if self._source is not None:
+                return self._source.buffer()
+            if self._compressed is not None:
+                self._data = b''.join(self._decompressed_chunks())
+                if self._size is None:
+                    self._size = len(self._data)
         return self._data
 
+    @property
+    def source(self):
+        """
+            The MediaSource of the data, None if there is no data. Compressed
+            data gets a new one-shot source decompressing the stored form.
+        """
+        if self._source is None:
+            if self._data is not None:
+                self._source = BufferSource(self._data)
+            elif self._compressed is not None:
+                return ChunkSource(self._decompressed_chunks(), self._size)
+        return self._source
+
+    def _get_size(self):
+        if self._size is None and self._source is not None:
+            return self._source.size
+        return self._size
+
+    size = property(_get_size, DvEncapsulated.size.fset)
+
     @alternate_text.setter
     def alternate_text(self, value):
         if value is not None and type(value) != str:
@@ -131,9 +198,17 @@ class DvMultimedia(DvEncapsulated):
 
     @data.setter
     def data(self, value):
-        if value is not None and  type(value) != bytes:
-            raise AttributeError('data attribute must be a byte string')
-        self._data = value
+        """ New data replaces any compressed form, and is not compressed itself """
+        if self._compressed is not None:
+            self._compressed = None
+            self.compression_algorithm = None
+        if value is None or type(value) == bytes:
+            self._data, self._source = value, None
+            self._size = len(value) if value is not None else 0
+        else:
+            self._data, self._source = None, media_source(value)
+            # The size of chunk streams is only known once they are read
+            self._size = self._source.size
 
     def __init__(self, charset=None, language=None, alternate_text=None, media_type=None, compression_algorithm=None,
             integrity_check=None, integrity_check_algorithm=None, thumbnail=None, uri=None, data=None):
@@ -144,14 +219,185 @@ class DvMultimedia(DvEncapsulated):
         self.integrity_check_algorithm = integrity_check_algorithm
         self.thumbnail = thumbnail
         self.uri = uri
+        self.charset = charset
+        self.language = language
+        if data is not None and self._codec_name(compression_algorithm) is not None:
+            source = media_source(data)
+            # an empty payload is no compressed stream, it is no data
+            if source.size != 0:
+                self._compressed = source
+                return
         self.data = data
-        super(DvMultimedia, self).__init__(len(data), charset, language)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+            A DvMultimedia whose data is the local file at 'path', mapped on
+            demand. close() it, or use it as a context manager, to unmap it.
+        """
+        return cls(data=FileSource(path), **kwargs)
+
+    def close(self):
+        """ Close the source of the data, e.g. unmap a file (see FileSource.close) """
+        for source in (self._source, self._compressed):
+            if source is not None:
+                source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def from_compressed(cls, data, compression_algorithm, size=None, **kwargs):
+        """
+            A DvMultimedia whose stored form is 'data' (bytes or any media
+            source) compressed with 'compression_algorithm', a code string or
+            CodePhrase. size is the uncompressed size, if known.
+        """
+        compression_algorithm = cls._compression_code(compression_algorithm)
+        multimedia = cls(compression_algorithm=compression_algorithm, **kwargs)
+        multimedia._compressed = media_source(data)
+        multimedia._size = size
+        return multimedia
+
+    @staticmethod
+    def _compression_code(algorithm):
+        """ The CodePhrase of an algorithm given as a code string or CodePhrase """
+        if type(algorithm) == str:
+            terminology = LOCAL_COMPRESSION_TERMINOLOGY if algorithm in LOCAL_COMPRESSION_ALGORITHMS else COMPRESSION_TERMINOLOGY
+            algorithm = CodePhrase(terminology, algorithm)
+        if DvMultimedia._codec_name(algorithm) is None:
+            raise AttributeError('Unsupported compression algorithm [%s]' % algorithm)
+        return algorithm
+
+    @staticmethod
+    def _codec_name(algorithm):
+        """ The media codec of a compression_algorithm CodePhrase, None if it has none """
+        if not isinstance(algorithm, CodePhrase) or algorithm.code_string not in COMPRESSION_ALGORITHMS:
+            return None
+        terminology = algorithm.terminology_id.value
+        if terminology == LOCAL_COMPRESSION_TERMINOLOGY or (terminology == COMPRESSION_TERMINOLOGY
+                and algorithm.code_string not in LOCAL_COMPRESSION_ALGORITHMS):
+            return algorithm.code_string
+        return None
+
+    def _decompressed_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        return decompressing(self._compressed.chunks(chunk_size), self._codec_name(self.compression_algorithm))
+
+    def compress(self, algorithm='zlib', threshold=COMPRESSION_THRESHOLD, level=None):
+        """
+            Compress the data with 'algorithm' (a code string or CodePhrase
+            of the 'compression algorithms' code set) unless it is smaller
+            than threshold bytes or does not shrink, streaming it from its
+            source. The compressed form replaces the data; size remains the
+            uncompressed size. Returns True if the data was compressed.
+        """
+        if self._compressed is not None:
+            return False
+        source = self.source
+        if source is None or (source.size is not None and source.size < threshold):
+            return False
+        algorithm = self._compression_code(algorithm)
+        compressed = b''.join(compressing(source.chunks(), self._codec_name(algorithm), level))
+        size = source.size
+        if source.repeatable and len(compressed) >= size:
+            return False
+        if self._source is not None:
+            self._source.close()
+        self._data = self._source = None
+        self._compressed = BufferSource(compressed)
+        self._size = size
+        self.compression_algorithm = algorithm
+        return True
+
+    def stored_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ The data as stored or transferred: compressed if compress() was applied """
+        if self._compressed is not None:
+            return self._compressed.chunks(chunk_size)
+        return self.chunks(chunk_size)
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Iterate over the data as memoryviews, without joining it in memory """
+        source = self.source
+        if source is None:
+            return iter(())
+        return source.chunks(chunk_size)
+
+    def open(self):
+        """ A binary file object streaming the data """
+        source = self.source
+        if source is None:
+            raise ValueError('DvMultimedia has no inline data')
+        return source.open()
+
+    def _integrity_hash(self, algorithm=None):
+        if algorithm is not None:
+            if type(algorithm) == str:
+                algorithm = CodePhrase(INTEGRITY_CHECK_TERMINOLOGY, algorithm)
+            self.integrity_check_algorithm = algorithm
+        if self.integrity_check_algorithm is None:
+            raise AttributeError('integrity_check_algorithm attribute must be set')
+        return integrity_hash(self.integrity_check_algorithm.code_string)
+
+    def checked_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE, algorithm=None):
+        """
+            Iterate over the data like chunks(), hashing it on the way. Once
+            the last chunk is read the digest is stored as integrity_check,
+            or compared with it if it is already set (IntegrityCheckError if
+            it differs), so data can be persisted and checked in one pass.
+
+            algorithm, a code string or CodePhrase from the 'integrity check
+            algorithms' code set, replaces integrity_check_algorithm.
+        """
+        digest = self._integrity_hash(algorithm)
+        yield from hashing(self.chunks(chunk_size), digest)
+        if self.integrity_check is None:
+            self.integrity_check = digest.digest()
+        elif self.integrity_check != digest.digest():
+            raise IntegrityCheckError('data does not match its %s integrity check'
+                    % self.integrity_check_algorithm.code_string)
+
+    def compute_integrity_check(self, algorithm=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Hash the data, store and return the digest as integrity_check """
+        digest = self._integrity_hash(algorithm)
+        for chunk in self.chunks(chunk_size):
+            digest.update(chunk)
+        self.integrity_check = digest.digest()
+        return self.integrity_check
+
+    def verify_integrity_check(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ True if the data matches integrity_check """
+        if self.integrity_check is None:
+            raise AttributeError('integrity_check attribute must be set')
+        digest = self._integrity_hash()
+        for chunk in self.chunks(chunk_size):
+            digest.update(chunk)
+        return digest.digest() == self.integrity_check
+
+    def generate_thumbnail(self, wait=True, service=None):
+        """
+            The thumbnail, generated from the data by the generator registered
+            for media_type if none was given (see openehr.rm.datatypes.thumbnails).
+            With wait=False it is only requested from the worker pool and None
+            is returned until it is ready.
+        """
+        service = service or THUMBNAIL_SERVICE
+        if wait:
+            return service.thumbnail(self)
+        return service.peek(self)
 
     def is_external(self):
         return isinstance(self.uri, DvURI)
 
     def is_inline(self):
-        return self.data is not None and len(self.data) > 0
+        if self._compressed is not None:
+            return True
+        if self._source is not None:
+            # a chunk stream of unknown size may turn out to be empty
+            return bool(self.size)
+        return self._data is not None and len(self._data) > 0
 
     def is_compressed(self):
         return isinstance(self.compression_algorithm, CodePhrase)
@@ -160,8 +406,105 @@ class DvMultimedia(DvEncapsulated):
         return isinstance(self.integrity_check_algorithm, CodePhrase)
 
 
+def _map(function, items, max_workers):
+    if max_workers == 1:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(function, items))
+
+
+def compute_integrity_checks(multimedia, algorithm=None, max_workers=None):
+    """
+        compute_integrity_check() for many DvMultimedia across a thread pool
+        (hashlib releases the GIL on large chunks). Returns the digests in
+        order; max_workers=1 hashes in the calling thread.
+    """
+    return _map(lambda item: item.compute_integrity_check(algorithm), multimedia, max_workers)
+
+
+def verify_integrity_checks(multimedia, max_workers=None):
+    """ verify_integrity_check() for many DvMultimedia across a thread pool """
+    return _map(lambda item: item.verify_integrity_check(), multimedia, max_workers)
+
+
+#--------------------------------------------------------------
+# Injection Approach
+# formalism name: (parse(text), incremental parser factory or None, copy).
+# An incremental parser has feed(text) and close(), which returns the result.
+# copy(parsed) gives a private copy of a cached result, deepcopy by default;
+# parsers of immutable results may pass None to share them.
+FORMALISM_PARSERS = {}
+def register_formalism_parser(formalism, parse=None, incremental=None, copy=deepcopy):
+    if parse is None and incremental is None:
+        raise AttributeError('a parse function or an incremental parser factory is required')
+    FORMALISM_PARSERS[formalism] = (parse, incremental, copy)
+    with PARSED_CACHE_LOCK:
+        PARSED_CACHE.clear()
+#--------------------------------------------------------------
+
+# Upper bound on the number of parsed values remembered.
+PARSED_CACHE_SIZE = 256
+
+# Values at least this long are fed to incremental parsers in chunks of this size
+INCREMENTAL_PARSE_SIZE = 1 << 16
+
+# (formalism, value): parsed form, copied out to DvParsable with the same text
+PARSED_CACHE = OrderedDict()
+PARSED_CACHE_LOCK = threading.Lock()
+
+
+def parse_chunks(formalism, chunks):
+    """
+        Parse text arriving in chunks (e.g. read from a stream) with the
+        parser registered for 'formalism', incrementally if it can be.
+    """
+    try:
+        parse, incremental, copy = FORMALISM_PARSERS[formalism]
+    except KeyError:
+        raise AttributeError('No parser registered for formalism [%s]' % formalism)
+    if incremental is None:
+        return parse(''.join(chunks))
+    parser = incremental()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+def parse_formalism(formalism, value):
+    """
+        Parse a whole value, memoised on (formalism, value). Each call gets
+        its own copy of the parsed form, made by the copy function the
+        parser was registered with.
+    """
+    try:
+        parse, incremental, copy = FORMALISM_PARSERS[formalism]
+    except KeyError:
+        raise AttributeError('No parser registered for formalism [%s]' % formalism)
+    key = (formalism, value)
+    with PARSED_CACHE_LOCK:
+        parsed = PARSED_CACHE.get(key, PARSED_CACHE)
+        if parsed is not PARSED_CACHE:
+            PARSED_CACHE.move_to_end(key)
+    if parsed is PARSED_CACHE:
+        if parse is None or (incremental is not None and len(value) >= INCREMENTAL_PARSE_SIZE):
+            parsed = parse_chunks(formalism, (value[i:i + INCREMENTAL_PARSE_SIZE]
+                    for i in range(0, len(value), INCREMENTAL_PARSE_SIZE)))
+        else:
+            parsed = parse(value)
+        with PARSED_CACHE_LOCK:
+            PARSED_CACHE[key] = parsed
+            if len(PARSED_CACHE) > PARSED_CACHE_SIZE:
+                PARSED_CACHE.popitem(last=False)
+    return parsed if copy is None else copy(parsed)
+
+
 class DvParsable(DvEncapsulated):
-    _value = _formalism = None
+    """
+    Encapsulated data expressed as a parsable String. The parsed form is computed by the
+    parser registered for the formalism on first access to 'parsed' and memoised; values
+    with the same text are parsed once and each gets its own copy of the result.
+    """
+    __slots__ = ('_value', '_formalism', '_parsed')
 
     @property
     def value(self):
@@ -176,12 +519,21 @@ class DvParsable(DvEncapsulated):
         if value is not None and type(value) != str:
             raise AttributeError('value attribute must be a String')
         self._value = value
+        self._parsed = None
 
     @formalism.setter
     def formalism(self, value):
         if value is not None and type(value) != str:
             raise AttributeError('formalism attribute must be a String')
         self._formalism = value
+        self._parsed = None
+
+    @property
+    def parsed(self):
+        """ The value parsed by the parser registered for the formalism """
+        if self._parsed is None:
+            self._parsed = (parse_formalism(self.formalism, self.value),)
+        return self._parsed[0]
 
 
     def __init__(self, value=None, formalism=None, charset=None, language=None):
@@ -191,3 +543,10 @@ class DvParsable(DvEncapsulated):
 
     def as_string(self):
         return self.value
+
+
+register_formalism_parser('xml', ElementTree.fromstring, ElementTree.XMLParser)
+register_formalism_parser('text/xml', ElementTree.fromstring, ElementTree.XMLParser)
+register_formalism_parser('application/xml', ElementTree.fromstring, ElementTree.XMLParser)
+register_formalism_parser('json', json.loads)
+register_formalism_parser('application/json', json.loads)
@@ -0,0 +1,102 @@
+# -*- coding: UTF-8 -*-
+"""
+    Index of the term mappings of many DvText values, to find the texts
+    mapped to a code or to a terminology without scanning every mapping of
+    every text.
+"""
+
+from openehr.rm.support.identification import TerminologyID
+
+
+def terminology_name(terminology):
+    """ Name of a TerminologyID or terminology id string, without the version """
+    if isinstance(terminology, TerminologyID):
+        return terminology.name()
+    return terminology.partition('(')[0]
+
+
+class TermMappingIndex(object):
+    """
+        The TermMapping objects of DvText values indexed by target
+        CodePhrase and by target terminology name, any version of a
+        terminology ('SNOMED-CT(2003)' is under 'SNOMED-CT').
+
+        Texts are added as documents are loaded and the index is updated
+        incrementally. It keeps the mappings it was given: a text whose
+        mappings change afterwards must be passed to update(). Texts are
+        indexed by identity, so equal texts in different documents are
+        distinct entries; lookups return texts in the order they were added.
+    """
+
+    def __init__(self, texts=()):
+        self._texts = {}            # id(text) -> (text, mappings indexed)
+        self._by_target = {}        # CodePhrase -> {id(text): text}
+        self._by_terminology = {}   # terminology name -> {id(text): text}
+        self.add_all(texts)
+
+    def _link(self, index, key, text):
+        index.setdefault(key, {})[id(text)] = text
+
+    def _unlink(self, index, key, text):
+        texts = index.get(key)
+        if texts is not None:
+            texts.pop(id(text), None)
+            if not texts:
+                del index[key]
+
+    def add(self, text):
+        """ Index the mappings of a DvText, replacing what was indexed for it """
+        if id(text) in self._texts:
+            self.remove(text)
+        mappings = tuple(text.mappings or ())
+        self._texts[id(text)] = (text, mappings)
+        for mapping in mappings:
+            self._link(self._by_target, mapping.target, text)
+            self._link(self._by_terminology, terminology_name(mapping.target.terminology_id), text)
+
+    def add_all(self, texts):
+        for text in texts:
+            self.add(text)
+
+    update = add
+
+    def remove(self, text):
+        text, mappings = self._texts.pop(id(text))
+        for mapping in mappings:
+            self._unlink(self._by_target, mapping.target, text)
+            self._unlink(self._by_terminology, terminology_name(mapping.target.terminology_id), text)
+
+    def texts_for_target(self, target):
+        """ The texts with a mapping to the CodePhrase 'target' """
+        return list(self._by_target.get(target, {}).values())
+
+    def texts_for_terminology(self, terminology):
+        """ The texts with a mapping to a code of 'terminology' """
+        return list(self._by_terminology.get(terminology_name(terminology), {}).values())
+
+    def mappings_for(self, text, terminology=None):
+        """ The indexed mappings of 'text', only those to 'terminology' if given """
+        mappings = self._texts[id(text)][1]
+        if terminology is None:
+            return list(mappings)
+        name = terminology_name(terminology)
+        return [mapping for mapping in mappings if terminology_name(mapping.target.terminology_id) == name]
+
+    def targets(self, terminology=None):
+        """ The CodePhrases mapped to, only those of 'terminology' if given """
+        if terminology is None:
+            return list(self._by_target)
+        name = terminology_name(terminology)
+        return [target for target in self._by_target if terminology_name(target.terminology_id) == name]
+
+    def __contains__(self, text):
+        entry = self._texts.get(id(text))
+        return entry is not None and entry[0] is text
+
+    def __len__(self):
+        return len(self._texts)
+
+    def clear(self):
+        self._texts.clear()
+        self._by_target.clear()
+        self._by_terminology.clear()
@@ -0,0 +1,268 @@
+# -*- coding: UTF-8 -*-
+"""
+    Sources for the data of a DvMultimedia which avoid holding the payload
+    as one bytes object: buffers used in place (memoryview, bytearray,
+    mmap), local files mapped on demand and one-shot chunk iterators.
+
+    Every source is read through chunks(), a sequence of memoryviews, or
+    open(), a binary file object, so large attachments can be checksummed,
+    compressed or persisted a chunk at a time.
+"""
+
+import bz2
+import hashlib
+import io
+import lzma
+import mmap
+import os
+import zlib
+from collections import namedtuple
+
+# Default number of bytes per chunk when streaming a source
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# hashlib names of the codes in the openEHR 'integrity check algorithms' code set
+INTEGRITY_CHECK_ALGORITHMS = {
+    'SHA-1': 'sha1',
+    'SHA-256': 'sha256',
+}
+
+
+def integrity_hash(code):
+    """ A new hashlib object for an 'integrity check algorithms' code string """
+    try:
+        return hashlib.new(INTEGRITY_CHECK_ALGORITHMS[code])
+    except KeyError:
+        raise AttributeError('Unsupported integrity check algorithm [%s]' % code)
+
+
+def hashing(chunks, digest):
+    """ Pass chunks through, feeding each one to 'digest' on the way """
+    for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+# compressor(level) and decompressor() factories; the objects returned have
+# the compress()/flush() and decompress() methods of the stdlib codecs.
+Codec = namedtuple('Codec', ['compressor', 'decompressor'])
+
+
+def _zlib_codec(wbits):
+    return Codec(lambda level: zlib.compressobj(-1 if level is None else level, zlib.DEFLATED, wbits),
+            lambda: zlib.decompressobj(wbits))
+
+
+# Codecs by code string of the openEHR 'compression algorithms' code set.
+# bzip2 and lzma are not in the code set: DvMultimedia codes them in a local
+# terminology, see encapsulated.LOCAL_COMPRESSION_TERMINOLOGY.
+COMPRESSION_ALGORITHMS = {
+    'zlib': _zlib_codec(zlib.MAX_WBITS),
+    'deflate': _zlib_codec(-zlib.MAX_WBITS),
+    'gzip': _zlib_codec(16 + zlib.MAX_WBITS),
+    'bzip2': Codec(lambda level: bz2.BZ2Compressor(9 if level is None else level), bz2.BZ2Decompressor),
+    'lzma': Codec(lambda level: lzma.LZMACompressor(preset=level), lzma.LZMADecompressor),
+}
+
+
+def _codec(code):
+    try:
+        return COMPRESSION_ALGORITHMS[code]
+    except KeyError:
+        raise AttributeError('Unsupported compression algorithm [%s]' % code)
+
+
+def compressing(chunks, code, level=None):
+    """ Compress a sequence of chunks with the codec for 'code', lazily """
+    compressor = _codec(code).compressor(level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def decompressing(chunks, code):
+    """ Decompress a sequence of chunks with the codec for 'code', lazily """
+    decompressor = _codec(code).decompressor()
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    if not decompressor.eof:
+        raise ValueError('compressed %s data is truncated' % code)
+
+
+class MediaSource(object):
+    """
+        Abstract source of multimedia data. size is the number of bytes, or
+        None while it is not known yet; repeatable is False for sources
+        which can only be read once.
+    """
+    size = None
+    repeatable = True
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ Iterate over the data as memoryviews of up to chunk_size bytes """
+        raise NotImplementedError('The class %s must implement chunks()' % self.__class__.__name__)
+
+    def buffer(self):
+        """ The whole payload as a read-only memoryview """
+        raise NotImplementedError('The class %s must implement buffer()' % self.__class__.__name__)
+
+    def tobytes(self):
+        return self.buffer().tobytes()
+
+    def open(self):
+        """ A binary file object reading the data from the start """
+        return io.BufferedReader(ChunkReader(self.chunks()), DEFAULT_CHUNK_SIZE)
+
+    def close(self):
+        """ Release what the source holds open, if anything """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BufferSource(MediaSource):
+    """ Any object supporting the buffer protocol, used without copying. """
+
+    def __init__(self, data):
+        view = memoryview(data)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast('B')
+        self._view = view.toreadonly()
+        self.size = view.nbytes
+
+    def buffer(self):
+        return self._view
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        view = self._view
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+
+
+class FileSource(MediaSource):
+    """
+        A local file. The size comes from the file system and the contents
+        are memory mapped read-only the first time a buffer is needed.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._size = None
+        self._mmap = None
+
+    @property
+    def size(self):
+        if self._size is None:
+            self._size = os.stat(self.path).st_size
+        return self._size
+
+    def buffer(self):
+        if self._mmap is None:
+            if self.size == 0:
+                return memoryview(b'')
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        view = self.buffer()
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def close(self):
+        """
+            Unmap the file; raises BufferError while memoryviews of it are
+            still alive. The file is mapped again if it is read afterwards.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class ChunkSource(MediaSource):
+    """
+        An iterable of bytes-like chunks, e.g. a network or database
+        stream, which is read only once. size is the declared size, or
+        None until the chunks have been consumed.
+
+        buffer() joins the remaining chunks and keeps the result, after
+        which the data can be read any number of times.
+    """
+
+    def __init__(self, chunks, size=None):
+        self._chunks = iter(chunks)
+        self._buffer = None
+        self.size = size
+
+    @property
+    def repeatable(self):
+        return self._buffer is not None
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """ chunk_size is ignored, the chunks are passed on as they come. """
+        if self._buffer is not None:
+            yield from self._buffer.chunks(chunk_size)
+            return
+        if self._chunks is None:
+            raise ValueError('chunk stream has already been consumed')
+        chunks, self._chunks = self._chunks, None
+        total = 0
+        for chunk in chunks:
+            view = memoryview(chunk).cast('B')
+            total += len(view)
+            yield view
+        self.size = total
+
+    def buffer(self):
+        if self._buffer is None:
+            self._buffer = BufferSource(b''.join(self.chunks()))
+        return self._buffer.buffer()
+
+
+class ChunkReader(io.RawIOBase):
+    """ Raw binary reader over an iterator of bytes-like chunks """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk).cast('B')
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+
+def media_source(data):
+    """
+        Wrap data given to a DvMultimedia: a MediaSource is used as is,
+        buffers (bytes, bytearray, memoryview, mmap) become a BufferSource
+        and other iterables a ChunkSource.
+    """
+    if isinstance(data, MediaSource):
+        return data
+    try:
+        return BufferSource(data)
+    except TypeError:
+        pass
+    if isinstance(data, (str, dict)) or not hasattr(data, '__iter__'):
+        raise AttributeError('data attribute must be a byte string, a buffer or an iterable of chunks')
+    return ChunkSource(data)
@@ -2,10 +2,13 @@
 
 
 import copy
+import math
+import operator
 
 from openehr.rm.datatypes.basic import DataValue
 from openehr.rm.datatypes.text import DvCodedText, DvText, CodePhrase
 from openehr.rm.support import Interval
+from openehr.rm.support.measurement import MeasurementService
 
 
 class NonParametrizedValue(Exception):
@@ -14,7 +17,7 @@ class NonParametrizedValue(Exception):
 
 class DvOrdered(DataValue):
 
-    _normal_range = _other_reference_ranges = _normal_status = None
+    __slots__ = ('_normal_range', '_other_reference_ranges', '_normal_status')
 
     @property
     def normal_range(self):
@@ -90,7 +93,7 @@ class DvOrdered(DataValue):
 
 
 class DvOrdinal(DvOrdered):
-    _value = _symbol = None
+    __slots__ = ('_value', '_symbol')
 
     @property
     def value(self):
@@ -146,7 +149,7 @@ class DvOrdinal(DvOrdered):
 
 
 class DvQuantified(DvOrdered):
-    _magnitude = _accuracy = _magnitude_status = None
+    __slots__ = ('_magnitude', '_accuracy', '_magnitude_status')
     VALID_STATUS = ['=', '>', '<', '<=', '>=', '~']
 
 
@@ -197,13 +200,13 @@ class DvAbsoluteQuantity(DvQuantified):
     """
         TODO: There is maths add/subtract/diff to be worked out here
     """
-    pass
+    __slots__ = ()
 
 
 class DvAmount(DvQuantified):
     UNKNOWN_ACCURACY_VALUE = -1.0
 
-    _accuracy_is_percent = None
+    __slots__ = ('_accuracy_is_percent',)
 
     @property
     def accuracy_is_percent(self):
@@ -224,17 +227,15 @@ class DvAmount(DvQuantified):
 
     @property
     def accuracy_unknown(self):
-        return self.accuracy == self.UNKNOWN_ACCURACY_VALUE
+        return self.accuracy is None or self.accuracy == self.UNKNOWN_ACCURACY_VALUE
 
     def __add__(self,other):
         assert self.is_strictly_comparable_to(other)
-        klass = type(self)
-        return self._do_arithmetic_expression(other,klass,"+")
+        return self._do_arithmetic(other, operator.add)
 
     def __sub__(self,other):
         assert self.is_strictly_comparable_to(other)
-        klass = type(self)
-        return self._do_arithmetic_expression(other,klass,"-")
+        return self._do_arithmetic(other, operator.sub)
 
     def __neg__(self):
         negated_copy = copy.copy(self)
@@ -247,35 +248,74 @@ class DvAmount(DvQuantified):
         other_magnitude = other.magnitude() if callable(other.magnitude) else other.magnitude
         return this_magnitude < other_magnitude
 
-    def _do_arithmetic_expression(self,other,klass,operator):
-        has_ac_unknown = self.accuracy_unknown
-        other_has_ac_unknown = other.accuracy_unknown
-        other_has_percent = other.accuracy_is_percent
-        has_percent = self.accuracy_is_percent
-        new_obj_data = {}
-        if has_ac_unknown or other_has_ac_unknown:
-             new_obj_data['accuracy'] = self.UNKNOWN_ACCURACY_VALUE
-        elif has_percent^other_has_percent:
-            chosen_accuracy = max(self.accuracy,other.accuracy)
-            new_obj_data['accuracy_is_percent'] = False
-            if chosen_accuracy == other.accuracy and other.accuracy_is_percent:
-                new_obj_data['accuracy_is_percent'] = True
-            elif chosen_accuracy == self.accuracy and self.accuracy_is_percent:
-                new_obj_data['accuracy_is_percent'] = True
-            new_obj_data['accuracy'] = chosen_accuracy
-        else:
-            if has_percent and other_has_percent:
-                new_obj_data['accuracy_is_percent'] = True
-            new_accuracy = eval("float(self.accuracy"+operator+"other.accuracy)")
-            new_obj_data['accuracy'] = new_accuracy 
+    def _combine_accuracy(self, accuracy, accuracy_is_percent, other, op):
+        """
+            Accuracy of the result of 'op' applied to a value with the given
+            accuracy and other. Returns (accuracy, accuracy_is_percent), the
+            percent flag is None when it is left to the constructor default.
+        """
+        if accuracy is None or accuracy == self.UNKNOWN_ACCURACY_VALUE or other.accuracy_unknown:
+            return self.UNKNOWN_ACCURACY_VALUE, None
+        accuracy_is_percent = bool(accuracy_is_percent)
+        other_accuracy = other.accuracy
+        other_has_percent = bool(other.accuracy_is_percent)
+        if accuracy_is_percent ^ other_has_percent:
+            chosen_accuracy = max(accuracy, other_accuracy)
+            if chosen_accuracy == other_accuracy and other_has_percent:
+                return chosen_accuracy, True
+            if chosen_accuracy == accuracy and accuracy_is_percent:
+                return chosen_accuracy, True
+            return chosen_accuracy, False
+        new_accuracy = float(op(accuracy, other_accuracy))
+        if accuracy_is_percent and other_has_percent:
+            return new_accuracy, True
+        return new_accuracy, None
+
+    def _do_arithmetic(self, other, op):
+        accuracy, accuracy_is_percent = self._combine_accuracy(self.accuracy, self.accuracy_is_percent, other, op)
         this_magnitude = self.magnitude() if callable(self.magnitude) else self.magnitude
         other_magnitude = other.magnitude() if callable(other.magnitude) else other.magnitude
-        new_obj_data['magnitude'] = eval("this_magnitude" + operator + "other_magnitude")
-        obj = klass(**new_obj_data)
-        return obj
+        return self._arithmetic_result(op(this_magnitude, other_magnitude), accuracy, accuracy_is_percent)
+
+    def _arithmetic_result(self, magnitude, accuracy, accuracy_is_percent):
+        """
+            Build the result of an arithmetic operation. The operands were
+            validated, so the trusted construction path is used.
+        """
+        if accuracy_is_percent is None:
+            accuracy_is_percent = False
+        return type(self).from_validated(magnitude=magnitude, accuracy=accuracy,
+                accuracy_is_percent=accuracy_is_percent, magnitude_status='=')
+
+    @classmethod
+    def sum(cls, amounts):
+        """
+            Add up many amounts in one pass, giving the same result as
+            folding them with +, without building the intermediate objects.
+        """
+        amounts = iter(amounts)
+        try:
+            first = next(amounts)
+        except StopIteration:
+            raise ValueError('sum() of an empty sequence of %s' % cls.__name__)
+        if not isinstance(first, cls):
+            raise TypeError("Argument type must be %s" % cls.__name__)
+        return first._sum(amounts)
+
+    def _sum(self, others):
+        accuracy, accuracy_is_percent = self.accuracy, self.accuracy_is_percent
+        magnitude = self.magnitude() if callable(self.magnitude) else self.magnitude
+        for other in others:
+            assert self.is_strictly_comparable_to(other)
+            accuracy, percent = self._combine_accuracy(accuracy, accuracy_is_percent, other, operator.add)
+            # the constructor default applies when the flag is not chosen
+            accuracy_is_percent = bool(percent)
+            magnitude += other.magnitude() if callable(other.magnitude) else other.magnitude
+        return self._arithmetic_result(magnitude, accuracy, accuracy_is_percent)
 
 
 class DvCount(DvAmount):
+    __slots__ = ()
 
     @property
     def magnitude(self):
@@ -305,23 +345,29 @@ class DvCount(DvAmount):
     def __add__(self, val):
         if not isinstance(val, DvCount):
             raise TypeError("Argument type must be DvCount")
-        else:
-            return DvCount(magnitude = self.magnitude + val.magnitude,
-                    accuracy=self.accuracy, accuracy_is_percent=self.accuracy_is_percent, magnitude_status=self.magnitude_status,
-                    normal_status=self.normal_status, normal_range=self.normal_range, other_reference_ranges=self.other_reference_ranges)
+        return self._with_magnitude(self.magnitude + val.magnitude)
 
     def __sub__(self, val):
         if not isinstance(val, DvCount):
             raise TypeError("Argument type must be DvCount")
-        else:
-            return DvCount(magnitude = self.magnitude - val.magnitude, 
-                    accuracy=self.accuracy, accuracy_is_percent=self.accuracy_is_percent, magnitude_status=self.magnitude_status,
-                    normal_status=self.normal_status, normal_range=self.normal_range, other_reference_ranges=self.other_reference_ranges)
+        return self._with_magnitude(self.magnitude - val.magnitude)
 
     def __neg__(self):
-        return DvCount(magnitude = -self.magnitude, 
-                    accuracy=self.accuracy, accuracy_is_percent=self.accuracy_is_percent, magnitude_status=self.magnitude_status,
-                    normal_status=self.normal_status, normal_range=self.normal_range, other_reference_ranges=self.other_reference_ranges)
+        return self._with_magnitude(-self.magnitude)
+
+    def _with_magnitude(self, magnitude):
+        """ A DvCount with the metadata of this one and a new magnitude. """
+        return DvCount.from_validated(magnitude=magnitude,
+                accuracy=self.accuracy, accuracy_is_percent=self.accuracy_is_percent, magnitude_status=self.magnitude_status,
+                normal_status=self.normal_status, normal_range=self.normal_range, other_reference_ranges=self.other_reference_ranges)
+
+    def _sum(self, others):
+        magnitude = self.magnitude
+        for other in others:
+            if not isinstance(other, DvCount):
+                raise TypeError("Argument type must be DvCount")
+            magnitude += other.magnitude
+        return self._with_magnitude(magnitude)
 
 
 class DvInterval(DataValue, Interval):
@@ -340,7 +386,7 @@ class ProportionKind(object):
         return n in (self.pkRatio, self.pkUnitary, self.pkPercent, self.pkFraction, self.pkIntegerFraction)
 
 class DvProportion(DvAmount, ProportionKind):
-    _precision = _type = _numerator = _denominator = None
+    __slots__ = ('_precision', '_type', '_numerator', '_denominator')
 
     @property
     def numerator(self):
@@ -422,6 +468,12 @@ class DvProportion(DvAmount, ProportionKind):
     def is_integral(self):
         return isinstance(self.numerator, int) and isinstance(self.denominator, int)
 
+    def _arithmetic_result(self, magnitude, accuracy, accuracy_is_percent):
+        new_obj_data = {'magnitude': magnitude, 'accuracy': accuracy}
+        if accuracy_is_percent is not None:
+            new_obj_data['accuracy_is_percent'] = accuracy_is_percent
+        return type(self)(**new_obj_data)
+
     def magnitude(self):
         """
             TODO: may conflict with the magnitude attribute
@@ -430,7 +482,7 @@ class DvProportion(DvAmount, ProportionKind):
 
 
 class DvQuantity(DvAmount):
-    _units = _precision = None
+    __slots__ = ('_units', '_precision')
 
     @property
     def precision(self):
@@ -479,7 +531,37 @@ class DvQuantity(DvAmount):
 
     def is_strictly_comparable_to(self, other):
         if (isinstance(other, self.__class__)):
-            return self.units==other.units and self.magnitude==other.magnitude
+            return self.units==other.units
+        return False
+
+    def _arithmetic_result(self, magnitude, accuracy, accuracy_is_percent):
+        return DvQuantity.from_validated(magnitude=float(magnitude), units=self.units, precision=self.precision,
+                accuracy=accuracy, accuracy_is_percent=accuracy_is_percent, magnitude_status='=')
+
+    def to_units(self, units):
+        """
+            Return an equivalent DvQuantity expressed in 'units', converted
+            by the measurement service. An absolute accuracy is scaled like
+            the magnitude; a percentage accuracy is kept unless the units
+            have different zeros (Cel to K), where it becomes absolute. The
+            precision gains or loses the decimal places moved by the scale.
+        """
+        if units == self.units:
+            return self
+        scale, shift = MeasurementService().conversion(self.units, units)
+        accuracy, accuracy_is_percent = self.accuracy, self.accuracy_is_percent
+        if not self.accuracy_unknown:
+            if accuracy_is_percent and shift:
+                accuracy, accuracy_is_percent = abs(self.magnitude * accuracy / 100.0), False
+            if not accuracy_is_percent:
+                accuracy = abs(accuracy * scale)
+        precision = self.precision
+        if precision is not None and scale:
+            precision = max(0, precision - round(math.log10(abs(scale))))
+        quantity = DvQuantity(self.magnitude * scale + shift, units, precision=precision, accuracy=accuracy,
+                accuracy_is_percent=accuracy_is_percent, normal_status=self.normal_status)
+        quantity.magnitude_status = self.magnitude_status
+        return quantity
 
     def __str__(self):
         if self.units:
@@ -493,7 +575,7 @@ class DvQuantity(DvAmount):
         return False
 
 class ReferenceRange(DvOrdered):
-    _range = _meaning = None
+    __slots__ = ('_range', '_meaning')
     NORMAL = 'normal'
 
     @property
@@ -0,0 +1,66 @@
+# -*- coding: UTF-8 -*-
+"""
+    Bulk parsing of ISO 8601 strings into numpy columns, for imports where
+    building one DvDuration per value is too expensive.
+
+    Requires numpy.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+from openehr.rm.datatypes.quantity.datetime import (DURATION_SECONDS,
+                                                      ZERO_DURATION, parse_duration)
+
+DURATION_FIELDS = ('years', 'months', 'weeks', 'days', 'hours', 'minutes', 'seconds')
+
+# Seconds per component, in DurationComponents order
+SECONDS_PER_FIELD = numpy.array([DURATION_SECONDS[symbol] for symbol in 'YMWDhms'] + [1], dtype=numpy.float64)
+INVALID_ROW = (numpy.nan,) * len(ZERO_DURATION)
+
+DurationColumns = namedtuple('DurationColumns',
+        DURATION_FIELDS + ('fractional_second', 'total_seconds', 'invalid'))
+
+
+def _distinct(values):
+    """
+        Return (distinct values, int array mapping each value to its index in
+        distinct). Anything but a string is mapped to None.
+    """
+    index = {}
+    codes = numpy.fromiter((index.setdefault(value if type(value) == str else None, len(index))
+            for value in values), dtype=numpy.intp)
+    return list(index), codes
+
+
+def parse_durations(values):
+    """
+        Parse a sequence of ISO 8601 duration strings without creating a
+        DvDuration per value.
+
+        Each distinct string is parsed once, with the parser DvDuration uses,
+        and the results are scattered to the columns with numpy indexing;
+        dose intervals and event widths repeat a lot.
+
+        Returns DurationColumns: an int64 array per component, float64
+        fractional_second and total_seconds (nominal months and years as in
+        DvDuration.to_seconds), and the boolean 'invalid' mask. Invalid
+        values have zero components and a NaN total.
+    """
+    distinct, codes = _distinct(values)
+    rows = []
+    for value in distinct:
+        # P and PT alone are rejected by DvDuration.valid_ISO8601_duration
+        parsed = None
+        if value is not None and value not in ('', 'P', 'PT'):
+            parsed = parse_duration(value)
+        rows.append(parsed or INVALID_ROW)
+    table = numpy.array(rows, dtype=numpy.float64).reshape(len(rows), len(INVALID_ROW))
+    invalid = numpy.isnan(table[:, 0])
+    table[invalid] = 0
+    total_seconds = table[:, :len(SECONDS_PER_FIELD)] @ SECONDS_PER_FIELD
+    total_seconds[invalid] = numpy.nan
+    components = table[:, :len(DURATION_FIELDS)].astype(numpy.int64)[codes]
+    return DurationColumns(*(components[:, i] for i in range(len(DURATION_FIELDS))),
+            table[codes, len(DURATION_FIELDS)], total_seconds[codes], invalid[codes])
@@ -3,8 +3,9 @@
 
 import re
 import math
-import copy
+import calendar
 import datetime
+from collections import namedtuple
 
 import openehr.rm.datatypes.quantity.iso8601_ as iso8601
 
@@ -18,12 +19,113 @@ from openehr.rm.support import TimeDefinitions
 
 ISO8601_REGEX = re.compile(r'^P([0-9]+Y)?([0-9]+M)?([0-9]+W)?([0-9]+D)?(T([0-9]+H)?([0-9]+M)?([0-9]+([,.][0-9]+)?S)?)?$')
 
+DurationComponents = namedtuple('DurationComponents',
+        ['years', 'months', 'weeks', 'days', 'hours', 'minutes', 'seconds', 'fractional_second'])
+
+ZERO_DURATION = DurationComponents(0, 0, 0, 0, 0, 0, 0, 0.0)
+
+# Seconds in each duration designator, months and years are nominal.
+_MINUTE = TimeDefinitions.SECONDS_IN_MINUTES
+_HOUR = _MINUTE * TimeDefinitions.MINUTES_IN_HOUR
+_DAY = _HOUR * TimeDefinitions.HOURS_IN_DAY
+DURATION_SECONDS = {
+    's': 1,
+    'm': _MINUTE,
+    'h': _HOUR,
+    'D': _DAY,
+    'W': _DAY * TimeDefinitions.DAYS_IN_WEEK,
+    'M': _DAY * TimeDefinitions.NOMINAL_DAYS_IN_MONTH,
+    'Y': _DAY * TimeDefinitions.NOMINAL_DAYS_IN_YEAR,
+}
+
+# Decimal places of the seconds kept when a duration is built from a number.
+DURATION_FRACTION_DIGITS = 9
+
+
+def parse_duration(value):
+    """
+    Split an ISO 8601 duration string into DurationComponents, or None if
+    it does not match ISO8601_REGEX.
+    """
+    captured_match = ISO8601_REGEX.match(value)
+    if captured_match is None:
+        return None
+    years, months, weeks, days, time, hours, minutes, seconds, fraction = captured_match.groups()
+    whole_seconds, fractional_second = 0, 0.0
+    if seconds is not None:
+        if fraction is not None:
+            whole_seconds = int(seconds[:-len(fraction) - 1])
+            fractional_second = float('0.' + fraction[1:])
+        else:
+            whole_seconds = int(seconds[:-1])
+    return DurationComponents(
+        int(years[:-1]) if years else 0,
+        int(months[:-1]) if months else 0,
+        int(weeks[:-1]) if weeks else 0,
+        int(days[:-1]) if days else 0,
+        int(hours[:-1]) if hours else 0,
+        int(minutes[:-1]) if minutes else 0,
+        whole_seconds,
+        fractional_second)
+
+
+def duration_seconds(components):
+    """ Unsigned length in seconds of DurationComponents. """
+    return (components.years * DURATION_SECONDS['Y'] + components.months * DURATION_SECONDS['M'] +
+            components.weeks * DURATION_SECONDS['W'] + components.days * DURATION_SECONDS['D'] +
+            components.hours * DURATION_SECONDS['h'] + components.minutes * DURATION_SECONDS['m'] +
+            components.seconds + components.fractional_second)
+
+
+def split_seconds(seconds):
+    """
+    Split an unsigned number of seconds into DurationComponents, taking the
+    largest designators first with nominal months and years. The total is
+    rounded to DURATION_FRACTION_DIGITS first so that the rounding carries
+    into the larger designators.
+    """
+    units = 10 ** DURATION_FRACTION_DIGITS
+    remainder = round(seconds * units)
+    counts = []
+    for symbol in 'YMWDhm':
+        count, remainder = divmod(remainder, round(DURATION_SECONDS[symbol] * units))
+        counts.append(count)
+    whole_seconds, fraction = divmod(remainder, units)
+    return DurationComponents(*counts, whole_seconds, fraction / units)
+
+
+def format_duration(components):
+    """ The ISO 8601 string P[nY][nM][nW][nD][T[nH][nM][nS]] of DurationComponents. """
+    date = ''.join('%d%s' % (count, symbol) for count, symbol in zip(components[:4], 'YMWD') if count)
+    time = ''.join('%d%s' % (count, symbol) for count, symbol in zip(components[4:6], 'HM') if count)
+    # fixed point digits of the fraction, str() would give an exponent for small values
+    fraction = ('%0*d' % (DURATION_FRACTION_DIGITS,
+            round(components.fractional_second * 10 ** DURATION_FRACTION_DIGITS))).rstrip('0')
+    if fraction:
+        time += '%d.%sS' % (components.seconds, fraction)
+    elif components.seconds:
+        time += '%dS' % components.seconds
+    if not date and not time:
+        return 'PT0S'
+    return 'P' + date + ('T' + time if time else '')
+
 
 class DvDuration(DvAmount,TimeDefinitions):
-    _value = None
+    """
+    The value string is parsed once, when it is set, into a DurationComponents
+    record and its unsigned length in seconds. The accessors and magnitude()
+    read those fields.
+
+    A duration built from a number of seconds (arithmetic, DvDate.diff)
+    keeps only the number; the components and the ISO string are worked out
+    when first asked for.
+    """
+    __slots__ = ('_value', 'sign', '_components', '_seconds')
 
     @property
     def value(self):
+        if self._value is None and self._seconds is not None:
+            self._value = format_duration(self.components())
         return self._value
 
     @value.setter
@@ -31,25 +133,54 @@ class DvDuration(DvAmount,TimeDefinitions):
         if value is not None and type(value) != str:
             raise AttributeError('value attribute must be an String')
         self._value = value
+        self._components = parse_duration(value) if value is not None else None
+        self._seconds = duration_seconds(self._components) if self._components else 0
 
-    sign = '+'
+    @classmethod
+    def from_validated(cls, **fields):
+        """
+        As DataValue.from_validated; the components and seconds are derived
+        from value when not given.
+        """
+        obj = super(DvDuration, cls).from_validated(**fields)
+        if obj._seconds is None and obj._value is not None:
+            obj._components = parse_duration(obj._value)
+            obj._seconds = duration_seconds(obj._components)
+        if obj.sign is None:
+            obj.sign = '+'
+        return obj
+
+    @classmethod
+    def from_seconds(cls, seconds, accuracy=DvAmount.UNKNOWN_ACCURACY_VALUE, accuracy_is_percent=False, **fields):
+        """ A duration of 'seconds' (negative for a negative duration), without validation. """
+        return cls.from_validated(seconds=abs(seconds), sign='-' if seconds < 0 else '+',
+                accuracy=accuracy, accuracy_is_percent=accuracy_is_percent, **fields)
+
+    @classmethod
+    def from_components(cls, components, sign='+', accuracy=DvAmount.UNKNOWN_ACCURACY_VALUE,
+                        accuracy_is_percent=False, **fields):
+        """ A duration of DurationComponents, without validation. """
+        return cls.from_validated(components=components, seconds=duration_seconds(components), sign=sign,
+                accuracy=accuracy, accuracy_is_percent=accuracy_is_percent, **fields)
 
     def __init__(self,value_or_magnitude='',accuracy=DvAmount.UNKNOWN_ACCURACY_VALUE,
                       magnitude_status=None,accuracy_is_percent=False,normal_range=None,
                       other_reference_ranges=None,normal_status=None,**kwargs):
         if 'magnitude' in kwargs:
             value_or_magnitude = kwargs['magnitude']
+        self.sign = '+'
         if isinstance(value_or_magnitude,str):
             self.value = value_or_magnitude
+            if not self.valid_ISO8601_duration(self.value):
+                raise AttributeError("Invalid value")
         elif isinstance(value_or_magnitude,float) or isinstance(value_or_magnitude,int):
+            if not math.isfinite(value_or_magnitude):
+                raise AttributeError("Invalid value")
             if value_or_magnitude < 0:
                 self.sign = '-'
-                value_or_magnitude = math.fabs(value_or_magnitude)
-            self.value = unicode(self._convert_to_str(value_or_magnitude))
+            self._seconds = abs(value_or_magnitude)
         else:
             raise AttributeError("Invalid value")
-        if not self.valid_ISO8601_duration(self.value):
-            raise AttributeError("Invalid value")
         self.accuracy_is_percent = accuracy_is_percent
         self.accuracy = accuracy
         if magnitude_status is None or self.valid_magnitude_status(magnitude_status):
@@ -61,181 +192,74 @@ class DvDuration(DvAmount,TimeDefinitions):
     def magnitude(self):
         return self.to_seconds()
 
+    def _arithmetic_result(self, magnitude, accuracy, accuracy_is_percent):
+        return DvDuration.from_seconds(magnitude, accuracy=accuracy,
+                accuracy_is_percent=bool(accuracy_is_percent))
+
     def _convert_to_str(self,seconds):
-        """Convert seconds using the ISO format: 
+        """Convert seconds using the ISO format:
            P[nnY][nnM][nnW][nnD][T[nnH][nnM][nnS]] .
         """
-        if seconds == 0:
-            return 'PT0S'
-        date_time_parts = {'Y':0,
-                           'M':0,
-                           'W':0,
-                           'D':0,
-                           'h':0,
-                           'm':0,
-                           's':0}
-        date_time_order = ('Y',
-                           'M',
-                           'W',
-                           'D',
-                           'h',
-                           'm',
-                           's',)
-        remaining_seconds = seconds
-        date_string = 'P'
-        time_string = ''
-        date_list = []
-        time_list = []
-
-        for symbol in date_time_order:
-            converter_multiplier = self._get_converted_divisor(symbol)
-            if remaining_seconds < converter_multiplier:
-                continue
-            elif remaining_seconds == converter_multiplier:
-                date_time_parts[symbol] = 1
-                remaining_seconds = 0
-                break
-            else:
-                date_time_int, remaining_seconds = self._convert_duration(remaining_seconds,converter_multiplier)
-                date_time_parts[symbol] = date_time_int
-        date_time_parts['s'] += remaining_seconds
-
-        for symbol in date_time_order:
-            if date_time_parts[symbol] == 0:
-                continue
-            if symbol.isupper():
-                date_list.append(str(date_time_parts[symbol])+symbol)
-            elif symbol.islower():
-                time_list.append(str(date_time_parts[symbol])+symbol.upper())
-        date_string += ''.join(date_list)
-        if len(time_list) != 0:
-            time_string = ''.join(time_list)
-            time_string = 'T'+time_string
-
-        return unicode(date_string+time_string)
+        return format_duration(split_seconds(seconds))
 
     def to_seconds(self):
-        years_in_seconds = self.years()*self._get_converted_divisor('Y')
-        months_in_seconds = self.months()*self._get_converted_divisor('M')
-        weeks_in_seconds = self.weeks()*self._get_converted_divisor('W')
-        days_in_seconds = self.days()*self._get_converted_divisor('D')
-        hours_in_seconds = self.hours()*self._get_converted_divisor('h')
-        minutes_in_seconds = self.minutes()*self._get_converted_divisor('m')
-
-        date_seconds = (years_in_seconds + months_in_seconds + weeks_in_seconds + days_in_seconds)
-        time_seconds = (hours_in_seconds + minutes_in_seconds + self.seconds() + self.fractional_second())
-        total_seconds = date_seconds + time_seconds
         if self.sign == '-':
-            return -total_seconds
-        return total_seconds
-
+            return -self._seconds
+        return self._seconds
 
-    def _get_converted_divisor(self,time_symbol):
-        """
-        Catch the corrected divisor to seconds unit,
-        using the mapping unit symbol - multiplier.
+    def calendar_offset(self):
         """
-        min_to_sec = self.SECONDS_IN_MINUTES
-        hour_to_sec = min_to_sec*self.SECONDS_IN_MINUTES
-        day_to_sec = hour_to_sec*self.HOURS_IN_DAY
-        week_to_sec = day_to_sec*self.DAYS_IN_WEEK
-        month_to_sec = day_to_sec*self.NOMINAL_DAYS_IN_MONTH
-        year_to_sec = day_to_sec*self.NOMINAL_DAYS_IN_YEAR
-        duration_parts = {
-                      's':1,
-                      'm':min_to_sec,
-                      'h':hour_to_sec,
-                      'D':day_to_sec,
-                      'W':week_to_sec,
-                      'M':month_to_sec,
-                      'Y':year_to_sec}
-
-        return duration_parts[time_symbol]
-  
-    def _convert_duration(self,seconds,multiplier):
+        The signed (months, days) this duration moves a date by in calendar
+        arithmetic: years count as 12 months, weeks as 7 days and the time
+        part as the whole days it contains.
         """
-        Do the math to compute the ISO string from each unit,
-        passing the arguments the total seconds.
-        It returns the remaing seconds and the unit quantity specified.
-        Ex: 31556737.0 seconds(which represent 1 year and 1 seconds in seconds) 
-            and 31556736.0 (year multiplier) returns (1,1.0) .
-        """
-        quantified_duration = math.trunc(seconds / multiplier)
-        remaining_seconds = math.fmod(seconds , multiplier)
-        return (quantified_duration,remaining_seconds)
+        components = self.components()
+        months = components.years * TimeDefinitions.MONTHS_IN_YEAR + components.months
+        days = components.weeks * TimeDefinitions.DAYS_IN_WEEK + components.days
+        days += int((components.hours * _HOUR + components.minutes * _MINUTE + components.seconds +
+                     components.fractional_second) // _DAY)
+        if self.sign == '-':
+            return -months, -days
+        return months, days
+
+    def components(self):
+        if self._components is None:
+            if not self._seconds:
+                return ZERO_DURATION
+            self._components = split_seconds(self._seconds)
+        return self._components
 
     def years(self):
-        return self._get_specific_date_time('Y')
+        return self.components().years
 
     def months(self):
-        return self._get_specific_date_time('M')
+        return self.components().months
 
     def weeks(self):
-        return self._get_specific_date_time('W')
+        return self.components().weeks
 
     def days(self):
-        return self._get_specific_date_time('D')
+        return self.components().days
 
     def hours(self):
-        return self._get_specific_date_time('H')
+        return self.components().hours
 
     def minutes(self):
-        return self._get_specific_date_time('TM')
+        return self.components().minutes
 
     def seconds(self):
-        return self._get_specific_date_time('S')
+        return self.components().seconds
 
     def fractional_second(self):
-        return self._get_specific_date_time('FS')
-   
-    def _get_specific_date_time(self,symbol):
-        """
-        Catch the defined value on each date or time, based on
-        mapping between the regex and the unit symbol.
-        """
-        specific_date_time = 0
-        symbol_position_map = {'Y':1,
-                               'M':2,
-                               'W':3,
-                               'D':4,
-                               'H':6,
-                               'TM':7,
-                               'S':8,
-                               'FS':8
-                               }
-        captured_match = ISO8601_REGEX.match(self.value)
-        if captured_match is not None:
-            verified_part = captured_match.group(symbol_position_map[symbol])
-            if verified_part is not None:
-                verified_part = verified_part[:-1]
-                if symbol == 'FS' or symbol == 'S':
-                    decimal_sign = '.'
-                    if self.is_decimal_sign_comma():
-                        decimal_sign = ','
-                    fractional_parts = verified_part.split(decimal_sign)
-                    if symbol == 'FS':
-                        if len(fractional_parts) == 2:
-                            specific_date_time = '0.'+fractional_parts[1]
-                        else: specific_date_time = '0.0'
-                        specific_date_time = float(specific_date_time)
-                    else:
-                        specific_date_time = int(fractional_parts[0])
-                else:
-                    specific_date_time = int(verified_part)
-        return specific_date_time
-   
+        return self.components().fractional_second
+
     def valid_ISO8601_duration(self,s):
         if self.value == '' or self.value == 'P' or self.value == 'PT': return False
-        captured_match = ISO8601_REGEX.match(self.value)
-        if captured_match is not None: return True
-        return False
+        return self._components is not None
 
     def is_decimal_sign_comma(self):
-        captured_match = ISO8601_REGEX.match(self.value)
-        seconds_string = captured_match.group(9)
-        if seconds_string is not None:
-            return ',' in seconds_string
-        return False
+        # a comma may only appear in the seconds of a parsed value
+        return self._components is not None and self._value is not None and ',' in self._value
 
     def is_strictly_comparable_to(self, other):
         if isinstance(other, DvDuration):
@@ -244,19 +268,25 @@ class DvDuration(DvAmount,TimeDefinitions):
  
     def __eq__(self,other):
         if self.is_strictly_comparable_to(other):
-            same_magnitude = self.magnitude() == other.magnitude()
+            same_magnitude = self.to_seconds() == other.to_seconds()
             same_accuracy_type = other.accuracy_is_percent == self.accuracy_is_percent
             same_accuracy = self.accuracy == other.accuracy
             if same_magnitude and same_accuracy and same_accuracy_type:
                 return True
         return False
 
+    def __lt__(self, other):
+        assert self.is_strictly_comparable_to(other)
+        return self.to_seconds() < other.to_seconds()
+
+    def __gt__(self, other):
+        assert self.is_strictly_comparable_to(other)
+        return self.to_seconds() > other.to_seconds()
+
     def __neg__(self):
-        new_obj = copy.copy(self)
-        if new_obj.sign == '+':
-            new_obj.sign = '-'
-        else: new_obj.sign = '+'
-        return new_obj
+        fields = dict((field, getattr(self, slot)) for field, slot in self._slot_fields)
+        fields['sign'] = '-' if self.sign == '+' else '+'
+        return self.from_validated(**fields)
 
     def __str__(self):
         return self.value
@@ -269,13 +299,103 @@ class DvTemporal(DvAbsoluteQuantity):
     """
     Abstract class. Specialised temporal variant of DV_ABSOLUTE_QUANTITY whose diff type is
     DV_DURATION.
+
+    Descendants are ordered on their magnitude, so comparisons are a single
+    number comparison.
     """
+    __slots__ = ()
 
     def __init__(self, magnitude=None, accuracy=None, normal_range=None, other_reference_ranges=None, normal_status=None, magnitude_status=None):
         self.magnitude = magnitude
         DvAbsoluteQuantity.__init__(self, magnitude=magnitude, accuracy=accuracy, normal_range=normal_range,
                 other_reference_ranges=other_reference_ranges, normal_status=normal_status, magnitude_status=magnitude_status)
 
+    def is_strictly_comparable_to(self, other):
+        return type(other) == type(self)
+
+    def _other_magnitude(self, other):
+        if not self.is_strictly_comparable_to(other):
+            raise TypeError("Argument type must be %s" % type(self).__name__)
+        return other.magnitude
+
+    def __lt__(self, other):
+        return self.magnitude < self._other_magnitude(other)
+
+    def __le__(self, other):
+        return self.magnitude <= self._other_magnitude(other)
+
+    def __gt__(self, other):
+        return self.magnitude > self._other_magnitude(other)
+
+    def __ge__(self, other):
+        return self.magnitude >= self._other_magnitude(other)
+
+    def __eq__(self, other):
+        if self.is_strictly_comparable_to(other):
+            return self.magnitude == other.magnitude
+        return False
+
+    def __hash__(self):
+        return hash(self.magnitude)
+
+
+def _month_starts():
+    starts = [0]
+    for month_index in range(CYCLE_MONTHS):
+        year, month = divmod(month_index, TimeDefinitions.MONTHS_IN_YEAR)
+        starts.append(starts[-1] + calendar.monthrange(year + 1, month + 1)[1])
+    return tuple(starts)
+
+
+# The Gregorian calendar repeats every 400 years. MONTH_STARTS[i] is the day,
+# counted from 0001-01-01, on which month i of the cycle starts; the last
+# entry is the length of the cycle.
+CYCLE_MONTHS = 400 * TimeDefinitions.MONTHS_IN_YEAR
+MONTH_STARTS = _month_starts()
+CYCLE_DAYS = MONTH_STARTS[-1]
+
+
+def month_index(year, month):
+    """ Months from January of year 1 to month 'month' of 'year'. """
+    return (year - 1) * TimeDefinitions.MONTHS_IN_YEAR + month - 1
+
+
+def month_start(index):
+    """ Ordinal day of the first day of the month with that month_index. """
+    cycles, month = divmod(index, CYCLE_MONTHS)
+    return cycles * CYCLE_DAYS + MONTH_STARTS[month] + 1
+
+
+def month_length(index):
+    month = index % CYCLE_MONTHS
+    return MONTH_STARTS[month + 1] - MONTH_STARTS[month]
+
+
+DATE_REGEX = re.compile("""
+    (?P<year>[0-9]{4})
+    ((-(?P<monthdash>[0-9]{1,2}))|(?P<month>[0-9]{2}))?
+    ((-(?P<daydash>[0-9]{1,2}))|(?P<day>[0-9]{2}))?""", re.VERBOSE)
+
+
+def parse_iso_date(value):
+    """
+    Parse an ISO 8601 (possibly partial) date string into ([year, month, day],
+    ordinal day). Unknown month and day are None in the list and count as 1
+    in the ordinal.
+    """
+    m = DATE_REGEX.match(value)
+    if not m:
+        raise AttributeError('cannot create date from %s' % value)
+    year, monthdash, month, daydash, day = m.group('year', 'monthdash', 'month', 'daydash', 'day')
+    month = month or monthdash
+    day = day or daydash
+    components = [int(year), month and int(month), day and int(day)]
+    try:
+        ordinal = datetime.date(components[0], components[1] or 1, components[2] or 1).toordinal()
+    except ValueError:
+        raise AttributeError('Invalid ISO 8601 Date [%s]' % value)
+    return components, ordinal
+
 
 class DvDate(DvTemporal):
     """
@@ -283,15 +403,18 @@ class DvDate(DvTemporal):
     specified only to the day. Semantics defined by ISO 8601.
     Used for recording dates in real world time. The partial form is used for
     approximate birth dates, dates of death, etc.
+
+    The date is held as [year, month, day] and the ordinal day (magnitude).
+    A date built from numbers renders its ISO string when first asked for.
     """
-    _value_str = _value_list = None
-    DATE_REGEX = re.compile("""
-        (?P<year>[0-9]{4})
-        ((-(?P<monthdash>[0-9]{1,2}))|(?P<month>[0-9]{2}))?
-        ((-(?P<daydash>[0-9]{1,2}))|(?P<day>[0-9]{2}))?""", re.VERBOSE)
+    __slots__ = ('_value_str', '_value_list')
+    DATE_REGEX = DATE_REGEX
 
     @property
     def value(self):
+        if self._value_str is None and self._value_list is not None:
+            self._value_str = '-'.join(['%04d' % self._value_list[0]] +
+                    ['%02d' % part for part in self._value_list[1:] if part is not None])
         return self._value_str
 
     @value.setter
@@ -299,6 +422,7 @@ class DvDate(DvTemporal):
         if isinstance(value, DvDate):
             self._value_str = value._value_str
             self._value_list = value._value_list
+            self.magnitude = value.magnitude
         elif type(value) == list:
             if len(value) > 3 or len(value) < 1:
                 raise AttributeError('cannot create date from %s' % value)
@@ -306,44 +430,17 @@ class DvDate(DvTemporal):
                 if type(d) != int:
                     raise AttributeError('cannot create date from %s' % value)
             self._value_list = value.copy()
-            s = ['%04.4d' % value[0]]
-            if len(value) > 1:
-                s.append('%02.2d' % value[1])
-            if len(value) > 2:
-                s.append('%02.2d' % value[2])
-            self._value_str = '-'.join(s)
-
+            self._value_str = None
             while len(value) < 3:
                 value = value + [1]
                 self._value_list = self._value_list + [None]
             dt = datetime.date(*value)
             self.magnitude = dt.toordinal()
         elif isinstance(value, str):
-            m = self.DATE_REGEX.match(value)
-            if not m:
-                raise AttributeError('cannot create date from %s' % value)
-            try:
-                groups = m.groupdict()
-                year = groups.get("year")
-                year = int(year)
-                month = groups.get("month") or groups.get("monthdash")
-                if month:
-                    month = int(month)
-                day = groups.get("day") or groups.get("daydash")
-                if day:
-                    day = int(day)
-            except:
-                raise AttributeError('cannot create date from %s' % value)
-            self._value_list = [year, month, day]
-
-            try:
-                dt = datetime.date(*[year, month or 1, day or 1])
-            except:
-                raise AttributeError('Invalid ISO 8601 Date [%s]' % value)
-            self.magnitude = dt.toordinal()
+            self._value_list, self.magnitude = parse_iso_date(value)
             self._value_str = value
         elif value is None:
-            self._value_str = None
+            self._value_str = self._value_list = None
             self.magnitude = None
         else:
             raise AttributeError('value must be a string')
@@ -359,15 +456,58 @@ class DvDate(DvTemporal):
         magnitude = self.magnitude
         DvTemporal.__init__(self, magnitude=magnitude, accuracy=accuracy, normal_range=normal_range, other_reference_ranges=other_reference_ranges, normal_status=normal_status)
 
+    @classmethod
+    def from_ordinal(cls, ordinal, month_known=True, day_known=True):
+        """
+        The date of a proleptic Gregorian ordinal day, without parsing or
+        formatting. Unknown parts of a partial date are dropped.
+        """
+        date = datetime.date.fromordinal(ordinal)
+        if month_known and day_known:
+            components = [date.year, date.month, date.day]
+        else:
+            components = [date.year, date.month if month_known else None, None]
+            ordinal = datetime.date(date.year, components[1] or 1, 1).toordinal()
+        return cls.from_validated(value_list=components, magnitude=ordinal)
 
     def diff(self, other):
         """
-        Difference of two dates. 'other' must be a DvDate. Returns a DvDuration.
+        Difference of two dates. 'other' must be a DvDate. Returns a DvDuration
+        in days.
         """
         if not isinstance(other, DvDate):
             raise AttributeError('Cannot compare a DvDate and %s' % other)
         diffdays = self.magnitude - other.magnitude
-        return DvDuration(diffdays)
+        return DvDuration.from_components(ZERO_DURATION._replace(days=abs(diffdays)),
+                '-' if diffdays < 0 else '+')
+
+    def add_calendar(self, months, days=0):
+        """
+        The date 'months' calendar months and then 'days' days later. The
+        day of month is clamped to the end of a shorter month, so
+        2001-01-31 plus one month is 2001-02-28. A partial date stays
+        partial.
+        """
+        year, month, day = self._value_list
+        index = month_index(year, month or 1) + months
+        day = min(day or 1, month_length(index))
+        return self.from_ordinal(month_start(index) + day - 1 + days, self.month_known(), self.day_known())
+
+    def __add__(self, duration):
+        """
+        The date 'duration' later in calendar arithmetic: years and months
+        first (see add_calendar), then weeks, days and the whole days of the
+        time part.
+        """
+        if not isinstance(duration, DvDuration):
+            raise TypeError("Argument type must be DvDuration")
+        return self.add_calendar(*duration.calendar_offset())
+
+    def __sub__(self, duration):
+        if not isinstance(duration, DvDuration):
+            raise TypeError("Argument type must be DvDuration")
+        months, days = duration.calendar_offset()
+        return self.add_calendar(-months, -days)
 
     def valueValid(self, value):
         """validIso8601DateTime(value)"""
@@ -426,33 +566,154 @@ class DvDate(DvTemporal):
         return False
 
 
+MICROSECONDS_PER_SECOND = 1000000
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=iso8601.UTC)
+PRECISION_INDEX = dict((precision, i) for i, precision in enumerate(iso8601.PRECISIONS))
+
+
+def epoch_microseconds(value):
+    """
+    Microseconds from 1970-01-01T00:00:00Z to the datetime 'value'. A naive
+    datetime is taken to be UTC.
+    """
+    seconds = ((value.toordinal() - EPOCH_ORDINAL) * _DAY +
+               value.hour * _HOUR + value.minute * _MINUTE + value.second)
+    offset = value.utcoffset()
+    if offset:
+        seconds -= offset.days * _DAY + offset.seconds
+    return seconds * MICROSECONDS_PER_SECOND + value.microsecond
+
+
+def duration_from_microseconds(microseconds):
+    """ DvDuration of a (possibly negative) number of microseconds. """
+    if microseconds % MICROSECONDS_PER_SECOND == 0:
+        return DvDuration(microseconds // MICROSECONDS_PER_SECOND)
+    return DvDuration(microseconds / MICROSECONDS_PER_SECOND)
+
+
 class DvDateTime(DvTemporal):
     """
     Represents an absolute point in time, specified to the second. Semantics defined by ISO 8601.
     Used for recording a precise point in real world time, and for approximate time
     stamps, e.g. the origin of a HISTORY in an OBSERVATION which is only partially known.
+
+    The magnitude is the integer number of microseconds since
+    1970-01-01T00:00:00Z; a value without a time zone is taken to be UTC.
+    Components missing from a partial value count as their lowest value.
     """
+    __slots__ = ('_value', '_datetime', '_precision')
 
-    def __init__(self,value,magnitude,accuracy,normalRange,otherReferenceRanges,normalStatus):
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if isinstance(value, DvDateTime):
+            self._value, self._datetime, self._precision = value._value, value._datetime, value._precision
+            self.magnitude = value.magnitude
+        elif isinstance(value, datetime.datetime):
+            self._value = value.isoformat()
+            self._datetime = value
+            self._precision = PRECISION_INDEX['fraction' if value.microsecond else 'second']
+            self.magnitude = epoch_microseconds(value)
+        elif isinstance(value, str):
+            try:
+                dt, precision = iso8601.parse_date_precision(value, default_timezone=None)
+            except iso8601.ParseError:
+                raise AttributeError('Invalid ISO 8601 Date Time [%s]' % value)
+            self._value = value
+            self._datetime = dt
+            self._precision = PRECISION_INDEX[precision]
+            self.magnitude = epoch_microseconds(dt)
+        elif value is None:
+            self._value = self._datetime = self._precision = None
+            self.magnitude = None
+        else:
+            raise AttributeError('value must be a string')
+
+    def __init__(self, value, accuracy=None, normal_range=None, other_reference_ranges=None, normal_status=None, magnitude_status=None):
+        """
+            Constructor can take:
+                DvDateTime
+                String in ISO8601 Format
+                datetime.datetime
+        """
         self.value = value
-        dt1 = DateTimeFrom(value)
-        dt2 = DateTimeFrom('0000-01-01T00:00:00')
-        dtDiff = dt1 - dt2
-        magnitude = dtDiff.seconds
+        DvTemporal.__init__(self, magnitude=self.magnitude, accuracy=accuracy, normal_range=normal_range,
+                other_reference_ranges=other_reference_ranges, normal_status=normal_status, magnitude_status=magnitude_status)
 
-        DvTemporal.__init__(self,magnitude,accuracy,normalRange,otherReferenceRanges,normalStatus)
+    @classmethod
+    def from_magnitude(cls, magnitude):
+        """ The UTC date time 'magnitude' microseconds after the epoch. """
+        return cls(EPOCH + datetime.timedelta(microseconds=magnitude))
 
-    def diff(self,other):
+    def diff(self, other):
         """Difference of two date/times. Returns a DvDuration"""
-        diffsecs = self.magnitude - other.magnitude
+        return duration_from_microseconds(self.magnitude - self._other_magnitude(other))
+
+    def valueValid(self, value):
+        """validIso8601DateTime(value)"""
+        try:
+            iso8601.parse_date(value)
+            return True
+        except iso8601.ParseError:
+            return False
 
-        return DvDuration(diffsecs)
+    def as_datetime(self):
+        """ The parsed value, naive when the value has no time zone. """
+        return self._datetime
 
+    def _known(self, precision):
+        return self._precision is not None and self._precision >= PRECISION_INDEX[precision]
 
-    def valueValid(self):
-        """validIso8601DateTime(value)"""
+    def year(self):
+        return self._datetime.year if self._known('year') else -1
+
+    def month(self):
+        return self._datetime.month if self._known('month') else -1
+
+    def day(self):
+        return self._datetime.day if self._known('day') else -1
+
+    def hour(self):
+        return self._datetime.hour if self._known('hour') else -1
+
+    def minute(self):
+        return self._datetime.minute if self._known('minute') else -1
 
-        return DateTimeFrom(self.value) is not None
+    def second(self):
+        return self._datetime.second if self._known('second') else -1
+
+    def fractional_second(self):
+        if self.has_fractional_second():
+            return self._datetime.microsecond / MICROSECONDS_PER_SECOND
+        return -1
+
+    def month_known(self):
+        return self._known('month')
+
+    def day_known(self):
+        return self._known('day')
+
+    def minute_known(self):
+        return self._known('minute')
+
+    def second_known(self):
+        return self._known('second')
+
+    def has_fractional_second(self):
+        return self._known('fraction')
+
+    def is_partial(self):
+        return not self.second_known()
+
+    def has_timezone(self):
+        return self._datetime is not None and self._datetime.tzinfo is not None
+
+    def __str__(self):
+        return self.value
 
 
 class DvTime(DvTemporal):
@@ -463,25 +724,101 @@ class DvTime(DvTemporal):
     Used for recording real world times, rather than scientifically measured fine
     amounts of time. The partial form is used for approximate times of events and
     substance administrations.
+
+    The magnitude is the integer number of microseconds since midnight UTC,
+    so a time with a time zone offset may fall outside 0 .. 24h.
     """
+    __slots__ = ('_value', '_time', '_precision')
 
-    def __init__(self,value,magnitude,accuracy,normalRange,otherReferenceRanges,normalStatus):
-        self.value=value
-        dt1 = TimeFrom(value)
-        dt2 = TimeFrom('00:00:00')
-        dtDiff = dt1 - dt2
-        magnitude = dtDiff.seconds
-        DvTemporal.__init__(self,magnitude,accuracy,normalRange,otherReferenceRanges,normalStatus)
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if isinstance(value, DvTime):
+            self._value, self._time, self._precision = value._value, value._time, value._precision
+            self.magnitude = value.magnitude
+        elif isinstance(value, datetime.time):
+            self._value = value.isoformat()
+            self._time = value
+            self._precision = PRECISION_INDEX['fraction' if value.microsecond else 'second']
+            self.magnitude = epoch_microseconds(datetime.datetime.combine(EPOCH.date(), value))
+        elif isinstance(value, str):
+            try:
+                # the parser only accepts times as part of a date time
+                dt, precision = iso8601.parse_date_precision(
+                        '1970-01-01T' + (value[1:] if value.startswith('T') else value), default_timezone=None)
+            except iso8601.ParseError:
+                raise AttributeError('Invalid ISO 8601 Time [%s]' % value)
+            self._value = value
+            self._time = dt.timetz()
+            self._precision = PRECISION_INDEX[precision]
+            self.magnitude = epoch_microseconds(dt)
+        elif value is None:
+            self._value = self._time = self._precision = None
+            self.magnitude = None
+        else:
+            raise AttributeError('value must be a string')
 
-    def diff(self,other):
+    def __init__(self, value, accuracy=None, normal_range=None, other_reference_ranges=None, normal_status=None, magnitude_status=None):
+        """
+            Constructor can take:
+                DvTime
+                String in ISO8601 Format, with or without the leading T
+                datetime.time
+        """
+        self.value = value
+        DvTemporal.__init__(self, magnitude=self.magnitude, accuracy=accuracy, normal_range=normal_range,
+                other_reference_ranges=other_reference_ranges, normal_status=normal_status, magnitude_status=magnitude_status)
+
+    def diff(self, other):
         """Difference of two times. Returns a DvDuration"""
-        diffsecs = self.magnitude - other.magnitude
+        return duration_from_microseconds(self.magnitude - self._other_magnitude(other))
 
-        return DvDuration(diffsecs)
+    def valueValid(self, value):
+        """validIso8601Time(value)"""
+        try:
+            DvTime(value)
+            return True
+        except AttributeError:
+            return False
 
+    def as_time(self):
+        """ The parsed value, naive when the value has no time zone. """
+        return self._time
 
+    def _known(self, precision):
+        return self._precision is not None and self._precision >= PRECISION_INDEX[precision]
 
-    def valueValid(self):
-        """validIso8601DateTime(value)"""
+    def hour(self):
+        return self._time.hour if self._known('hour') else -1
+
+    def minute(self):
+        return self._time.minute if self._known('minute') else -1
 
-        return DateTimeFrom(self.value) is not None
+    def second(self):
+        return self._time.second if self._known('second') else -1
+
+    def fractional_second(self):
+        if self.has_fractional_second():
+            return self._time.microsecond / MICROSECONDS_PER_SECOND
+        return -1
+
+    def minute_known(self):
+        return self._known('minute')
+
+    def second_known(self):
+        return self._known('second')
+
+    def has_fractional_second(self):
+        return self._known('fraction')
+
+    def is_partial(self):
+        return not self.second_known()
+
+    def has_timezone(self):
+        return self._time is not None and self._time.tzinfo is not None
+
+    def __str__(self):
+        return self.value
@@ -13,12 +13,16 @@ from datetime import (
     timedelta,
     tzinfo
 )
-from decimal import Decimal
 import logging
 import sys
 import re
 
-__all__ = ["parse_date", "ParseError"]
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ["parse_date", "parse_date_precision", "parse_dates", "ParseError"]
 
 LOG = logging.getLogger(__name__)
 
@@ -124,7 +128,6 @@ def to_int(d, key, default_to_zero=False, default=None, required=True):
 
     """
     value = d.get(key) or default
-    LOG.debug("Got %r for %r with default %r", value, key, default)
     if (value in ["", None]) and default_to_zero:
         return 0
     if value is None:
@@ -148,22 +151,85 @@ def parse_timezone(matches, default_timezone=UTC):
     sign = matches["tz_sign"]
     hours = to_int(matches, "tz_hour")
     minutes = to_int(matches, "tz_minute", default_to_zero=True)
-    description = "%s%02d:%02d" % (sign, hours, minutes)
-    if sign == "-":
-        hours = -hours
-        minutes = -minutes
-    return FixedOffset(hours, minutes, description)
+    return fixed_offset(sign, hours, minutes)
 
-def parse_date(datestring, default_timezone=UTC):
-    """Parses ISO 8601 dates into datetime objects
+_FIXED_OFFSETS = {}
+
+def fixed_offset(sign, hours, minutes):
+    """The shared FixedOffset instance for an offset of sign hours:minutes
 
-    The timezone is parsed from the date string. However it is quite common to
-    have dates without a timezone (not strictly correct). In this case the
-    default timezone specified in default_timezone is used. This is UTC by
-    default.
     """
-    if not isinstance(datestring, _basestring):
-        raise ParseError("Expecting a string %r" % datestring)
+    try:
+        return _FIXED_OFFSETS[sign, hours, minutes]
+    except KeyError:
+        description = "%s%02d:%02d" % (sign, hours, minutes)
+        if sign == "-":
+            tz = FixedOffset(-hours, -minutes, description)
+        else:
+            tz = FixedOffset(hours, minutes, description)
+        return _FIXED_OFFSETS.setdefault((sign, hours, minutes), tz)
+
+# Components of a date time, most significant first. The precision of a
+# partial date time is the last component present in the string.
+PRECISIONS = ("year", "month", "day", "hour", "minute", "second", "fraction")
+
+def _precision(groups):
+    if groups["second_fraction"] is not None:
+        return "fraction"
+    for key, precision in (("second", "second"), ("minute", "minute"), ("hour", "hour"),
+                           ("day", "day"), ("daydash", "day"),
+                           ("month", "month"), ("monthdash", "month")):
+        if groups[key] is not None:
+            return precision
+    return "year"
+
+def _microsecond(fraction):
+    """Truncate the digits of a decimal fraction of a second to microseconds"""
+    return int(fraction[:6].ljust(6, "0"))
+
+def _parse_common(datestring, default_timezone):
+    """Slice the common fixed width forms YYYY-MM-DD, YYYY-MM-DDThh:mm and
+    YYYY-MM-DDThh:mm:ss[.f], with no zone, Z or +hh:mm, without the regex
+
+    Returns None for any other form.
+    """
+    length = len(datestring)
+    if length < 10 or datestring[4] != "-" or datestring[7] != "-" or not datestring.isascii():
+        return None
+    year, month, day = datestring[:4], datestring[5:7], datestring[8:10]
+    if not (year + month + day).isdigit():
+        return None
+    if length == 10:
+        return datetime(int(year), int(month), int(day), tzinfo=default_timezone), "day"
+    if length < 16 or datestring[10] not in "T " or datestring[13] != ":":
+        return None
+    hour, minute, second = datestring[11:13], datestring[14:16], "0"
+    precision, microsecond, end = "minute", 0, 16
+    if length >= 19 and datestring[16] == ":":
+        second, precision, end = datestring[17:19], "second", 19
+        if end < length and datestring[end] == ".":
+            start = end = end + 1
+            while end < length and datestring[end].isdigit():
+                end += 1
+            if end == start:
+                return None
+            microsecond, precision = _microsecond(datestring[start:end]), "fraction"
+    if not (hour + minute + second).isdigit():
+        return None
+    zone = datestring[end:]
+    if not zone:
+        tz = default_timezone
+    elif zone == "Z":
+        tz = UTC
+    elif len(zone) == 6 and zone[0] in "+-" and zone[3] == ":" and (zone[1:3] + zone[4:]).isdigit():
+        tz = fixed_offset(zone[0], int(zone[1:3]), int(zone[4:]))
+    else:
+        return None
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                    microsecond, tzinfo=tz), precision
+
+def _parse_regex(datestring, default_timezone):
+    """Parse any form ISO8601_REGEX accepts"""
     m = ISO8601_REGEX.match(datestring)
     if not m:
         raise ParseError("Unable to parse date string %r" % datestring)
@@ -171,20 +237,147 @@ def parse_date(datestring, default_timezone=UTC):
     LOG.debug("Parsed %s into %s with default timezone %s", datestring, groups, default_timezone)
 
     tz = parse_timezone(groups, default_timezone=default_timezone)
+    precision = _precision(groups)
 
-    groups["second_fraction"] = int(Decimal("0.%s" % (groups["second_fraction"] or 0)) * Decimal("1000000.0"))
+    groups["second_fraction"] = _microsecond(groups["second_fraction"] or "0")
 
+    return datetime(
+        year=to_int(groups, "year"),
+        month=to_int(groups, "month", default=to_int(groups, "monthdash", required=False, default=1)),
+        day=to_int(groups, "day", default=to_int(groups, "daydash", required=False, default=1)),
+        hour=to_int(groups, "hour", default_to_zero=True),
+        minute=to_int(groups, "minute", default_to_zero=True),
+        second=to_int(groups, "second", default_to_zero=True),
+        microsecond=groups["second_fraction"],
+        tzinfo=tz,
+    ), precision
+
+def parse_date_precision(datestring, default_timezone=UTC):
+    """Parses ISO 8601 dates into a (datetime, precision) tuple
+
+    precision is one of PRECISIONS, the least significant component given in
+    the string. Missing components default as in parse_date.
+
+    The common fixed width forms are sliced directly; anything else goes
+    through ISO8601_REGEX.
+    """
+    if not isinstance(datestring, _basestring):
+        raise ParseError("Expecting a string %r" % datestring)
     try:
-        return datetime(
-            year=to_int(groups, "year"),
-            month=to_int(groups, "month", default=to_int(groups, "monthdash", required=False, default=1)),
-            day=to_int(groups, "day", default=to_int(groups, "daydash", required=False, default=1)),
-            hour=to_int(groups, "hour", default_to_zero=True),
-            minute=to_int(groups, "minute", default_to_zero=True),
-            second=to_int(groups, "second", default_to_zero=True),
-            microsecond=groups["second_fraction"],
-            tzinfo=tz,
-        )
-    except Exception as e:
+        return _parse_common(datestring, default_timezone) or _parse_regex(datestring, default_timezone)
+    except ValueError as e:
         raise ParseError(e)
 
+def parse_date(datestring, default_timezone=UTC):
+    """Parses ISO 8601 dates into datetime objects
+
+    The timezone is parsed from the date string. However it is quite common to
+    have dates without a timezone (not strictly correct). In this case the
+    default timezone specified in default_timezone is used. This is UTC by
+    default.
+    """
+    return parse_date_precision(datestring, default_timezone)[0]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+# parse_dates works on blocks of this many strings, each held as a matrix of
+# code points _MAX_WIDTH wide. Longer strings take the scalar path.
+_CHUNK = 16384
+_MAX_WIDTH = 32
+_DATE_TIME_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+def _number(digits, start, end):
+    value = digits[:, start].astype(numpy.int64)
+    for i in range(start + 1, end):
+        value = value * 10 + digits[:, i]
+    return value
+
+def _parse_fixed_width(strings):
+    """Vectorised parse of YYYY-MM-DDThh:mm:ss[.f][Z|+hh:mm] strings
+
+    Returns (microseconds since the epoch as int64, mask of the strings not in
+    that form or out of range).
+    """
+    count = len(strings)
+    rows = numpy.arange(count)
+    lengths = numpy.fromiter(map(len, strings), dtype=numpy.intp, count=count)
+    codes = numpy.array(strings, dtype="U%d" % _MAX_WIDTH).view(numpy.uint32).reshape(count, _MAX_WIDTH)
+    ok = (lengths >= 19) & (lengths <= _MAX_WIDTH) & (codes.max(axis=1) < 128)
+    # rows hold at most _MAX_WIDTH characters: longer strings are rejected
+    # above, and offsets from their end must stay within their own row
+    lengths = numpy.minimum(lengths, _MAX_WIDTH)
+    chars = codes.astype(numpy.uint8)
+    # wraps around below '0', so anything but a digit is 10 or more
+    digits = chars - numpy.uint8(ord("0"))
+    is_digit = digits < 10
+
+    ok &= (chars[:, 4] == ord("-")) & (chars[:, 7] == ord("-")) & (chars[:, 13] == ord(":"))
+    ok &= ((chars[:, 10] == ord("T")) | (chars[:, 10] == ord(" "))) & (chars[:, 16] == ord(":"))
+    ok &= is_digit[:, _DATE_TIME_DIGITS].all(axis=1)
+
+    # zone: Z, +hh:mm or nothing, read at offsets from the end of each string
+    ends = rows * _MAX_WIDTH + lengths
+    flat_chars, flat_digits = chars.ravel(), digits.ravel()
+    zulu = flat_chars[numpy.maximum(ends - 1, 0)] == ord("Z")
+    sign_at = numpy.maximum(ends - 6, 0)
+    sign = flat_chars[sign_at]
+    offset_digits = [flat_digits[sign_at + i].astype(numpy.int64) for i in (1, 2, 4, 5)]
+    offset = (lengths - 6 >= 19) & ((sign == ord("+")) | (sign == ord("-")))
+    offset &= flat_chars[sign_at + 3] == ord(":")
+    for digit in offset_digits:
+        offset &= digit < 10
+    offset_hours = offset_digits[0] * 10 + offset_digits[1]
+    offset_minutes = offset_digits[2] * 10 + offset_digits[3]
+    ok &= ~offset | ((offset_hours < 24) & (offset_minutes < 60))
+    offset_minutes = numpy.where(offset, offset_hours * 60 + offset_minutes, 0)
+    offset_minutes = numpy.where(sign == ord("-"), -offset_minutes, offset_minutes)
+
+    # fraction: '.' and at least one digit between the seconds and the zone
+    fraction_end = lengths - numpy.where(zulu, 1, numpy.where(offset, 6, 0))
+    ok &= (fraction_end == 19) | ((chars[:, 19] == ord(".")) & (fraction_end > 20))
+    in_fraction = numpy.arange(20, _MAX_WIDTH) < fraction_end[:, None]
+    ok &= ~(in_fraction & ~is_digit[:, 20:]).any(axis=1)
+    microsecond = _number(numpy.where(in_fraction[:, :6], digits[:, 20:26], 0), 0, 6)
+
+    year, month, day = _number(digits, 0, 4), _number(digits, 5, 7), _number(digits, 8, 10)
+    hour, minute, second = _number(digits, 11, 13), _number(digits, 14, 16), _number(digits, 17, 19)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = numpy.take(_DAYS_IN_MONTH, numpy.clip(month - 1, 0, 11)) + (leap & (month == 2))
+    ok &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+    ok &= (hour < 24) & (minute < 60) & (second < 60)
+
+    months = numpy.where(ok, (year - 1970) * 12 + month - 1, 0)
+    days = months.astype("datetime64[M]").astype("datetime64[D]").astype(numpy.int64) + day - 1
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second - offset_minutes * 60
+    return seconds * 1000000 + microsecond, ~ok
+
+def parse_dates(values):
+    """Parses a sequence of ISO 8601 strings into a numpy datetime64[us] array
+
+    Returns (timestamps, invalid). Timestamps are UTC; strings without a zone
+    are taken to be UTC as in parse_date. invalid is a boolean mask of the
+    values that are not strings or do not parse, whose timestamps are NaT.
+
+    YYYY-MM-DDThh:mm:ss[.f] with no zone, Z or +hh:mm is parsed with array
+    operations; other forms are parsed one by one with parse_date.
+    Requires numpy.
+    """
+    if numpy is None:
+        raise ImportError("parse_dates requires numpy")
+    strings = [value if type(value) == str else "" for value in values]
+    timestamps = numpy.empty(len(strings), dtype=numpy.int64)
+    invalid = numpy.zeros(len(strings), dtype=bool)
+    for start in range(0, len(strings), _CHUNK):
+        chunk = strings[start:start + _CHUNK]
+        microseconds, unparsed = _parse_fixed_width(chunk)
+        for i in numpy.flatnonzero(unparsed):
+            try:
+                microseconds[i] = (parse_date(chunk[i]) - _EPOCH) // _MICROSECOND
+            except (ParseError, ValueError, OverflowError):
+                invalid[start + i] = True
+        timestamps[start:start + len(chunk)] = microseconds
+    timestamps = timestamps.view("datetime64[us]")
+    timestamps[invalid] = numpy.datetime64("NaT")
+    return timestamps, invalid
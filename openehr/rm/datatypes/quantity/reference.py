@@ -0,0 +1,241 @@
+# -*- coding: UTF-8 -*-
+"""
+    Evaluation of many results against reference ranges registered once per
+    analyte, instead of a normal_range and other_reference_ranges copy on
+    every DvOrdered value.
+
+    Requires numpy.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+from openehr.rm.datatypes.quantity import DvQuantified, ReferenceRange
+from openehr.rm.datatypes.quantity.series import quantity_magnitudes
+from openehr.rm.datatypes.text import CodePhrase
+from openehr.rm.support.measurement import UnitConverter
+
+# The openEHR "normal statuses" code set, ordered by value. Evaluations
+# return indexes into this tuple, UNKNOWN_STATUS where no status applies.
+NORMAL_STATUSES = ('LLL', 'LL', 'L', 'N', 'H', 'HH', 'HHH')
+NORMAL_STATUS_TERMINOLOGY = 'openehr_normal_statuses'
+NORMAL = NORMAL_STATUSES.index('N')
+UNKNOWN_STATUS = -1
+
+# Severity of a result outside a range, by range meaning: outside the normal
+# range is borderline (H/L), outside the borderline range abnormal (HH/LL)
+# and outside the critical range critical (HHH/LLL). Ranges with other
+# meanings are only evaluated for membership.
+SEVERITIES = {'normal': 1, 'borderline': 2, 'critical': 3}
+
+RangeEvaluation = namedtuple('RangeEvaluation', ['status', 'meanings', 'inside'])
+
+
+def _bound(interval, side):
+    """ Magnitude and units of one end of a DvInterval, +/-inf if unbounded. """
+    if getattr(interval, side + '_unbounded'):
+        return (numpy.inf if side == 'upper' else -numpy.inf), None
+    bound = getattr(interval, side)
+    if not isinstance(bound, DvQuantified):
+        raise AttributeError('reference range limits must be DvQuantified [%s]' % bound)
+    return float(bound.magnitude), getattr(bound, 'units', None)
+
+
+class _AnalyteRanges(object):
+    """
+        The ranges of one analyte, limits converted to the analyte units.
+
+        The registered limits split the real line into segments (the open
+        spans between limits and the limits themselves); the status and
+        range membership of every segment is worked out once, when the
+        ranges change, so evaluating a result is a binary search.
+    """
+
+    def __init__(self, units, molar_mass=None):
+        self._converter = UnitConverter(units, molar_mass)
+        self.reference_ranges = {}
+        self.limits = {}
+        self._table = None
+
+    @property
+    def units(self):
+        return self._converter.units
+
+    def add(self, meaning, reference_range, severity):
+        interval = reference_range.range
+        lower, lower_units = _bound(interval, 'lower')
+        upper, upper_units = _bound(interval, 'upper')
+        if lower_units is not None:
+            lower = self._converter.convert(lower, lower_units)
+        if upper_units is not None:
+            upper = self._converter.convert(upper, upper_units)
+        self.reference_ranges[meaning] = reference_range
+        self.limits[meaning] = (lower, upper, bool(interval.lower_included), bool(interval.upper_included), severity)
+        self._table = None
+
+    def remove(self, meaning):
+        del self.reference_ranges[meaning]
+        del self.limits[meaning]
+        self._table = None
+
+    def _segment_status(self, x):
+        inside = []
+        high = low = 0
+        for lower, upper, lower_included, upper_included, severity in self.limits.values():
+            above = x > upper or (x == upper and not upper_included)
+            below = x < lower or (x == lower and not lower_included)
+            inside.append(not (above or below))
+            if above:
+                high = max(high, severity)
+            elif below:
+                low = max(low, severity)
+        if high or low:
+            status = NORMAL + high if high >= low else NORMAL - low
+        elif any(limits[4] for limits in self.limits.values()):
+            status = NORMAL
+        else:
+            status = UNKNOWN_STATUS
+        return status, inside
+
+    def table(self):
+        """ (sorted finite limits, status per segment, membership per segment) """
+        if self._table is None:
+            limits = sorted(set(value for lower, upper, _, _, _ in self.limits.values()
+                    for value in (lower, upper) if numpy.isfinite(value)))
+            # Segment 2i is the open span below limits[i], 2i + 1 is limits[i]
+            points = []
+            for i, limit in enumerate(limits):
+                points.append(limit - max(1.0, abs(limit)) if i == 0 else (limits[i - 1] + limit) / 2)
+                points.append(limit)
+            points.append(limits[-1] + max(1.0, abs(limits[-1])) if limits else 0.0)
+            segments = [self._segment_status(x) for x in points]
+            self._table = (numpy.array(limits, dtype=numpy.float64),
+                    numpy.array([status for status, _ in segments], dtype=numpy.int8),
+                    numpy.array([inside for _, inside in segments], dtype=bool).reshape(len(points), len(self.limits)))
+        return self._table
+
+    def magnitudes(self, values, units=None):
+        """ values (numbers, DvQuantity objects or a quantity series) in our units """
+        if hasattr(values, 'magnitudes') and hasattr(values, 'units'):
+            return self._converter.convert(values.magnitudes, values.units)
+        if isinstance(values, numpy.ndarray):
+            magnitudes = values.astype(numpy.float64, copy=False)
+        else:
+            values = list(values)
+            if values and isinstance(values[0], DvQuantified):
+                return quantity_magnitudes(self._converter, values)
+            magnitudes = numpy.array(values, dtype=numpy.float64)
+        if units is not None:
+            magnitudes = self._converter.convert(magnitudes, units)
+        return magnitudes
+
+    def segments(self, magnitudes):
+        limits = self.table()[0]
+        segment = 2 * numpy.searchsorted(limits, magnitudes)
+        if len(limits):
+            at_limit = limits[numpy.minimum(segment // 2, len(limits) - 1)] == magnitudes
+            segment += at_limit
+        return segment
+
+
+class ReferenceRangeEvaluator(object):
+    """
+        Reference ranges registered once per analyte, keyed by the range
+        meaning, with results evaluated in batches.
+
+        The units of the first range registered for an analyte become the
+        analyte units; later ranges and evaluated results in equivalent
+        units are converted through the measurement service. Registering or
+        removing a range rebuilds the analyte's segment table lazily, on
+        the next evaluation.
+
+        severities maps range meanings to the severity (1 to 3) of a result
+        outside the range, see SEVERITIES.
+    """
+
+    def __init__(self, severities=None):
+        self.severities = dict(SEVERITIES if severities is None else severities)
+        self._analytes = {}
+        self._codes = [CodePhrase(NORMAL_STATUS_TERMINOLOGY, code) for code in NORMAL_STATUSES]
+
+    def register(self, analyte, reference_range, severity=None, molar_mass=None):
+        """
+            Register a ReferenceRange for 'analyte', replacing any range with
+            the same meaning. 'severity' overrides the severity looked up by
+            meaning; molar_mass (g/mol) is used when the analyte is created.
+        """
+        if not isinstance(reference_range, ReferenceRange):
+            raise AttributeError('reference_range must be a ReferenceRange [%s]' % reference_range)
+        meaning = reference_range.meaning.value
+        if severity is None:
+            severity = self.severities.get(meaning, 0)
+        if severity not in (0, 1, 2, 3):
+            raise AttributeError('severity must be between 0 and 3 [%s]' % severity)
+        ranges = self._analytes.get(analyte)
+        if ranges is None:
+            units = None
+            for side in ('lower', 'upper'):
+                units = units or _bound(reference_range.range, side)[1]
+            ranges = _AnalyteRanges(units or '1', molar_mass)
+            self._analytes[analyte] = ranges
+        ranges.add(meaning, reference_range, severity)
+
+    def unregister(self, analyte, meaning=None):
+        """ Remove one range of the analyte, or all of them if no meaning is given. """
+        if meaning is None:
+            del self._analytes[analyte]
+            return
+        ranges = self._analytes[analyte]
+        ranges.remove(meaning)
+        if not ranges.limits:
+            del self._analytes[analyte]
+
+    def units(self, analyte):
+        return self._analytes[analyte].units
+
+    def reference_ranges(self, analyte):
+        """ The registered ReferenceRange objects by meaning """
+        return dict(self._analytes[analyte].reference_ranges)
+
+    def evaluate(self, analyte, values, units=None):
+        """
+            Evaluate results of 'analyte' against all of its ranges in one
+            pass. values are numbers in 'units' (the analyte units by
+            default), DvQuantity objects or a quantity series.
+
+            Returns RangeEvaluation: an int8 array of indexes into
+            NORMAL_STATUSES (UNKNOWN_STATUS for NaN results or when no range
+            has a severity), the range meanings, and a boolean array with a
+            column per meaning telling whether each result is in the range.
+        """
+        ranges = self._analytes[analyte]
+        magnitudes = ranges.magnitudes(values, units)
+        limits, statuses, inside = ranges.table()
+        segment = ranges.segments(magnitudes)
+        status = statuses[segment]
+        missing = numpy.isnan(magnitudes)
+        status[missing] = UNKNOWN_STATUS
+        members = inside[segment]
+        members[missing] = False
+        return RangeEvaluation(status, tuple(ranges.limits), members)
+
+    def status_indexes(self, analyte, values, units=None):
+        """ Only the status column of evaluate(), skipping range membership. """
+        ranges = self._analytes[analyte]
+        magnitudes = ranges.magnitudes(values, units)
+        status = ranges.table()[1][ranges.segments(magnitudes)]
+        status[numpy.isnan(magnitudes)] = UNKNOWN_STATUS
+        return status
+
+    def normal_status(self, analyte, values, units=None):
+        """
+            The normal_status CodePhrase of each result, or None where it is
+            unknown. Results with the same status share one CodePhrase.
+        """
+        codes = self._codes + [None]
+        return [codes[index] for index in self.status_indexes(analyte, values, units).tolist()]
+
+    def is_normal(self, analyte, values, units=None):
+        """ Boolean array, True for results with the normal status """
+        return self.status_indexes(analyte, values, units) == NORMAL
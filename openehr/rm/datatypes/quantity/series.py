@@ -0,0 +1,534 @@
+# -*- coding: UTF-8 -*-
+"""
+    Columnar containers for many quantities measured in the same property,
+    time series of them, and for many dates.
+
+    Requires numpy.
+"""
+
+import datetime
+from collections import namedtuple
+
+import numpy
+
+import openehr.rm.datatypes.quantity.iso8601_ as iso8601
+from openehr.rm.datatypes.quantity import DvQuantity
+from openehr.rm.datatypes.quantity.datetime import (CYCLE_DAYS, CYCLE_MONTHS, MICROSECONDS_PER_SECOND,
+                                                      MONTH_STARTS, DvDate, DvDateTime, DvDuration,
+                                                      epoch_microseconds, month_index, parse_iso_date)
+from openehr.rm.support.measurement import UnitConverter
+
+
+def quantity_magnitudes(converter, quantities):
+    """
+        Magnitudes of DvQuantity objects in the units of a UnitConverter,
+        converting each group of units in one vectorised operation.
+    """
+    by_units = {}
+    positions = {}
+    for i, quantity in enumerate(quantities):
+        if not isinstance(quantity, DvQuantity):
+            raise AttributeError('series items must be DvQuantity [%s]' % quantity)
+        by_units.setdefault(quantity.units, []).append(quantity.magnitude)
+        positions.setdefault(quantity.units, []).append(i)
+    converted = numpy.empty(len(quantities), dtype=numpy.float64)
+    for units, magnitudes in by_units.items():
+        converted[positions[units]] = converter.convert(numpy.array(magnitudes, dtype=numpy.float64), units)
+    return converted
+
+
+class _ConvertingSeries(object):
+    """
+        Base of the series holding magnitudes in one units string, converting
+        other units through a UnitConverter, once per units string.
+    """
+
+    def __init__(self, units, precision=None, molar_mass=None):
+        self._converter = UnitConverter(units, molar_mass)
+        self.precision = precision
+
+    @property
+    def units(self):
+        return self._converter.units
+
+    @property
+    def molar_mass(self):
+        return self._converter.molar_mass
+
+    def _converted(self, quantities):
+        return quantity_magnitudes(self._converter, quantities)
+
+    def _quantity(self, magnitude):
+        return DvQuantity(float(magnitude), self.units, precision=self.precision)
+
+
+class DvQuantitySeries(_ConvertingSeries):
+    """
+        A series of DvQuantity magnitudes held in a numpy array, all expressed
+        in one canonical units string. Quantities in equivalent units are
+        converted on ingest through the measurement service, one conversion
+        lookup per distinct units string.
+
+        molar_mass (g/mol) allows mass and substance concentrations of the
+        same analyte (e.g. mg/dL and mmol/L glucose) to share a series.
+    """
+
+    def __init__(self, units, magnitudes=(), precision=None, molar_mass=None):
+        _ConvertingSeries.__init__(self, units, precision, molar_mass)
+        self.magnitudes = numpy.array(magnitudes, dtype=numpy.float64)
+
+    @classmethod
+    def from_quantities(cls, quantities, units=None, precision=None, molar_mass=None):
+        """
+            Build a series from DvQuantity objects. The units of the first
+            quantity are used when no units are given.
+        """
+        quantities = list(quantities)
+        if units is None:
+            if not quantities:
+                raise ValueError('units are required for an empty series')
+            units = quantities[0].units
+        series = cls(units, precision=precision, molar_mass=molar_mass)
+        series.extend(quantities)
+        return series
+
+    def append(self, quantity):
+        self.extend([quantity])
+
+    def extend(self, quantities):
+        """
+            Append DvQuantity objects, converting each group of units in one
+            vectorised operation.
+        """
+        self.magnitudes = numpy.concatenate((self.magnitudes, self._converted(list(quantities))))
+
+    def to_units(self, units):
+        """ The same series expressed in other (equivalent) units. """
+        series = DvQuantitySeries(units, precision=self.precision, molar_mass=self.molar_mass)
+        series.magnitudes = series._converter.convert(self.magnitudes, self.units)
+        return series
+
+    def __len__(self):
+        return len(self.magnitudes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DvQuantitySeries(self.units, self.magnitudes[index], self.precision, self.molar_mass)
+        return self._quantity(self.magnitudes[index])
+
+    def __iter__(self):
+        for magnitude in self.magnitudes:
+            yield self._quantity(magnitude)
+
+    def __repr__(self):
+        return 'DvQuantitySeries(%s, %s)' % (self.units, self.magnitudes)
+
+    def _operand(self, other):
+        """ Magnitudes of 'other' (a series or a DvQuantity) in our units. """
+        if isinstance(other, DvQuantitySeries):
+            if len(other) != len(self):
+                raise ValueError('series must have the same length')
+            return self._converter.convert(other.magnitudes, other.units)
+        if isinstance(other, DvQuantity):
+            return self._converter.convert(other.magnitude, other.units)
+        raise TypeError('Argument type must be DvQuantitySeries or DvQuantity')
+
+    def _derived(self, magnitudes):
+        series = DvQuantitySeries(self.units, precision=self.precision, molar_mass=self.molar_mass)
+        series.magnitudes = magnitudes
+        return series
+
+    def __add__(self, other):
+        return self._derived(self.magnitudes + self._operand(other))
+
+    def __sub__(self, other):
+        return self._derived(self.magnitudes - self._operand(other))
+
+    def __neg__(self):
+        return self._derived(-self.magnitudes)
+
+    def __lt__(self, other):
+        return self.magnitudes < self._operand(other)
+
+    def __le__(self, other):
+        return self.magnitudes <= self._operand(other)
+
+    def __gt__(self, other):
+        return self.magnitudes > self._operand(other)
+
+    def __ge__(self, other):
+        return self.magnitudes >= self._operand(other)
+
+    def min(self):
+        return self._quantity(self.magnitudes.min())
+
+    def max(self):
+        return self._quantity(self.magnitudes.max())
+
+    def mean(self):
+        return self._quantity(self.magnitudes.mean())
+
+
+def epoch_timestamps(times):
+    """
+        int64 microseconds since the epoch (DvDateTime magnitudes) of
+        DvDateTime objects, datetime.datetime objects, ISO 8601 strings or
+        integers already in microseconds, or of a numpy datetime64 or
+        integer array. Strings are parsed in one iso8601_.parse_dates call;
+        values without a zone are UTC.
+    """
+    if isinstance(times, numpy.ndarray) and times.dtype.kind in 'iuM':
+        if times.dtype.kind == 'M':
+            return times.astype('datetime64[us]').view(numpy.int64)
+        return times.astype(numpy.int64)
+    times = list(times)
+    timestamps = numpy.empty(len(times), dtype=numpy.int64)
+    strings = [i for i, time in enumerate(times) if isinstance(time, str)]
+    if strings:
+        parsed, invalid = iso8601.parse_dates([times[i] for i in strings])
+        if invalid.any():
+            raise AttributeError('Invalid ISO 8601 Date Time [%s]' % times[strings[numpy.argmax(invalid)]])
+        timestamps[strings] = parsed.view(numpy.int64)
+    if len(strings) < len(times):
+        for i, time in enumerate(times):
+            if isinstance(time, DvDateTime):
+                timestamps[i] = time.magnitude
+            elif isinstance(time, datetime.datetime):
+                timestamps[i] = epoch_microseconds(time)
+            elif isinstance(time, (int, numpy.integer)) and not isinstance(time, bool):
+                timestamps[i] = time
+            elif not isinstance(time, str):
+                raise AttributeError('times must be DvDateTime, datetime, str or int [%s]' % time)
+    return timestamps
+
+
+WindowAggregates = namedtuple('WindowAggregates', ['starts', 'count', 'min', 'max', 'mean'])
+
+
+class DvQuantityTimeSeries(_ConvertingSeries):
+    """
+        Timestamped DvQuantity observations of one property, held as
+        parallel arrays of epoch microseconds (DvDateTime magnitudes) and
+        magnitudes in one units string, with units and precision held once.
+
+        The arrays grow geometrically, so appending is amortised O(1). The
+        series is kept in time order; out of order appends are sorted once,
+        when the series is next read.
+    """
+
+    def __init__(self, units, precision=None, molar_mass=None, capacity=1024):
+        _ConvertingSeries.__init__(self, units, precision, molar_mass)
+        self._times = numpy.empty(capacity, dtype=numpy.int64)
+        self._magnitudes = numpy.empty(capacity, dtype=numpy.float64)
+        self._size = 0
+        self._ordered = True
+
+    def _reserve(self, count):
+        needed = self._size + count
+        if needed > len(self._times):
+            capacity = max(needed, 2 * len(self._times))
+            for name in ('_times', '_magnitudes'):
+                grown = numpy.empty(capacity, dtype=getattr(self, name).dtype)
+                grown[:self._size] = getattr(self, name)[:self._size]
+                setattr(self, name, grown)
+
+    def _magnitudes_of(self, quantities):
+        if isinstance(quantities, numpy.ndarray):
+            return quantities.astype(numpy.float64)
+        quantities = list(quantities)
+        if all(isinstance(quantity, (int, float)) for quantity in quantities):
+            return numpy.array(quantities, dtype=numpy.float64)
+        return self._converted(quantities)
+
+    def append(self, time, quantity):
+        """ Append one observation: a time as for epoch_timestamps and a DvQuantity. """
+        self.extend([time], [quantity])
+
+    def extend(self, times, quantities):
+        """
+            Append observations. times are as for epoch_timestamps; quantities
+            are DvQuantity objects (converted to the series units) or plain
+            numbers already in the series units.
+        """
+        timestamps = epoch_timestamps(times)
+        magnitudes = self._magnitudes_of(quantities)
+        if len(timestamps) != len(magnitudes):
+            raise ValueError('times and quantities must have the same length')
+        if not len(timestamps):
+            return
+        self._reserve(len(timestamps))
+        if self._ordered:
+            last = self._times[self._size - 1] if self._size else timestamps[0]
+            self._ordered = bool(timestamps[0] >= last and (numpy.diff(timestamps) >= 0).all())
+        self._times[self._size:self._size + len(timestamps)] = timestamps
+        self._magnitudes[self._size:self._size + len(timestamps)] = magnitudes
+        self._size += len(timestamps)
+
+    def ingest(self, observations, chunk_size=4096):
+        """
+            Stream (time, quantity) pairs from any iterable into the series,
+            converting them chunk_size at a time.
+        """
+        times, quantities = [], []
+        for time, quantity in observations:
+            times.append(time)
+            quantities.append(quantity)
+            if len(times) == chunk_size:
+                self.extend(times, quantities)
+                times, quantities = [], []
+        self.extend(times, quantities)
+
+    def _sort(self):
+        if not self._ordered:
+            order = numpy.argsort(self._times[:self._size], kind='stable')
+            self._times[:self._size] = self._times[:self._size][order]
+            self._magnitudes[:self._size] = self._magnitudes[:self._size][order]
+            self._ordered = True
+
+    @property
+    def times(self):
+        """ The timestamps, in time order, as datetime64[us]. """
+        self._sort()
+        return self._times[:self._size].view('datetime64[us]')
+
+    @property
+    def magnitudes(self):
+        self._sort()
+        return self._magnitudes[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        """ The (DvDateTime, DvQuantity) observation at index, in time order. """
+        self._sort()
+        if not -self._size <= index < self._size:
+            raise IndexError('series index out of range')
+        index %= self._size
+        return DvDateTime.from_magnitude(int(self._times[index])), self._quantity(self._magnitudes[index])
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self[index]
+
+    def __repr__(self):
+        return 'DvQuantityTimeSeries(%s, %d observations)' % (self.units, self._size)
+
+    def _range(self, start, end):
+        """ Slice of the sorted arrays from start (included) to end (excluded). """
+        self._sort()
+        times = self._times[:self._size]
+        first, last = 0, self._size
+        if start is not None:
+            first = numpy.searchsorted(times, epoch_timestamps([start])[0], 'left')
+        if end is not None:
+            last = numpy.searchsorted(times, epoch_timestamps([end])[0], 'left')
+        return slice(first, max(first, last))
+
+    def between(self, start=None, end=None):
+        """ The observations from start (included) to end (excluded), as a new series. """
+        selected = self._range(start, end)
+        series = DvQuantityTimeSeries(self.units, self.precision, self.molar_mass, capacity=0)
+        series.extend(self._times[selected], self._magnitudes[selected])
+        return series
+
+    def window(self, width, start=None, end=None, origin=0):
+        """
+            Count, min, max and mean of the magnitudes in consecutive windows
+            'width' (a DvDuration) wide, over the observations from start to
+            end. Windows are aligned on origin (epoch microseconds, by
+            default 1970-01-01T00:00:00Z, so days start at UTC midnight);
+            months and years in width are nominal. Only windows holding
+            observations are returned.
+        """
+        if not isinstance(width, DvDuration):
+            raise TypeError("Argument type must be DvDuration")
+        step = int(round(width.to_seconds() * MICROSECONDS_PER_SECOND))
+        if step <= 0:
+            raise ValueError('the window width must be positive')
+        selected = self._range(start, end)
+        times = self._times[selected]
+        magnitudes = self._magnitudes[selected]
+        if not len(times):
+            empty = numpy.empty(0, dtype=numpy.float64)
+            return WindowAggregates(numpy.empty(0, dtype='datetime64[us]'), numpy.empty(0, dtype=numpy.intp),
+                    empty, empty, empty)
+        windows = (times - origin) // step
+        boundaries = numpy.flatnonzero(numpy.diff(windows, prepend=windows[0] - 1))
+        count = numpy.diff(boundaries, append=len(times))
+        return WindowAggregates((windows[boundaries] * step + origin).view('datetime64[us]'), count,
+                numpy.minimum.reduceat(magnitudes, boundaries), numpy.maximum.reduceat(magnitudes, boundaries),
+                numpy.add.reduceat(magnitudes, boundaries) / count)
+
+
+# Bits of DvDateColumn.precision
+MONTH_KNOWN = 1
+DAY_KNOWN = 2
+
+
+def _components_precision(components):
+    """ Precision bits of a DvDate value list [year, month, day]. """
+    return ((MONTH_KNOWN if components[1] is not None else 0) |
+            (DAY_KNOWN if components[2] is not None else 0))
+
+
+class DvDateColumn(object):
+    """
+        A column of dates held as an int32 array of ordinal days (the DvDate
+        magnitude) and a uint8 array of precision bits, MONTH_KNOWN and
+        DAY_KNOWN. A partial date is stored as its first day.
+
+        DvDate objects are only built when items are read. Range queries
+        binary search a sort order computed on first use after a change.
+    """
+
+    def __init__(self, dates=()):
+        self.ordinals = numpy.empty(0, dtype=numpy.int32)
+        self.precision = numpy.empty(0, dtype=numpy.uint8)
+        self._order = None
+        self._sorted_ordinals = None
+        self.extend(dates)
+
+    @classmethod
+    def from_ordinals(cls, ordinals, precision=None):
+        """
+            Build a column from ordinal days, e.g. read back from storage.
+            Dates are complete unless precision bits are given.
+        """
+        column = cls()
+        column.ordinals = numpy.array(ordinals, dtype=numpy.int32)
+        if precision is None:
+            column.precision = numpy.full(len(column.ordinals), MONTH_KNOWN | DAY_KNOWN, dtype=numpy.uint8)
+        else:
+            column.precision = numpy.array(precision, dtype=numpy.uint8)
+            if len(column.precision) != len(column.ordinals):
+                raise ValueError('ordinals and precision must have the same length')
+        return column
+
+    @staticmethod
+    def _key(date):
+        """ (ordinal, precision bits) of a DvDate, ISO 8601 string or datetime.date. """
+        if isinstance(date, DvDate):
+            return date.magnitude, _components_precision(date._value_list)
+        if isinstance(date, str):
+            components, ordinal = parse_iso_date(date)
+            return ordinal, _components_precision(components)
+        if isinstance(date, datetime.date) and not isinstance(date, datetime.datetime):
+            return date.toordinal(), MONTH_KNOWN | DAY_KNOWN
+        raise AttributeError('column items must be DvDate, str or datetime.date [%s]' % date)
+
+    def append(self, date):
+        self.extend([date])
+
+    def extend(self, dates):
+        """
+            Append DvDate objects, ISO 8601 date strings or datetime.date
+            objects. Each distinct string is parsed once.
+        """
+        dates = list(dates)
+        if not dates:
+            return
+        distinct = {}
+        codes = numpy.fromiter((distinct.setdefault(date, len(distinct)) if type(date) == str else -1
+                for date in dates), dtype=numpy.intp, count=len(dates))
+        keys = numpy.array([self._key(date) for date in distinct], dtype=numpy.int64).reshape(len(distinct), 2)
+        ordinals = numpy.empty(len(dates), dtype=numpy.int32)
+        precision = numpy.empty(len(dates), dtype=numpy.uint8)
+        strings = codes >= 0
+        ordinals[strings] = keys[codes[strings], 0]
+        precision[strings] = keys[codes[strings], 1]
+        for index in numpy.flatnonzero(~strings):
+            ordinals[index], precision[index] = self._key(dates[index])
+        self.ordinals = numpy.concatenate((self.ordinals, ordinals))
+        self.precision = numpy.concatenate((self.precision, precision))
+        self._order = self._sorted_ordinals = None
+
+    def _sorted(self):
+        if self._order is None:
+            self._order = numpy.argsort(self.ordinals, kind='stable')
+            self._sorted_ordinals = self.ordinals[self._order]
+        return self._order, self._sorted_ordinals
+
+    def between(self, lower=None, upper=None, lower_included=True, upper_included=True):
+        """
+            Positions of the dates from lower to upper, in date order. The
+            bounds may be DvDate, ISO 8601 strings or datetime.date, and
+            None is unbounded. A partial bound counts as its first day.
+        """
+        order, ordinals = self._sorted()
+        start, end = 0, len(ordinals)
+        # an int32 needle, a Python int would make numpy convert the array
+        if lower is not None:
+            lower = numpy.int32(self._key(lower)[0])
+            start = numpy.searchsorted(ordinals, lower, 'left' if lower_included else 'right')
+        if upper is not None:
+            upper = numpy.int32(self._key(upper)[0])
+            end = numpy.searchsorted(ordinals, upper, 'right' if upper_included else 'left')
+        return order[start:max(start, end)]
+
+    def _date(self, index):
+        precision = self.precision[index]
+        return DvDate.from_ordinal(int(self.ordinals[index]), bool(precision & MONTH_KNOWN),
+                bool(precision & DAY_KNOWN))
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __getitem__(self, index):
+        """ A DvDate for an integer index, a DvDateColumn for a slice or index array. """
+        if isinstance(index, (int, numpy.integer)):
+            return self._date(index)
+        column = DvDateColumn()
+        column.ordinals = self.ordinals[index]
+        column.precision = self.precision[index]
+        return column
+
+    def __iter__(self):
+        for index in range(len(self.ordinals)):
+            yield self._date(index)
+
+    def __repr__(self):
+        return 'DvDateColumn(%s)' % self.ordinals
+
+
+_MONTH_STARTS = numpy.array(MONTH_STARTS, dtype=numpy.int64)
+
+
+def recurrence(start, interval, count=None, until=None):
+    """
+        The schedule start, start + interval, start + 2 * interval, ... as a
+        DvDateColumn, computed in one vectorised pass over the calendar
+        table. Each occurrence is start plus k times the interval in the
+        calendar arithmetic of DvDate.__add__, so a schedule monthly from
+        the 31st falls on the last day of shorter months without drifting.
+
+        start is a DvDate or ISO 8601 string and interval a positive
+        DvDuration. The schedule has 'count' occurrences, or runs up to and
+        including 'until', whichever ends first; one of them is required.
+    """
+    if not isinstance(start, DvDate):
+        start = DvDate(start)
+    if not isinstance(interval, DvDuration):
+        raise TypeError("Argument type must be DvDuration")
+    months, days = interval.calendar_offset()
+    if months < 0 or days < 0 or months == days == 0:
+        raise ValueError('the recurrence interval must be positive')
+    if until is not None:
+        if not isinstance(until, DvDate):
+            until = DvDate(until)
+        # an occurrence is at least 28 days per month of the interval apart
+        limit = (until.magnitude - start.magnitude) // (months * 28 + days) + 1
+        count = max(0, limit) if count is None else min(count, max(0, limit))
+    elif count is None:
+        raise ValueError('count or until is required')
+
+    year, month, day = start._value_list
+    steps = numpy.arange(count, dtype=numpy.int64)
+    cycles, month_in_cycle = numpy.divmod(month_index(year, month or 1) + steps * months, CYCLE_MONTHS)
+    lengths = _MONTH_STARTS[month_in_cycle + 1] - _MONTH_STARTS[month_in_cycle]
+    ordinals = (cycles * CYCLE_DAYS + _MONTH_STARTS[month_in_cycle] +
+                numpy.minimum(day or 1, lengths) + steps * days)
+    if until is not None:
+        ordinals = ordinals[ordinals <= until.magnitude]
+    precision = _components_precision(start._value_list)
+    return DvDateColumn.from_ordinals(ordinals, numpy.full(len(ordinals), precision, dtype=numpy.uint8))
@@ -0,0 +1,150 @@
+# -*- coding: UTF-8 -*-
+"""
+    Resolution of EHR URIs (DvEHRURI values, LocatableRef.as_uri() strings)
+    back to the objects they reference.
+
+    A URI is split into the id of the referenced version and the path of the
+    item within it. Versions are looked up in a pluggable store: any object
+    with get(version_id) returning a version or None, and optionally
+    get_many(version_ids) returning a dict, for batch lookups. A version is
+    anything with a 'uid' (ObjectVersionID) and 'data', whose items are
+    reached with data.pathExists(path) and data.itemAtPath(path), as for
+    LocatableRef.
+"""
+
+from collections import OrderedDict
+
+from openehr.rm.datatypes.uri import DvEHRURI, parse_ehr_uri
+from openehr.rm.support.identification import ObjectID
+
+# Upper bound on the number of resolved targets remembered.
+RESOLVER_CACHE_SIZE = 4096
+
+
+def _version_key(version_id):
+    """ Index key of an ObjectVersionID, or of the string form of one """
+    if isinstance(version_id, ObjectID):
+        return version_id.value
+    return version_id
+
+
+def split_ehr_uri(uri):
+    """
+        (version id, path) referenced by a DvEHRURI, a LocatableRef or an
+        ehr:// string. path is None when the whole version is referenced.
+    """
+    if isinstance(uri, DvEHRURI):
+        components = uri._split()
+    else:
+        if hasattr(uri, 'as_uri'):
+            uri = uri.as_uri()
+        components = parse_ehr_uri(uri)
+    if components.object_id is None:
+        raise AttributeError('EHR URI does not reference an object [%s]' % uri)
+    return components.object_id, components.ehr_path
+
+
+class InMemoryVersionStore(object):
+    """ Versions indexed in a dict by the value of their ObjectVersionID """
+
+    def __init__(self, versions=()):
+        self._versions = {}
+        for version in versions:
+            self.add(version)
+
+    def add(self, version):
+        self._versions[_version_key(version.uid)] = version
+
+    def remove(self, version_id):
+        del self._versions[_version_key(version_id)]
+
+    def get(self, version_id):
+        return self._versions.get(_version_key(version_id))
+
+    def get_many(self, version_ids):
+        versions = self._versions
+        return {version_id: versions[version_id] for version_id in map(_version_key, version_ids)
+                if version_id in versions}
+
+    def __contains__(self, version_id):
+        return _version_key(version_id) in self._versions
+
+    def __len__(self):
+        return len(self._versions)
+
+
+class EhrUriResolver(object):
+    """
+        Resolves EHR URIs through a version store, remembering the last
+        maxsize targets. Versions are immutable, so targets stay valid
+        until forget() is called for a version removed from the store.
+    """
+
+    def __init__(self, store=None, maxsize=RESOLVER_CACHE_SIZE):
+        self.store = InMemoryVersionStore() if store is None else store
+        self.maxsize = maxsize
+        self._targets = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _target(self, version, path):
+        if version is None:
+            return None
+        if path is None:
+            return version.data
+        if not version.data.pathExists(path):
+            return None
+        return version.data.itemAtPath(path)
+
+    def _remember(self, key, target):
+        self._targets[key] = target
+        if len(self._targets) > self.maxsize:
+            self._targets.popitem(last=False)
+
+    def resolve(self, uri):
+        """ The object referenced by 'uri', None if it cannot be found """
+        key = split_ehr_uri(uri)
+        try:
+            target = self._targets[key]
+        except KeyError:
+            self.misses += 1
+            target = self._target(self.store.get(key[0]), key[1])
+            if target is not None:
+                self._remember(key, target)
+            return target
+        self.hits += 1
+        self._targets.move_to_end(key)
+        return target
+
+    def resolve_all(self, uris):
+        """
+            Resolve many URIs, fetching the versions not resolved before in
+            one get_many() call when the store has one. Returns the targets
+            in order, None for those which cannot be found.
+        """
+        keys = [split_ehr_uri(uri) for uri in uris]
+        resolved = {key: self._targets[key] for key in set(keys) if key in self._targets}
+        missing = set(keys).difference(resolved)
+        version_ids = set(version_id for version_id, path in missing)
+        if not version_ids:
+            versions = {}
+        elif hasattr(self.store, 'get_many'):
+            versions = self.store.get_many(version_ids)
+        else:
+            versions = {version_id: self.store.get(version_id) for version_id in version_ids}
+        for key in missing:
+            target = resolved[key] = self._target(versions.get(key[0]), key[1])
+            if target is not None:
+                self._remember(key, target)
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        return [resolved[key] for key in keys]
+
+    def forget(self, version_id):
+        """ Drop the cached targets within a version """
+        version_id = _version_key(version_id)
+        for key in [key for key in self._targets if key[0] == version_id]:
+            del self._targets[key]
+
+    def clear(self):
+        self._targets.clear()
+        self.hits = self.misses = 0
@@ -30,3 +30,17 @@ class TestDvState(unittest.TestCase):
     def test_construtor(self):
         i1 = basic.DvState(None, False)
         self.assertEqual(type(i1), basic.DvState)
+
+class TestDataValue(unittest.TestCase):
+    def test_slots(self):
+        i1 = basic.DvIdentifier('issuer', 'assigner', 'id', 'type')
+        self.assertFalse(hasattr(i1, '__dict__'))
+        with self.assertRaises(AttributeError):
+            i1.unknown = 1
+
+    def test_from_validated(self):
+        i1 = basic.DvIdentifier.from_validated(issuer='issuer', id='id')
+        self.assertEqual(i1, basic.DvIdentifier('issuer', None, 'id', None))
+        self.assertEqual(basic.DvBoolean.from_validated(value=True), basic.DvBoolean.TRUE)
+        with self.assertRaises(AttributeError):
+            basic.DvBoolean.from_validated(valeu=True)
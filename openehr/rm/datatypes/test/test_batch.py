@@ -0,0 +1,32 @@
+from openehr.rm.datatypes.quantity.datetime import DvDuration
+
+import unittest
+
+try:
+    import numpy
+    from openehr.rm.datatypes.quantity.batch import parse_durations
+except ImportError:
+    numpy = None
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestParseDurations(unittest.TestCase):
+    def test_parse(self):
+        values = ['P1DT2H', 'P0Y12M32W10DT9H8M7.898S', 'PT0,5S', 'P2W']
+        columns = parse_durations(values)
+        self.assertFalse(columns.invalid.any())
+        self.assertEqual(list(columns.days), [1, 10, 0, 0])
+        self.assertEqual(list(columns.weeks), [0, 32, 0, 2])
+        self.assertEqual(list(columns.months), [0, 12, 0, 0])
+        self.assertAlmostEqual(columns.fractional_second[1], 0.898)
+        for i, value in enumerate(values):
+            self.assertAlmostEqual(columns.total_seconds[i], DvDuration(value).magnitude())
+
+    def test_invalid(self):
+        columns = parse_durations(['P1D', '', 'P', 'PT', 'P10a', None, 'P1D\nP2D', 'PT1H'])
+        self.assertEqual(list(columns.invalid), [False, True, True, True, True, True, True, False])
+        self.assertEqual(list(columns.days), [1, 0, 0, 0, 0, 0, 0, 0])
+        self.assertTrue(numpy.isnan(columns.total_seconds[1]))
+        self.assertEqual(columns.total_seconds[7], 3600)
+
+    def test_empty(self):
+        self.assertEqual(len(parse_durations([]).total_seconds), 0)
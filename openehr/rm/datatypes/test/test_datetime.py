@@ -115,6 +115,37 @@ class TestDvDate(unittest.TestCase):
         self.assertEqual(DvDate([2000, 10, 1]).value, "2000-10-01")
         self.assertEqual(DvDate([2000, 10, 10]).value, "2000-10-10")
 
+    def testDiff(self):
+        diff = DvDate("2001-03-01").diff(DvDate("2001-02-01"))
+        self.assertEqual(28, diff.days())
+        self.assertEqual("P28D", diff.value)
+        self.assertEqual(-28 * 86400, DvDate("2001-02-01").diff(DvDate("2001-03-01")).magnitude())
+
+    def testAddDuration(self):
+        self.assertEqual(DvDate("2001-03-01"), DvDate("2001-02-01") + DvDuration("P4W"))
+        self.assertEqual("2000-12-31", (DvDate("2001-01-01") - DvDuration("P1D")).value)
+        self.assertEqual("2001-01-02", (DvDate("2001-01-01") + DvDuration("PT36H")).value)
+        self.assertEqual("2001-02", (DvDate("2001-01") + DvDuration("P31D")).value)
+        with self.assertRaises(TypeError):
+            DvDate("2001-01-01") + DvDate("2001-01-01")
+
+    def testCalendarArithmetic(self):
+        self.assertEqual("2001-02-28", (DvDate("2001-01-31") + DvDuration("P1M")).value)
+        self.assertEqual("2004-02-29", (DvDate("2004-01-31") + DvDuration("P1M")).value)
+        self.assertEqual("2001-02-28", (DvDate("2000-02-29") + DvDuration("P1Y")).value)
+        self.assertEqual("2000-02-29", (DvDate("2000-03-31") - DvDuration("P1M")).value)
+        self.assertEqual("2001-03-01", (DvDate("2001-01-31") + DvDuration("P1M1D")).value)
+        self.assertEqual("1999-12-15", (DvDate("2000-01-15") + (-DvDuration("P1M"))).value)
+        self.assertEqual("2001-04-30", DvDate("2000-01-30").add_calendar(15).value)
+        self.assertEqual("2002-01", (DvDate("2001-11") + DvDuration("P2M")).value)
+        self.assertEqual((14, 9), DvDuration("P1Y2M1WT49H").calendar_offset())
+
+    def testFromOrdinal(self):
+        ordinal = DvDate("2004-02-29").magnitude
+        self.assertEqual("2004-02-29", DvDate.from_ordinal(ordinal).value)
+        self.assertEqual(DvDate("2004-02"), DvDate.from_ordinal(ordinal, day_known=False))
+        self.assertEqual("2004", str(DvDate.from_ordinal(ordinal, month_known=False)))
+
 class TestDvDuration(): #unittest.TestCase):
 
     def testConstructorTakesString(self):
@@ -288,3 +319,139 @@ class TestDvDuration(): #unittest.TestCase):
         self.assertEqual(DvDuration("PT6H220m89.719S"), DvDuration(0, 0, 0, 0, 6, 220, 89, .719))
         self.assertEqual(DvDuration("P"), DvDuration(0, 0, 0, 0, 0, 0, 0, 0.0))
 
+
+class TestDvDurationComponents(unittest.TestCase):
+
+    def testComponents(self):
+        d = DvDuration("P0Y12M32W10DT9H8M7.898S")
+        self.assertEqual((0, 12, 32, 10, 9, 8, 7), tuple(d.components())[:7])
+        self.assertAlmostEqual(0.898, d.fractional_second())
+        d = DvDuration("PT0,19S")
+        self.assertTrue(d.is_decimal_sign_comma())
+        self.assertAlmostEqual(0.19, d.fractional_second())
+        self.assertEqual(0, d.years())
+        with self.assertRaises(AttributeError):
+            DvDuration("P10a8m7s")
+
+    def testMagnitude(self):
+        self.assertEqual(90061.5, DvDuration("P1DT1H1M1.5S").magnitude())
+        self.assertEqual(-90061.5, (-DvDuration("P1DT1H1M1.5S")).magnitude())
+        self.assertEqual(DvDuration("P1D"), DvDuration("PT24H"))
+        self.assertTrue(DvDuration("P1D") < DvDuration("PT25H"))
+        self.assertTrue(DvDuration("P1W") > DvDuration("P6D"))
+
+    def testFromSeconds(self):
+        d = DvDuration(90061.5)
+        self.assertEqual((0, 0, 0, 1, 1, 1, 1), tuple(d.components())[:7])
+        self.assertEqual("P1DT1H1M1.5S", d.value)
+        self.assertEqual("PT0.000001S", str(DvDuration(0.000001)))
+        self.assertEqual("PT0S", DvDuration(0).value)
+        d = DvDuration(-3600)
+        self.assertEqual("-", d.sign)
+        self.assertEqual("PT1H", d.value)
+        self.assertEqual(3600, (-d).magnitude())
+        self.assertEqual("P1W", (DvDuration("P3D") + DvDuration("P4D")).value)
+        self.assertEqual(DvDuration("PT1M"), DvDuration.from_seconds(60))
+        self.assertEqual("PT1M", DvDuration(59.9999999999).value)
+        self.assertEqual("PT59.9999999S", DvDuration(59.9999999).value)
+        self.assertEqual("P1DT1H", DvDuration(90000 - 1e-10).value)
+        self.assertEqual("PT0.0000001S", DvDuration(1e-7).value)
+        self.assertEqual("PT1H1M1.1S", DvDuration(3661.1).value)
+        self.assertEqual(1, DvDuration(59.9999999999).components().minutes)
+        with self.assertRaises(AttributeError):
+            DvDuration(float('nan'))
+
+    def testNegate(self):
+        d = DvDuration("P1M", accuracy=5.0)
+        negated = -d
+        self.assertEqual("P1M", negated.value)
+        self.assertEqual(-d.magnitude(), negated.magnitude())
+        self.assertEqual(5.0, negated.accuracy)
+        self.assertEqual("+", d.sign)
+
+    def testFromValidated(self):
+        d = DvDuration.from_validated(value="P2D", accuracy=-1.0, accuracy_is_percent=False)
+        self.assertEqual(2, d.days())
+        self.assertEqual(DvDuration("P2D"), d)
+
+
+class TestDvDateTime(unittest.TestCase):
+
+    def testMagnitude(self):
+        self.assertEqual(0, DvDateTime("1970-01-01T00:00:00Z").magnitude)
+        self.assertEqual(1169726400000000, DvDateTime("2007-01-25T12:00:00Z").magnitude)
+        self.assertEqual(1169726400500000, DvDateTime("2007-01-25T12:00:00.5").magnitude)
+        self.assertEqual(DvDateTime("2007-01-25T12:00:00Z"), DvDateTime("2007-01-25T13:00:00+01:00"))
+        self.assertEqual(DvDateTime("20070125T120000Z"), DvDateTime("2007-01-25T12:00:00Z"))
+        self.assertEqual(-86400000000, DvDateTime("1969-12-31").magnitude)
+
+    def testCompareTo(self):
+        self.assertTrue(DvDateTime("2007-01-25T12:00:00") < DvDateTime("2007-01-25T12:00:01"))
+        self.assertTrue(DvDateTime("2007-01-25T12:00:00-05:00") > DvDateTime("2007-01-25T12:00:00Z"))
+        self.assertTrue(DvDateTime("2007-01") <= DvDateTime("2007-01-01T00:00"))
+        self.assertTrue(DvDateTime("2008") >= DvDateTime("2007-12-31T23:59:59.999"))
+        self.assertFalse(DvDateTime("2007-01-25") == DvDate("2007-01-25"))
+        with self.assertRaises(TypeError):
+            DvDateTime("2007-01-25") < DvDate("2007-01-25")
+        self.assertEqual(1, len(set([DvDateTime("2007-01-25T12:00Z"), DvDateTime("2007-01-25T12:00:00Z")])))
+
+    def testDiff(self):
+        diff = DvDateTime("2007-01-26T13:00:00Z").diff(DvDateTime("2007-01-25T12:00:00Z"))
+        self.assertEqual(DvDuration("P1DT1H"), diff)
+        diff = DvDateTime("2007-01-25T12:00:00Z").diff(DvDateTime("2007-01-25T12:00:01.5Z"))
+        self.assertEqual(-1.5, diff.magnitude())
+
+    def testPartial(self):
+        dt = DvDateTime("2007-01-25T12:30")
+        self.assertTrue(dt.is_partial())
+        self.assertTrue(dt.minute_known())
+        self.assertFalse(dt.second_known())
+        self.assertEqual((2007, 1, 25, 12, 30, -1), (dt.year(), dt.month(), dt.day(), dt.hour(), dt.minute(), dt.second()))
+        dt = DvDateTime("2007")
+        self.assertFalse(dt.month_known())
+        self.assertEqual(-1, dt.day())
+        dt = DvDateTime("2007-01-25T12:30:15.25+01:00")
+        self.assertFalse(dt.is_partial())
+        self.assertTrue(dt.has_fractional_second())
+        self.assertTrue(dt.has_timezone())
+        self.assertEqual(0.25, dt.fractional_second())
+
+    def testConstructor(self):
+        self.assertEqual("2007-01-25T12:00:00Z", str(DvDateTime("2007-01-25T12:00:00Z")))
+        dt = DvDateTime("2007-01-25T12:00:00Z")
+        self.assertEqual(dt, DvDateTime(dt))
+        self.assertEqual(dt, DvDateTime(dt.as_datetime()))
+        self.assertEqual(dt, DvDateTime.from_magnitude(dt.magnitude))
+        with self.assertRaises(AttributeError):
+            DvDateTime("2007-13-25T12:00:00Z")
+        with self.assertRaises(AttributeError):
+            DvDateTime("yesterday")
+        with self.assertRaises(AttributeError):
+            dt.colour = 'red'
+
+
+class TestDvTime(unittest.TestCase):
+
+    def testMagnitude(self):
+        self.assertEqual(0, DvTime("00:00:00").magnitude)
+        self.assertEqual(45015250000, DvTime("12:30:15.25").magnitude)
+        self.assertEqual(DvTime("T123015"), DvTime("12:30:15"))
+        self.assertEqual(DvTime("11:30Z"), DvTime("12:30+01:00"))
+
+    def testCompareAndDiff(self):
+        self.assertTrue(DvTime("08:00") < DvTime("08:00:01"))
+        self.assertTrue(DvTime("23:59:59") > DvTime("00:00"))
+        self.assertEqual(DvDuration("PT1H30M"), DvTime("10:00").diff(DvTime("08:30")))
+
+    def testPartial(self):
+        t = DvTime("08")
+        self.assertTrue(t.is_partial())
+        self.assertFalse(t.minute_known())
+        self.assertEqual(8, t.hour())
+        self.assertEqual(-1, t.minute())
+        t = DvTime("08:15:30.5")
+        self.assertFalse(t.is_partial())
+        self.assertEqual(0.5, t.fractional_second())
+        self.assertFalse(t.has_timezone())
+        with self.assertRaises(AttributeError):
+            DvTime("25:00")
@@ -1,4 +1,15 @@
-from openehr.rm.datatypes.encapsulated import DvMultimedia, DvParsable
+import gzip
+import hashlib
+import mmap
+import os
+import tempfile
+import zlib
+
+from openehr.rm.datatypes import encapsulated
+from openehr.rm.datatypes.encapsulated import (DvMultimedia, DvParsable, IntegrityCheckError,
+                                                 compute_integrity_checks, parse_chunks,
+                                                 register_formalism_parser, verify_integrity_checks)
+from openehr.rm.datatypes.media import ChunkSource, FileSource
 from openehr.rm.datatypes.text import CodePhrase
 from openehr.rm.datatypes.uri import DvURI
 from openehr.rm.support.terminology import TerminologyService
@@ -47,6 +58,248 @@ class TestDvMultimedia(unittest.TestCase):
         self.assertEqual(dm.is_compressed(), True)
         self.assertEqual(dm.has_integrity_check(), True)
 
+class TestDvMultimediaSources(unittest.TestCase):
+    def setUp(self):
+        self.payload = bytes(range(256)) * 100
+        handle, self.path = tempfile.mkstemp()
+        with os.fdopen(handle, 'wb') as f:
+            f.write(self.payload)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_bytes(self):
+        dm = DvMultimedia(data=self.payload)
+        self.assertIs(dm.data, self.payload)
+        self.assertEqual(dm.size, len(self.payload))
+        self.assertEqual(b''.join(dm.chunks(1000)), self.payload)
+        self.assertEqual(dm.open().read(), self.payload)
+
+    def test_buffer(self):
+        buffer = bytearray(self.payload)
+        dm = DvMultimedia(data=memoryview(buffer))
+        self.assertEqual(dm.size, len(self.payload))
+        self.assertTrue(dm.is_inline())
+        buffer[0] = 255
+        # The buffer is not copied
+        self.assertEqual(dm.data[0], 255)
+        self.assertTrue(dm.data.readonly)
+        self.assertEqual([len(chunk) for chunk in dm.chunks(10000)], [10000, 10000, 5600])
+
+    def test_file(self):
+        dm = DvMultimedia.from_file(self.path, alternate_text='sample')
+        self.assertIsInstance(dm.source, FileSource)
+        self.assertEqual(dm.size, len(self.payload))
+        self.assertEqual(dm.source._mmap, None)
+        with dm.open() as f:
+            self.assertEqual(f.read(), self.payload)
+        digest = hashlib.sha1()
+        for chunk in dm.chunks(4096):
+            digest.update(chunk)
+        self.assertEqual(digest.digest(), hashlib.sha1(self.payload).digest())
+        self.assertEqual(dm.data, self.payload)
+        self.assertTrue(dm.is_inline())
+        del chunk
+        dm.close()
+        self.assertIsNone(dm.source._mmap)
+
+        with DvMultimedia.from_file(self.path) as dm:
+            self.assertEqual(dm.compute_integrity_check('SHA-1'), hashlib.sha1(self.payload).digest())
+            self.assertIsNotNone(dm.source._mmap)
+        self.assertIsNone(dm.source._mmap)
+
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        dm = DvMultimedia(data=mapped)
+        self.assertEqual(dm.size, len(self.payload))
+        self.assertEqual(dm.data[:3].tobytes(), bytes([0, 1, 2]))
+
+    def test_chunks(self):
+        chunks = (self.payload[i:i + 1000] for i in range(0, len(self.payload), 1000))
+        dm = DvMultimedia(data=chunks)
+        self.assertIsInstance(dm.source, ChunkSource)
+        self.assertIsNone(dm.size)
+        self.assertFalse(dm.is_inline())
+        with dm.open() as f:
+            self.assertEqual(f.read(300), self.payload[:300])
+            self.assertEqual(f.read(), self.payload[300:])
+        self.assertEqual(dm.size, len(self.payload))
+        self.assertTrue(dm.is_inline())
+        with self.assertRaises(ValueError):
+            list(dm.chunks())
+
+        dm = DvMultimedia(data=iter([]))
+        self.assertFalse(dm.is_inline())
+        self.assertEqual(dm.data, b'')
+        self.assertFalse(dm.is_inline())
+
+        dm = DvMultimedia(data=ChunkSource([b'abc', b'def'], size=6))
+        self.assertEqual(dm.size, 6)
+        self.assertEqual(dm.data, b'abcdef')
+        self.assertEqual(b''.join(dm.chunks()), b'abcdef')
+
+    def test_invalid(self):
+        with self.assertRaises(AttributeError):
+            DvMultimedia(data='text')
+        with self.assertRaises(AttributeError):
+            DvMultimedia(data=42)
+        dm = DvMultimedia(uri=DvURI("http://www.iana.org"))
+        self.assertEqual(dm.size, 0)
+        self.assertFalse(dm.is_inline())
+        self.assertEqual(list(dm.chunks()), [])
+
+
+class TestIntegrityCheck(unittest.TestCase):
+    def setUp(self):
+        self.payload = bytes(range(256)) * 1000
+
+    def test_compute(self):
+        dm = DvMultimedia(data=memoryview(self.payload))
+        with self.assertRaises(AttributeError):
+            dm.compute_integrity_check()
+        self.assertEqual(dm.compute_integrity_check('SHA-256', chunk_size=1000), hashlib.sha256(self.payload).digest())
+        self.assertEqual(dm.integrity_check_algorithm, CodePhrase("openehr_integrity_check_algorithms", "SHA-256"))
+        self.assertTrue(dm.verify_integrity_check())
+        self.assertTrue(dm.has_integrity_check())
+
+        dm.integrity_check = hashlib.sha256(b'other').digest()
+        self.assertFalse(dm.verify_integrity_check())
+        with self.assertRaises(AttributeError):
+            dm.compute_integrity_check('MD5')
+
+    def test_checked_chunks(self):
+        chunks = (self.payload[i:i + 4096] for i in range(0, len(self.payload), 4096))
+        dm = DvMultimedia(data=chunks, integrity_check_algorithm=CodePhrase("openehr_integrity_check_algorithms", "SHA-1"))
+        copied = b''.join(dm.checked_chunks())
+        self.assertEqual(copied, self.payload)
+        self.assertEqual(dm.integrity_check, hashlib.sha1(self.payload).digest())
+
+        dm = DvMultimedia(data=self.payload, integrity_check=hashlib.sha1(b'other').digest(),
+                integrity_check_algorithm=CodePhrase("openehr_integrity_check_algorithms", "SHA-1"))
+        with self.assertRaises(IntegrityCheckError):
+            for chunk in dm.checked_chunks(1000):
+                pass
+
+    def test_thread_pool(self):
+        attachments = [DvMultimedia(data=self.payload[:i * 1000]) for i in range(1, 20)]
+        digests = compute_integrity_checks(attachments, 'SHA-1', max_workers=4)
+        self.assertEqual(digests, [hashlib.sha1(self.payload[:i * 1000]).digest() for i in range(1, 20)])
+        self.assertEqual(verify_integrity_checks(attachments, max_workers=1), [True] * 19)
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.payload = b''.join(b'<observation id="%d"/>' % i for i in range(2000))
+
+    def test_compress(self):
+        dm = DvMultimedia(data=self.payload)
+        self.assertTrue(dm.compress())
+        self.assertTrue(dm.is_compressed())
+        self.assertEqual(dm.compression_algorithm, CodePhrase("openehr_compression_algorithms", "zlib"))
+        self.assertEqual(dm.size, len(self.payload))
+        stored = b''.join(dm.stored_chunks())
+        self.assertLess(len(stored), len(self.payload) // 4)
+        self.assertEqual(zlib.decompress(stored), self.payload)
+        self.assertIsNone(dm._data)
+
+        # Streaming decompresses on the fly, data decompresses once
+        self.assertEqual(b''.join(dm.chunks()), self.payload)
+        self.assertEqual(dm.open().read(100), self.payload[:100])
+        self.assertEqual(dm.data, self.payload)
+        self.assertIs(dm.data, dm.data)
+        self.assertFalse(dm.compress())
+
+    def test_algorithms(self):
+        for code in ('zlib', 'deflate', 'gzip', 'bzip2', 'lzma'):
+            chunks = (self.payload[i:i + 5000] for i in range(0, len(self.payload), 5000))
+            dm = DvMultimedia(data=chunks)
+            self.assertTrue(dm.compress(code))
+            self.assertEqual(dm.compression_algorithm.code_string, code)
+            self.assertEqual(dm.size, len(self.payload))
+            self.assertEqual(dm.data, self.payload)
+        with self.assertRaises(AttributeError):
+            DvMultimedia(data=self.payload).compress('compress')
+
+    def test_replace_compressed_data(self):
+        dm = DvMultimedia(data=self.payload)
+        self.assertTrue(dm.compress())
+        dm.data = b'abc'
+        self.assertFalse(dm.is_compressed())
+        self.assertIsNone(dm.compression_algorithm)
+        self.assertEqual(dm.size, 3)
+        self.assertEqual(b''.join(dm.stored_chunks()), b'abc')
+
+        dm.data = iter([b'ab', b'c'])
+        self.assertIsNone(dm.size)
+        self.assertEqual(dm.data, b'abc')
+        self.assertEqual(dm.size, 3)
+
+    def test_compress_closes_file(self):
+        handle, path = tempfile.mkstemp()
+        with os.fdopen(handle, 'wb') as f:
+            f.write(self.payload)
+        try:
+            dm = DvMultimedia.from_file(path)
+            source = dm.source
+            self.assertTrue(dm.compress())
+            self.assertIsNone(source._mmap)
+            self.assertEqual(dm.data, self.payload)
+        finally:
+            os.remove(path)
+
+    def test_local_algorithms(self):
+        dm = DvMultimedia(data=self.payload)
+        self.assertTrue(dm.compress('bzip2'))
+        self.assertEqual(dm.compression_algorithm, CodePhrase("local", "bzip2"))
+        stored = b''.join(dm.stored_chunks())
+        self.assertEqual(DvMultimedia.from_compressed(stored, CodePhrase("local", "bzip2")).data, self.payload)
+        with self.assertRaises(AttributeError):
+            DvMultimedia.from_compressed(stored, CodePhrase("openehr_compression_algorithms", "bzip2"))
+        with self.assertRaises(AttributeError):
+            DvMultimedia(data=self.payload).compress(CodePhrase("openehr_compression_algorithms", "lzma"))
+
+    def test_policy(self):
+        dm = DvMultimedia(data=self.payload[:100])
+        self.assertFalse(dm.compress())
+        self.assertFalse(dm.is_compressed())
+        noise = os.urandom(5000)
+        dm = DvMultimedia(data=noise)
+        self.assertFalse(dm.compress('gzip'))
+        self.assertIs(dm.data, noise)
+        self.assertTrue(DvMultimedia(data=self.payload[:100]).compress(threshold=0))
+
+    def test_from_compressed(self):
+        dm = DvMultimedia.from_compressed(gzip.compress(self.payload), 'gzip', alternate_text='report')
+        self.assertTrue(dm.is_inline())
+        self.assertIsNone(dm.size)
+        self.assertEqual(dm.data, self.payload)
+        self.assertEqual(dm.size, len(self.payload))
+        self.assertEqual(dm.compute_integrity_check('SHA-1'), hashlib.sha1(self.payload).digest())
+
+        dm = DvMultimedia(data=zlib.compress(self.payload), media_type=CodePhrase("IANA_media-types", "text/xml"),
+                compression_algorithm=CodePhrase("openehr_compression_algorithms", "zlib"))
+        self.assertIsNone(dm.size)
+        self.assertEqual(b''.join(dm.stored_chunks()), zlib.compress(self.payload))
+        self.assertEqual(b''.join(dm.chunks()), self.payload)
+        self.assertEqual(dm.data, self.payload)
+        self.assertEqual(dm.size, len(self.payload))
+
+        # an empty payload is no compressed stream
+        zlib_code = CodePhrase("openehr_compression_algorithms", "zlib")
+        dm = DvMultimedia(data=b'', compression_algorithm=zlib_code)
+        self.assertFalse(dm.is_inline())
+        self.assertEqual(dm.size, 0)
+        self.assertEqual(dm.data, b'')
+
+        # only algorithms which can be decoded make the data a stored form
+        other = CodePhrase("openehr_compression_algorithms", "other")
+        self.assertEqual(DvMultimedia(data=b'opaque', compression_algorithm=other).data, b'opaque')
+
+        dm = DvMultimedia.from_compressed(zlib.compress(self.payload)[:-10], 'zlib')
+        with self.assertRaises(ValueError):
+            dm.data
+
+
 class TestDvParsable(unittest.TestCase):
     def test_constructor(self):
         charset = CodePhrase("IANA_character-sets", "UTF-8")
@@ -62,3 +315,74 @@ class TestDvParsable(unittest.TestCase):
         self.assertEqual(dp.value, 'Some Action')
 
         self.assertEqual(dp.as_string(), 'Some Action')
+
+class TestParsedForm(unittest.TestCase):
+    def setUp(self):
+        self.parsers = dict(encapsulated.FORMALISM_PARSERS)
+        self.calls = []
+
+        def dose(text):
+            self.calls.append(text)
+            amount, units = text.split()
+            return (float(amount), units)
+        register_formalism_parser('dose', dose)
+
+    def tearDown(self):
+        encapsulated.FORMALISM_PARSERS.clear()
+        encapsulated.FORMALISM_PARSERS.update(self.parsers)
+        encapsulated.PARSED_CACHE.clear()
+
+    def test_memoised(self):
+        dp = DvParsable('2.5 mg', 'dose')
+        self.assertEqual(self.calls, [])
+        self.assertEqual(dp.parsed, (2.5, 'mg'))
+        self.assertIs(dp.parsed, dp.parsed)
+        # The same text is parsed once for all values
+        self.assertIs(DvParsable('2.5 mg', 'dose').parsed, dp.parsed)
+        self.assertEqual(self.calls, ['2.5 mg'])
+
+        dp.value = '5 mg'
+        self.assertEqual(dp.parsed, (5.0, 'mg'))
+        self.assertEqual(len(self.calls), 2)
+
+        with self.assertRaises(AttributeError):
+            DvParsable('x', 'unknown').parsed
+
+    def test_private_copies(self):
+        first = DvParsable('{"doses": [2.5]}', 'json')
+        second = DvParsable('{"doses": [2.5]}', 'json')
+        first.parsed['doses'].append(5.0)
+        self.assertEqual(second.parsed, {'doses': [2.5]})
+        self.assertIs(first.parsed, first.parsed)
+
+        element = DvParsable('<dose units="mg"/>', 'xml').parsed
+        element.set('units', 'g')
+        self.assertEqual(DvParsable('<dose units="mg"/>', 'xml').parsed.get('units'), 'mg')
+
+        # results registered as immutable are shared
+        register_formalism_parser('frozen', lambda text: frozenset(text.split()), copy=None)
+        self.assertIs(DvParsable('a b', 'frozen').parsed, DvParsable('a b', 'frozen').parsed)
+
+    def test_module_namespace(self):
+        self.assertFalse(hasattr(encapsulated, 'formalism'))
+
+    def test_bounded(self):
+        size = encapsulated.PARSED_CACHE_SIZE
+        for i in range(size + 10):
+            DvParsable('%d mg' % i, 'dose').parsed
+        self.assertEqual(len(encapsulated.PARSED_CACHE), size)
+
+    def test_builtin(self):
+        dp = DvParsable('<dose amount="2.5" units="mg"/>', 'text/xml')
+        self.assertEqual(dp.parsed.get('units'), 'mg')
+        self.assertEqual(DvParsable('{"amount": 2.5}', 'json').parsed, {'amount': 2.5})
+
+    def test_incremental(self):
+        items = ''.join('<item n="%d"/>' % i for i in range(20000))
+        value = '<items>%s</items>' % items
+        self.assertGreater(len(value), encapsulated.INCREMENTAL_PARSE_SIZE)
+        self.assertEqual(len(DvParsable(value, 'xml').parsed), 20000)
+
+        chunks = ['<items>', items[:100], items[100:], '</items>']
+        self.assertEqual(len(parse_chunks('xml', chunks)), 20000)
+        self.assertEqual(parse_chunks('dose', ['2', '.5 ', 'mg']), (2.5, 'mg'))
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from openehr.rm.datatypes.quantity import iso8601_
+
+import unittest
+
+class TestParseDate(unittest.TestCase):
+    def test_fast_path_matches_regex(self):
+        values = ['2007-01-25T12:00:00Z', '2007-01-25T12:00:00.123456789+01:00', '2007-01-25 12:30',
+                  '2007-01-25', '2007-01-25T12:30:15-05:30', '2007-01-25T12:30:15.5']
+        for value in values:
+            self.assertIsNotNone(iso8601_._parse_common(value, iso8601_.UTC), value)
+            self.assertEqual(iso8601_._parse_regex(value, iso8601_.UTC),
+                    iso8601_.parse_date_precision(value), value)
+
+    def test_fallback(self):
+        for value in ['20070125T120000Z', '2007', '2007-01', '2007-1-5T12', '2007-01-25T12:00+0100']:
+            self.assertIsNone(iso8601_._parse_common(value, iso8601_.UTC), value)
+            iso8601_.parse_date(value)
+        self.assertEqual('month', iso8601_.parse_date_precision('2007-01')[1])
+        self.assertEqual(timedelta(hours=1), iso8601_.parse_date('2007-01-25T12:00+0100').utcoffset())
+
+    def test_invalid(self):
+        for value in ['2007-13-25', '2007-01-25T25:00:00Z', '2007-01-25T12:00:00 Z', None]:
+            with self.assertRaises(iso8601_.ParseError):
+                iso8601_.parse_date(value)
+
+    def test_values(self):
+        self.assertEqual(datetime(2007, 1, 25, 12, 0, 0, 123456, iso8601_.UTC),
+                iso8601_.parse_date('2007-01-25T12:00:00.1234567Z'))
+        self.assertIsNone(iso8601_.parse_date('2007-01-25T12:00', default_timezone=None).tzinfo)
+
+    def test_offsets_shared(self):
+        first = iso8601_.parse_date('2007-01-25T12:00:00-05:30').tzinfo
+        self.assertIs(first, iso8601_.parse_date('2008-02-01T00:00:00-05:30').tzinfo)
+        self.assertIs(first, iso8601_.parse_date('20080201T000000-0530').tzinfo)
+        self.assertEqual(timedelta(hours=-5, minutes=-30), first.utcoffset(None))
+
+
+@unittest.skipIf(iso8601_.numpy is None, 'numpy is not installed')
+class TestParseDates(unittest.TestCase):
+    def test_parse(self):
+        values = ['2007-01-25T12:00:00Z', '2007-01-25T12:00:00.5+01:00', '2008-02-29 23:59:59.123456789-05:30',
+                  '2007-01-25T12:00:00', '20070125T120000Z', '2007-01-25', None, 'junk', '2007-02-29T00:00:00Z',
+                  '2007-01-25T12:00:00.Z', '2007-01-25T24:00:00Z']
+        timestamps, invalid = iso8601_.parse_dates(values)
+        self.assertEqual([False] * 6 + [True] * 5, list(invalid))
+        numpy = iso8601_.numpy
+        self.assertTrue(numpy.isnat(timestamps[invalid]).all())
+        for value, timestamp in zip(values[:6], timestamps):
+            dt = iso8601_.parse_date(value)
+            expected = numpy.datetime64(dt.replace(tzinfo=None) - dt.utcoffset(), 'us')
+            self.assertEqual(expected, timestamp, value)
+        self.assertEqual(numpy.datetime64('2007-01-25T11:00:00.5'), timestamps[1])
+
+    def test_long_values(self):
+        long_value = '2007-01-25T12:00:00.123456789012345678901+01:00'
+        for values in ([long_value], ['2007-01-25T12:00:00Z', long_value], [long_value, '2007-01-25T12:00:00Z']):
+            timestamps, invalid = iso8601_.parse_dates(values)
+            self.assertFalse(invalid.any())
+            numpy = iso8601_.numpy
+            self.assertIn(numpy.datetime64('2007-01-25T11:00:00.123456'), list(timestamps))
+
+    def test_empty(self):
+        timestamps, invalid = iso8601_.parse_dates([])
+        self.assertEqual(0, len(timestamps))
+        self.assertEqual('datetime64[us]', str(timestamps.dtype))
@@ -0,0 +1,84 @@
+from openehr.rm.datatypes.mappings import TermMappingIndex, terminology_name
+from openehr.rm.datatypes.text import DvText, CodePhrase, TermMapping
+from openehr.rm.support.identification import TerminologyID
+
+import unittest
+
+
+ICD_J45 = CodePhrase('ICD10', 'J45')
+ICD_J44 = CodePhrase('ICD10', 'J44')
+SNOMED_ASTHMA = CodePhrase(TerminologyID('SNOMED-CT(2003)'), '195967001')
+
+
+def mapped(value, *targets):
+    return DvText(value, mappings=[TermMapping(target, '=', None) for target in targets])
+
+
+class TestTermMappingIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.asthma = mapped('asthma', ICD_J45, SNOMED_ASTHMA)
+        self.copd = mapped('copd', ICD_J44)
+        self.also_asthma = mapped('asthma', CodePhrase('ICD10', 'J45'))
+        self.plain = DvText('plain')
+        self.index = TermMappingIndex([self.asthma, self.copd, self.also_asthma, self.plain])
+
+    def test_terminology_name(self):
+        self.assertEqual(terminology_name('SNOMED-CT(2003)'), 'SNOMED-CT')
+        self.assertEqual(terminology_name(TerminologyID('SNOMED-CT(2003)')), 'SNOMED-CT')
+        self.assertEqual(terminology_name('ICD10'), 'ICD10')
+
+    def test_texts_for_target(self):
+        texts = self.index.texts_for_target(CodePhrase('ICD10', 'J45'))
+        self.assertEqual(len(texts), 2)
+        self.assertIs(texts[0], self.asthma)
+        self.assertIs(texts[1], self.also_asthma)
+        self.assertEqual(self.index.texts_for_target(CodePhrase('ICD10', 'X99')), [])
+
+    def test_texts_for_terminology(self):
+        self.assertEqual(len(self.index.texts_for_terminology('ICD10')), 3)
+        texts = self.index.texts_for_terminology('SNOMED-CT')
+        self.assertEqual(len(texts), 1)
+        self.assertIs(texts[0], self.asthma)
+        self.assertEqual(self.index.texts_for_terminology(TerminologyID('SNOMED-CT(2005)')), texts)
+
+    def test_mappings_for(self):
+        self.assertEqual(len(self.index.mappings_for(self.asthma)), 2)
+        snomed = self.index.mappings_for(self.asthma, 'SNOMED-CT')
+        self.assertEqual([mapping.target for mapping in snomed], [SNOMED_ASTHMA])
+        self.assertEqual(self.index.mappings_for(self.plain), [])
+
+    def test_targets(self):
+        self.assertEqual(len(self.index.targets()), 3)
+        self.assertEqual(self.index.targets('SNOMED-CT'), [SNOMED_ASTHMA])
+
+    def test_remove(self):
+        self.index.remove(self.asthma)
+        self.assertNotIn(self.asthma, self.index)
+        self.assertEqual(self.index.texts_for_terminology('SNOMED-CT'), [])
+        self.assertEqual(self.index.targets('SNOMED-CT'), [])
+        self.assertEqual(len(self.index.texts_for_target(ICD_J45)), 1)
+        self.assertEqual(len(self.index), 3)
+        with self.assertRaises(KeyError):
+            self.index.remove(self.asthma)
+
+    def test_update(self):
+        self.copd.mappings = [TermMapping(ICD_J45, '>', None)]
+        self.assertEqual(self.index.texts_for_target(ICD_J44), [self.copd])
+        self.index.update(self.copd)
+        self.assertEqual(self.index.texts_for_target(ICD_J44), [])
+        self.assertIn(self.copd, self.index.texts_for_target(ICD_J45))
+        self.assertEqual(len(self.index), 4)
+
+    def test_contains_is_by_identity(self):
+        self.assertIn(self.plain, self.index)
+        self.assertNotIn(DvText('plain'), self.index)
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.targets(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
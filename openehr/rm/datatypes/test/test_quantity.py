@@ -505,6 +505,26 @@ class TestDvAmount(unittest.TestCase):
         self.assertEqual(all_chairs.magnitude, 120)
         self.assertEqual(all_chairs.accuracy, 300.0)
 
+        """
+            Many amounts can be added in one pass with sum(), which gives the
+            same magnitude and accuracy as adding them with +::
+        """
+
+        lights = [main_room_brightlight, wait_room_brightlight, Amount(magnitude=50, accuracy=10.0)]
+        total = Amount.sum(lights)
+        self.assertEqual(total.magnitude, 550)
+        self.assertEqual(total.accuracy, 360.0)
+        self.assertEqual(type(total), Amount)
+        mixed = [a_set_of_simple_chairs, a_set_of_elegant_chairs, main_room_brightlight]
+        folded = mixed[0] + mixed[1] + mixed[2]
+        total = Amount.sum(mixed)
+        self.assertEqual(total.magnitude, folded.magnitude)
+        self.assertEqual(total.accuracy, folded.accuracy)
+        self.assertEqual(total.accuracy_is_percent, folded.accuracy_is_percent)
+        self.assertTrue(Amount.sum([sheets_of_paper, more_sheets_of_papers]).accuracy_unknown)
+        with self.assertRaises(ValueError):
+            Amount.sum([])
+
 
         """ TODO
         Validating Invariants
@@ -548,6 +568,12 @@ class TestDvCount(unittest.TestCase):
         expected = DvCount(2)
         self.assertEqual(expected, c2 - c1)
 
+    def testSum(self):
+        counts = [DvCount(i) for i in range(10)]
+        self.assertEqual(DvCount(45), DvCount.sum(counts))
+        with self.assertRaises(TypeError):
+            DvCount.sum([DvCount(1), DvQuantity(1.0)])
+
     def testCompareTo(self):
         c1 = DvCount(3)
         c2 = DvCount(5)
@@ -625,6 +651,18 @@ class TestDvQuantity(unittest.TestCase):
         qty = DvQuantity(magnitude=100.2, units="km/h", precision=0)
         self.assertEqual(type(qty), DvQuantity)
 
+    def testAdd(self):
+        q1 = DvQuantity(units="mL", magnitude=250, precision=0, accuracy=5.0, accuracy_is_percent=False)
+        q2 = DvQuantity(units="mL", magnitude=100, precision=0, accuracy=2.0, accuracy_is_percent=False)
+        total = q1 + q2
+        self.assertEqual(total, DvQuantity(units="mL", magnitude=350, precision=0))
+        self.assertEqual(total.accuracy, 7.0)
+        self.assertEqual((q1 - q2).magnitude, 150.0)
+        self.assertEqual(DvQuantity.sum([q1, q2, q2]).magnitude, 450.0)
+        self.assertTrue((DvQuantity(1.0, "mL") + DvQuantity(2.0, "mL")).accuracy_unknown)
+        with self.assertRaises(AssertionError):
+            q1 + DvQuantity(units="L", magnitude=1)
+
     def testEquals(self):
         q1 = DvQuantity(units="mg", magnitude=10, precision=2)
         q2 = DvQuantity(units="mg", magnitude=10, precision=2)
@@ -695,6 +733,12 @@ class TestDvQuantity(unittest.TestCase):
         with self.assertRaises(AttributeError):
             DvQuantity(units="mg", magnitude=12, precision=-1)
 
+    def testFromValidated(self):
+        q = DvQuantity.from_validated(magnitude=10.0, units="mg", precision=2)
+        self.assertEqual(q, DvQuantity(units="mg", magnitude=10, precision=2))
+        self.assertEqual(q.normal_range, None)
+        self.assertEqual(str(q), "10.00,mg")
+
 class TestReferenceRange(unittest.TestCase):
     def test_constructor(self):
         tid = TerminologyID("SNOMED-CT(2003)")
@@ -0,0 +1,90 @@
+from openehr.rm.datatypes.quantity import DvInterval, DvQuantity, ReferenceRange
+from openehr.rm.datatypes.text import CodePhrase, DvText
+from openehr.rm.support import Largest, Smallest
+
+import unittest
+
+try:
+    import numpy
+    from openehr.rm.datatypes.quantity.reference import (NORMAL_STATUSES, UNKNOWN_STATUS,
+                                                           ReferenceRangeEvaluator)
+    from openehr.rm.datatypes.quantity.series import DvQuantitySeries
+except ImportError:
+    numpy = None
+
+GLUCOSE_MOLAR_MASS = 180.16
+
+
+def reference_range(meaning, lower, upper, units='mmol/L', lower_included=True, upper_included=True):
+    lower = Smallest() if lower is None else DvQuantity(lower, units)
+    upper = Largest() if upper is None else DvQuantity(upper, units)
+    if isinstance(lower, Smallest):
+        lower_included = False
+    if isinstance(upper, Largest):
+        upper_included = False
+    return ReferenceRange(DvText(meaning), DvInterval(lower, upper, lower_included, upper_included))
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestReferenceRangeEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = ReferenceRangeEvaluator()
+        self.evaluator.register('glucose', reference_range('normal', 3.9, 5.6), molar_mass=GLUCOSE_MOLAR_MASS)
+        self.evaluator.register('glucose', reference_range('borderline', 3.0, 7.0))
+        self.evaluator.register('glucose', reference_range('critical', 2.2, 25.0))
+
+    def statuses(self, values, units=None):
+        return [NORMAL_STATUSES[i] if i != UNKNOWN_STATUS else None
+                for i in self.evaluator.evaluate('glucose', values, units).status]
+
+    def test_status(self):
+        self.assertEqual(self.statuses([1.0, 2.2, 2.5, 3.5, 3.9, 5.0, 5.6, 6.0, 8.0, 25.0, 30.0, float('nan')]),
+                ['LLL', 'LL', 'LL', 'L', 'N', 'N', 'N', 'H', 'HH', 'HH', 'HHH', None])
+
+    def test_open_limits(self):
+        self.evaluator.register('glucose', reference_range('normal', 3.9, 5.6, lower_included=False))
+        self.assertEqual(self.statuses([3.9, 5.6]), ['L', 'N'])
+
+    def test_units(self):
+        self.assertEqual(self.evaluator.units('glucose'), 'mmol/L')
+        self.assertEqual(self.statuses([90.0, 200.0], units='mg/dL'), ['N', 'HH'])
+        self.assertEqual(self.statuses([DvQuantity(90.0, 'mg/dL'), DvQuantity(1.5, 'mmol/L')]), ['N', 'LLL'])
+        series = DvQuantitySeries('mg/dL', [90.0, 120.0])
+        self.assertEqual(self.statuses(series), ['N', 'H'])
+
+        self.evaluator.register('glucose', reference_range('normal', 70.0, 100.0, units='mg/dL'))
+        self.assertEqual(self.statuses([3.8, 5.5]), ['L', 'N'])
+
+    def test_membership(self):
+        self.evaluator.register('glucose', reference_range('fasting target', 4.0, None), severity=0)
+        evaluation = self.evaluator.evaluate('glucose', [3.9, 4.0, 30.0])
+        column = evaluation.meanings.index('fasting target')
+        self.assertEqual(evaluation.inside[:, column].tolist(), [False, True, True])
+        self.assertEqual(evaluation.inside[:, evaluation.meanings.index('normal')].tolist(), [True, True, False])
+        self.assertEqual(self.statuses([30.0]), ['HHH'])
+
+    def test_normal_status(self):
+        codes = self.evaluator.normal_status('glucose', [5.0, 6.0, 5.5, float('nan')])
+        self.assertEqual(codes[0], CodePhrase('openehr_normal_statuses', 'N'))
+        self.assertEqual(codes[1].code_string, 'H')
+        self.assertIs(codes[0], codes[2])
+        self.assertIsNone(codes[3])
+        self.assertEqual(self.evaluator.is_normal('glucose', [5.0, 6.0]).tolist(), [True, False])
+
+    def test_unregister(self):
+        self.evaluator.unregister('glucose', 'critical')
+        self.assertEqual(self.statuses([1.0, 30.0]), ['LL', 'HH'])
+        self.assertEqual(sorted(self.evaluator.reference_ranges('glucose')), ['borderline', 'normal'])
+        self.evaluator.unregister('glucose')
+        with self.assertRaises(KeyError):
+            self.evaluator.evaluate('glucose', [1.0])
+
+    def test_no_severity(self):
+        self.evaluator.register('estradiol', reference_range('luteal phase', 126.0, 478.0, units='pmol/L'))
+        self.assertEqual(self.evaluator.status_indexes('estradiol', [100.0]).tolist(), [UNKNOWN_STATUS])
+        with self.assertRaises(AttributeError):
+            self.evaluator.register('estradiol', reference_range('normal', 1.0, 2.0), severity=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+from openehr.rm.datatypes.resolver import EhrUriResolver, InMemoryVersionStore, split_ehr_uri
+from openehr.rm.datatypes.uri import DvEHRURI
+from openehr.rm.support.identification import LocatableRef, ObjectVersionID
+
+import unittest
+
+
+class StubData(object):
+    """ A locatable with items at paths """
+    def __init__(self, items):
+        self.items = items
+
+    def pathExists(self, path):
+        return path in self.items
+
+    def itemAtPath(self, path):
+        return self.items[path]
+
+    def isArchetypeRoot(self):
+        return True
+
+
+class StubVersion(object):
+    def __init__(self, uid, items):
+        self.uid = ObjectVersionID(uid)
+        self.data = StubData(items)
+
+
+class CountingStore(InMemoryVersionStore):
+    def __init__(self, versions):
+        InMemoryVersionStore.__init__(self, versions)
+        self.batches = []
+
+    def get_many(self, version_ids):
+        self.batches.append(sorted(version_ids))
+        return InMemoryVersionStore.get_many(self, version_ids)
+
+
+UID1 = '8849182c-82ad-4088-a07f-48ead4180515::rmh.nhs.net::1'
+UID2 = '8849182c-82ad-4088-a07f-48ead4180516::rmh.nhs.net::2'
+
+
+class TestEhrUriResolver(unittest.TestCase):
+    def setUp(self):
+        self.version1 = StubVersion(UID1, {'content[at0001]': 'blood pressure', 'content[at0002]': 'pulse'})
+        self.version2 = StubVersion(UID2, {'data[at0003]': 'glucose'})
+        self.store = CountingStore([self.version1, self.version2])
+        self.resolver = EhrUriResolver(self.store)
+
+    def test_split(self):
+        self.assertEqual(split_ehr_uri('ehr://%s/content[at0001]' % UID1), (UID1, 'content[at0001]'))
+        self.assertEqual(split_ehr_uri(DvEHRURI('ehr://rmh.nhs.net/%s' % UID2)), (UID2, None))
+        ref = LocatableRef(self.version1, 'content[at0002]')
+        self.assertEqual(split_ehr_uri(ref), (UID1, 'content[at0002]'))
+        with self.assertRaises(AttributeError):
+            split_ehr_uri('ehr://rmh.nhs.net')
+        with self.assertRaises(AttributeError):
+            split_ehr_uri('http://%s/content' % UID1)
+
+    def test_store(self):
+        self.assertIn(ObjectVersionID(UID1), self.store)
+        self.assertIs(self.store.get(ObjectVersionID(UID2)), self.version2)
+        self.assertIs(self.store.get(UID2), self.version2)
+        self.assertIsNone(self.store.get('missing'))
+        self.store.remove(UID2)
+        self.assertEqual(len(self.store), 1)
+
+    def test_resolve(self):
+        self.assertEqual(self.resolver.resolve('ehr://%s/content[at0001]' % UID1), 'blood pressure')
+        self.assertEqual(self.resolver.resolve(LocatableRef(self.version1, 'content[at0001]')), 'blood pressure')
+        self.assertEqual((self.resolver.hits, self.resolver.misses), (1, 1))
+        self.assertIs(self.resolver.resolve(DvEHRURI('ehr://%s/' % UID2)), self.version2.data)
+        self.assertIsNone(self.resolver.resolve('ehr://%s/content[at9999]' % UID1))
+        self.assertIsNone(self.resolver.resolve('ehr://%s/content[at0001]' % UID1.replace('::1', '::3')))
+
+    def test_resolve_all(self):
+        uris = ['ehr://%s/content[at0001]' % UID1, 'ehr://%s/data[at0003]' % UID2,
+                DvEHRURI('ehr://%s/content[at0002]' % UID1), 'ehr://%s/content[at0001]' % UID1,
+                'ehr://unknown::rmh.nhs.net::1/x']
+        self.assertEqual(self.resolver.resolve_all(uris), ['blood pressure', 'glucose', 'pulse', 'blood pressure', None])
+        self.assertEqual(self.store.batches, [sorted([UID1, UID2, 'unknown::rmh.nhs.net::1'])])
+        self.assertEqual(self.resolver.resolve_all(uris[:3]), ['blood pressure', 'glucose', 'pulse'])
+        self.assertEqual(len(self.store.batches), 1)
+
+        self.version1.data.items['content[at0001]'] = 'amended'
+        self.resolver.forget(ObjectVersionID(UID1))
+        self.assertEqual(self.resolver.resolve(uris[0]), 'amended')
+
+    def test_bounded(self):
+        resolver = EhrUriResolver(self.store, maxsize=1)
+        uris = ['ehr://%s/content[at0001]' % UID1, 'ehr://%s/data[at0003]' % UID2]
+        self.assertEqual(resolver.resolve_all(uris), ['blood pressure', 'glucose'])
+        self.assertEqual(resolver.resolve_all(uris), ['blood pressure', 'glucose'])
+        self.assertEqual(len(resolver._targets), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
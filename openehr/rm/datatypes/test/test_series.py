@@ -0,0 +1,176 @@
+import datetime
+
+from openehr.rm.datatypes.quantity import DvQuantity
+from openehr.rm.datatypes.quantity.datetime import DvDate, DvDateTime, DvDuration
+
+import unittest
+
+try:
+    import numpy
+    from openehr.rm.datatypes.quantity.series import (DAY_KNOWN, MONTH_KNOWN, DvDateColumn, DvQuantitySeries,
+                                                        DvQuantityTimeSeries, recurrence)
+except ImportError:
+    numpy = None
+
+GLUCOSE_MOLAR_MASS = 180.16
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestDvQuantitySeries(unittest.TestCase):
+    def test_ingest(self):
+        values = [DvQuantity(90.0, 'mg/dL'), DvQuantity(5.5, 'mmol/L'), DvQuantity(1.1, 'g/L')]
+        series = DvQuantitySeries.from_quantities(values, units='mmol/L', molar_mass=GLUCOSE_MOLAR_MASS)
+        self.assertEqual(len(series), 3)
+        self.assertEqual(series.units, 'mmol/L')
+        self.assertEqual(series.molar_mass, GLUCOSE_MOLAR_MASS)
+        self.assertFalse(hasattr(series, 'convert'))
+        self.assertAlmostEqual(series[0].magnitude, 90 / 18.016, places=6)
+        self.assertAlmostEqual(series[1].magnitude, 5.5)
+        self.assertAlmostEqual(series[2].magnitude, 1100 / 180.16, places=6)
+
+        series.append(DvQuantity(18.016, 'mg/dL'))
+        self.assertAlmostEqual(series[3].magnitude, 1.0)
+
+        with self.assertRaises(ValueError):
+            DvQuantitySeries.from_quantities(values, units='mmol/L')
+        with self.assertRaises(ValueError):
+            series.append(DvQuantity(1.0, 'kg'))
+
+    def test_arithmetic(self):
+        a = DvQuantitySeries('mL', [100, 200, 300])
+        b = DvQuantitySeries('L', [0.1, 0.1, 0.5])
+        total = a + b
+        self.assertEqual(total.units, 'mL')
+        numpy.testing.assert_allclose(total.magnitudes, [200, 300, 800])
+        numpy.testing.assert_allclose((a - b).magnitudes, [0, 100, -200], atol=1e-9)
+        numpy.testing.assert_allclose((a + DvQuantity(1.0, 'L')).magnitudes, [1100, 1200, 1300])
+        numpy.testing.assert_allclose((-a).magnitudes, [-100, -200, -300])
+        self.assertEqual(list(a > DvQuantity(0.15, 'L')), [False, True, True])
+        self.assertEqual(list(a <= b), [True, False, True])
+
+    def test_aggregates(self):
+        series = DvQuantitySeries('kg', [70, 72, 71])
+        self.assertEqual(series.min(), DvQuantity(70.0, 'kg'))
+        self.assertEqual(series.max().magnitude, 72.0)
+        self.assertAlmostEqual(series.mean().magnitude, 71.0)
+        self.assertAlmostEqual(series.to_units('g').max().magnitude, 72000)
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestDvDateColumn(unittest.TestCase):
+    def test_ingest(self):
+        column = DvDateColumn(['2001-01-15', DvDate('1999-12'), datetime.date(2005, 6, 1), '2001-01-15', '2002'])
+        self.assertEqual(5, len(column))
+        self.assertEqual('int32', str(column.ordinals.dtype))
+        self.assertEqual(DvDate('2001-01-15').magnitude, column.ordinals[0])
+        self.assertEqual([DAY_KNOWN | MONTH_KNOWN, MONTH_KNOWN, DAY_KNOWN | MONTH_KNOWN, DAY_KNOWN | MONTH_KNOWN, 0],
+                list(column.precision))
+        self.assertEqual('1999-12', column[1].value)
+        self.assertTrue(column[1].is_partial())
+        self.assertEqual('2002', column[4].value)
+        self.assertEqual(DvDate('2001-01-15'), column[3])
+        self.assertEqual(['2001-01-15', '1999-12', '2005-06-01', '2001-01-15', '2002'], [str(d) for d in column])
+        with self.assertRaises(AttributeError):
+            column.append('2001-02-30')
+        with self.assertRaises(AttributeError):
+            column.append(20010115)
+
+    def test_between(self):
+        column = DvDateColumn(['2001-03-01', '1999-12-31', '2001-01-15', '2000-02-29', '2001-01-15'])
+        self.assertEqual([3, 2, 4], list(column.between('2000-01-01', '2001-01-15')))
+        self.assertEqual([3], list(column.between('2000', '2001-01-15', upper_included=False)))
+        self.assertEqual([0], list(column.between(lower=DvDate('2001-01-15'), lower_included=False)))
+        self.assertEqual([1, 3], list(column.between(upper=datetime.date(2000, 12, 31))))
+        self.assertEqual([], list(column.between('2002', '2001')))
+        column.append('2000-06-01')
+        self.assertEqual([3, 5], list(column.between('2000', '2000-12-31')))
+        subset = column[column.between('2000', '2000-12-31')]
+        self.assertEqual(['2000-02-29', '2000-06-01'], [d.value for d in subset])
+
+    def test_from_ordinals(self):
+        ordinals = [datetime.date(2010, 5, 4).toordinal(), datetime.date(1980, 1, 1).toordinal()]
+        column = DvDateColumn.from_ordinals(ordinals, [MONTH_KNOWN | DAY_KNOWN, 0])
+        self.assertEqual('2010-05-04', column[0].value)
+        self.assertEqual('1980', column[1].value)
+        self.assertEqual([1], list(column.between(upper='1999')))
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestRecurrence(unittest.TestCase):
+    def test_count(self):
+        schedule = recurrence('2001-01-31', DvDuration('P1M'), count=5)
+        self.assertEqual(['2001-01-31', '2001-02-28', '2001-03-31', '2001-04-30', '2001-05-31'],
+                [date.value for date in schedule])
+
+    def test_until(self):
+        start, interval = DvDate('2000-02-29'), DvDuration('P3M')
+        schedule = recurrence(start, interval, until='2005-02-28')
+        self.assertEqual(21, len(schedule))
+        self.assertEqual('2005-02-28', schedule[20].value)
+        self.assertEqual([start.add_calendar(3 * k) for k in range(21)], list(schedule))
+        self.assertEqual(3, len(recurrence(start, interval, count=3, until='2010')))
+        self.assertEqual(0, len(recurrence(start, interval, until='1999')))
+
+    def test_days_and_partial(self):
+        schedule = recurrence(DvDate('2001-12-30'), DvDuration('P1W'), count=3)
+        self.assertEqual(['2001-12-30', '2002-01-06', '2002-01-13'], [str(date) for date in schedule])
+        self.assertEqual(['2001-11', '2002-01'], [str(date) for date in recurrence('2001-11', DvDuration('P2M'), count=2)])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            recurrence('2001-01-01', -DvDuration('P1D'), count=3)
+        with self.assertRaises(ValueError):
+            recurrence('2001-01-01', DvDuration('PT1H'), count=3)
+        with self.assertRaises(ValueError):
+            recurrence('2001-01-01', DvDuration('P1D'))
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestDvQuantityTimeSeries(unittest.TestCase):
+    def setUp(self):
+        self.series = DvQuantityTimeSeries('mm[Hg]', precision=0, capacity=2)
+        self.series.append('2020-01-01T08:00:00Z', DvQuantity(120.0, 'mm[Hg]'))
+        self.series.append(DvDateTime('2020-01-01T09:00:00Z'), DvQuantity(16.0, 'kPa'))
+        self.series.append('2020-01-02T08:00:00+01:00', 130.0)
+        self.series.append(datetime.datetime(2020, 1, 1, 7), 110.0)
+
+    def test_append(self):
+        series = self.series
+        self.assertEqual(4, len(series))
+        self.assertEqual([110.0, 120.0, 130.0], [series.magnitudes[i] for i in (0, 1, 3)])
+        self.assertAlmostEqual(120.01, series.magnitudes[2], places=2)
+        time, quantity = series[0]
+        self.assertEqual(DvDateTime('2020-01-01T07:00:00Z'), time)
+        self.assertEqual('mm[Hg]', quantity.units)
+        self.assertEqual(0, quantity.precision)
+        self.assertEqual(DvDateTime('2020-01-02T07:00:00Z'), series[-1][0])
+        self.assertEqual(numpy.datetime64('2020-01-01T07:00:00'), series.times[0])
+        with self.assertRaises(AttributeError):
+            series.append('yesterday', 100.0)
+        with self.assertRaises(ValueError):
+            series.extend(['2020-01-03'], [])
+
+    def test_ingest(self):
+        series = DvQuantityTimeSeries('/min')
+        start = DvDateTime('2020-01-01T00:00:00Z').magnitude
+        series.ingest(((start + i * 60000000, float(60 + i % 10)) for i in range(10000)), chunk_size=999)
+        self.assertEqual(10000, len(series))
+        self.assertEqual(69.0, series.magnitudes.max())
+
+    def test_window(self):
+        daily = self.series.window(DvDuration('P1D'))
+        self.assertEqual([numpy.datetime64('2020-01-01'), numpy.datetime64('2020-01-02')], list(daily.starts))
+        self.assertEqual([3, 1], list(daily.count))
+        self.assertEqual([110.0, 130.0], list(daily.min))
+        self.assertEqual(130.0, daily.max[1])
+        self.assertAlmostEqual((110 + 120 + 120.0102) / 3, daily.mean[0], places=3)
+        hourly = self.series.window(DvDuration('PT1H'), start='2020-01-01T08:00:00Z', end='2020-01-02')
+        self.assertEqual([1, 1], list(hourly.count))
+        self.assertEqual(0, len(self.series.window(DvDuration('PT1H'), start='2021-01-01').count))
+        with self.assertRaises(ValueError):
+            self.series.window(DvDuration(0))
+
+    def test_between(self):
+        selected = self.series.between('2020-01-01T08:00:00Z', '2020-01-02')
+        self.assertEqual(2, len(selected))
+        self.assertEqual(120.0, selected.magnitudes[0])
+        self.assertEqual('mm[Hg]', selected.units)
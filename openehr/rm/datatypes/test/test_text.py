@@ -1,6 +1,7 @@
-from openehr.rm.support.terminology import TerminologyService
+from openehr.rm.support.terminology import TerminologyService, CodeSetAccess, register_codeset, register_terminology
 from openehr.rm.support.identification import TerminologyID
 from openehr.rm.datatypes.text import DvText, CodePhrase, DvCodedText, TermMapping, DvParagraph
+from openehr.rm.datatypes import text
 import unittest
 
 class TestDvText(unittest.TestCase):
@@ -33,6 +34,94 @@ class TestDvText(unittest.TestCase):
 
         with self.assertRaises(AttributeError):
             DvText("")
+
+        with self.assertRaises(AttributeError):
+            DvText(" \t ")
+
+        with self.assertRaises(AttributeError):
+            DvText(12)
+
+    def test_language_and_encoding_checks_are_cached(self):
+        calls = []
+        class CountingService(TerminologyService):
+            def code_set_for_id(self, id_):
+                calls.append(id_)
+                return TerminologyService.code_set_for_id(self, id_)
+
+        service = CountingService()
+        lang = CodePhrase(TerminologyID("ISO_639-1"), "en")
+        encoding = CodePhrase(TerminologyID("IANA_character-sets"), "UTF-8")
+        for i in range(10):
+            DvText("value %d" % i, language=lang, encoding=encoding, terminology_service=service)
+        self.assertEqual(len(calls), 2)
+
+        bad_lang = CodePhrase(TerminologyID("ISO_639-1"), "xx")
+        for i in range(2):
+            with self.assertRaises(AttributeError):
+                DvText("value", language=bad_lang, terminology_service=service)
+        with self.assertRaises(AttributeError):
+            DvText("value", encoding=CodePhrase("IANA_character-sets", "no-such-set"),
+                    terminology_service=service)
+        self.assertEqual(len(calls), 2)
+
+        # another instance resolves its own code sets
+        DvText("value", language=lang, terminology_service=CountingService())
+        self.assertEqual(len(calls), 4)
+
+        # registering a code set drops what was worked out from the old ones
+        languages = TerminologyService().code_set_for_id(TerminologyService.CODE_SET_ID_LANGUAGES)
+        register_codeset(languages.id(), languages)
+        DvText("value", language=lang, terminology_service=service)
+        self.assertEqual(len(calls), 6)
+
+    def test_checks_follow_the_service_code_sets(self):
+        class Languages(CodeSetAccess):
+            def __init__(self, codes):
+                self.codes = codes
+            def id(self):
+                return 'ISO_639-1'
+            def all_codes(self):
+                return self.codes
+            def has_lang(self, a_lang):
+                return False
+            def has_code(self, a_code):
+                return a_code in self.codes
+
+        class LocalService(TerminologyService):
+            def __init__(self, languages):
+                self.languages = Languages(languages)
+            def code_set_for_id(self, id_):
+                if id_ == TerminologyService.CODE_SET_ID_LANGUAGES:
+                    return self.languages
+                return TerminologyService.code_set_for_id(self, id_)
+
+        en, de = CodePhrase("ISO_639-1", "en"), CodePhrase("ISO_639-1", "de")
+        english, german = LocalService([en]), LocalService([de])
+        DvText("value", language=en, terminology_service=english)
+        with self.assertRaises(AttributeError):
+            DvText("value", language=en, terminology_service=german)
+        DvText("value", language=de, terminology_service=german)
+
+    def test_short_values_are_interned(self):
+        value = ''.join(['inter', 'ned'])
+        self.assertIs(DvText(value).value, DvText('interned').value)
+        long_value = 'x' * (text.INTERN_MAX_LENGTH + 1)
+        self.assertIs(DvText(long_value).value, long_value)
+        with self.assertRaises(AttributeError):
+            DvText('cached\nvalue')
+
+    def test_hash(self):
+        lang = CodePhrase(TerminologyID("ISO_639-1"), "en")
+        t1 = DvText('value', language=lang)
+        t2 = DvText('value', language=CodePhrase("ISO_639-1", "en"))
+        self.assertEqual(hash(t1), hash(t2))
+        self.assertEqual(len(set([t1, t2])), 1)
+        before = hash(t1)
+        t1.value = 'other'
+        self.assertNotEqual(hash(t1), before)
+        self.assertEqual(hash(t1), hash(DvText('other', language=lang)))
+        t1.language = None
+        self.assertEqual(hash(t1), hash(DvText('other')))
 #   
 #   These are tests from tthe java version - I don't unerstand yet what they are testing TODO
 #   def test_create_with_null_encoding(self):
@@ -55,6 +144,24 @@ class TestDvCodedText(unittest.TestCase):
         t2 = DvCodedText(CodePhrase("icd10", "123"), 'some text')
         self.assertEqual(t1, t2)
 
+    def test_from_code(self):
+        coded = DvCodedText.from_code(CodePhrase("openehr", "240"))
+        self.assertEqual(coded.value, 'signed')
+        self.assertEqual(coded.defining_code, CodePhrase("openehr", "240"))
+        other = DvCodedText.from_code(CodePhrase("openehr", "240"), terminology_service=TerminologyService())
+        self.assertIs(coded.value, other.value)
+
+        lang = CodePhrase(TerminologyID("ISO_639-1"), "en")
+        self.assertEqual(DvCodedText.from_code(CodePhrase("openehr", "240"), language=lang).language, lang)
+
+    def test_from_unknown_code(self):
+        with self.assertRaises(AttributeError):
+            DvCodedText.from_code(CodePhrase("openehr", "no such code"))
+        with self.assertRaises(AttributeError):
+            DvCodedText.from_code(CodePhrase("icd10", "123"))
+        with self.assertRaises(AttributeError):
+            DvCodedText.from_code(CodePhrase("openehr", "240"), language=CodePhrase("ISO_639-1", "xx"))
+
 class TermMappingTest(unittest.TestCase):
 
     def testShouldInitializeWithNullPurpose(self):
@@ -67,6 +174,36 @@ class TermMappingTest(unittest.TestCase):
         with self.assertRaises(AttributeError):
             TermMapping(CodePhrase("icd10", "123"), self.match(), self.purpose(), self.DummyTerminologyService(False))
 
+    def testPurposeCheckIsCached(self):
+        calls = []
+        class CountingAccess(self.DummyTerminologyService.DummyTerminologyAccess):
+            def has_code_for_group_id(self, groupId, code):
+                calls.append(code)
+                return True
+        access = CountingAccess(True)
+        class Service(object):
+            def terminology(self, terminologyID):
+                return access
+
+        for i in range(5):
+            TermMapping(CodePhrase("icd10", "123"), self.match(), self.purpose(), Service())
+        self.assertEqual(len(calls), 1)
+
+        # registering a terminology drops the purposes checked before
+        openehr = TerminologyService().terminology(TerminologyService.TERMINOLOGY_ID)
+        register_terminology(TerminologyService.TERMINOLOGY_ID, openehr)
+        TermMapping(CodePhrase("icd10", "123"), self.match(), self.purpose(), Service())
+        self.assertEqual(len(calls), 2)
+
+    def testOpenEHRPurpose(self):
+        service = TerminologyService()
+        purpose = DvCodedText.from_code(service.terminology('openehr').codes_for_group_id(
+                TerminologyService.GROUP_ID_TERM_MAPPING_PURPOSE)[0])
+        for i in range(2):
+            TermMapping(CodePhrase("icd10", "123"), self.match(), purpose, service)
+            with self.assertRaises(AttributeError):
+                TermMapping(CodePhrase("icd10", "123"), self.match(), DvCodedText.from_code(CodePhrase("openehr", "240")), service)
+
     def match(self):
         return '<'
 
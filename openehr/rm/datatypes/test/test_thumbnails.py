@@ -0,0 +1,145 @@
+import hashlib
+import threading
+
+from openehr.rm.datatypes.encapsulated import DvMultimedia
+from openehr.rm.datatypes.text import CodePhrase
+from openehr.rm.datatypes import thumbnails
+from openehr.rm.datatypes.thumbnails import ThumbnailService, register_thumbnail_generator, thumbnail_generator
+
+import unittest
+
+
+def media_type(code):
+    return CodePhrase("IANA_media-types", code)
+
+
+class TestThumbnailService(unittest.TestCase):
+    def setUp(self):
+        self.generators = dict(thumbnails.THUMBNAIL_GENERATORS)
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+        def first_bytes(multimedia):
+            self.release.wait()
+            self.calls.append(multimedia)
+            return DvMultimedia(data=bytes(multimedia.data[:8]), media_type=media_type('image/png'))
+        register_thumbnail_generator('image/*', first_bytes)
+        self.service = ThumbnailService(maxsize=2, max_workers=2)
+
+    def tearDown(self):
+        self.release.set()
+        self.service.shutdown()
+        thumbnails.THUMBNAIL_GENERATORS.clear()
+        thumbnails.THUMBNAIL_GENERATORS.update(self.generators)
+
+    def image(self, data, code='image/jpeg'):
+        return DvMultimedia(data=data, media_type=media_type(code))
+
+    def test_lookup(self):
+        register_thumbnail_generator('image/svg+xml', len)
+        self.assertIs(thumbnail_generator('image/svg+xml'), len)
+        self.assertIsNotNone(thumbnail_generator('image/jpeg'))
+        self.assertIsNone(thumbnail_generator('video/mp4'))
+        self.assertIsNone(thumbnail_generator(None))
+
+    def test_thumbnail(self):
+        image = self.image(b'0123456789' * 100)
+        thumbnail = self.service.thumbnail(image)
+        self.assertEqual(thumbnail.data, b'01234567')
+        self.assertIs(image.thumbnail, thumbnail)
+        # the record is not given an integrity check behind its back
+        self.assertIsNone(image.integrity_check)
+        self.assertIsNone(image.integrity_check_algorithm)
+
+        # Same payload, cached by integrity check
+        copy = self.image(b'0123456789' * 100)
+        self.assertIs(self.service.thumbnail(copy), thumbnail)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.service.info().hits, 1)
+
+        self.assertIsNone(self.service.thumbnail(DvMultimedia(data=b'text', media_type=media_type('text/plain'))))
+
+    def test_bounded(self):
+        for i in range(4):
+            self.service.thumbnail(self.image(bytes([i]) * 100))
+        self.assertEqual(self.service.info().currsize, 2)
+        self.service.thumbnail(self.image(bytes([0]) * 100))
+        self.assertEqual(len(self.calls), 5)
+
+    def test_background(self):
+        self.service = ThumbnailService(maxsize=8, max_workers=2)
+        self.release.clear()
+        images = [self.image(bytes([i]) * 1000) for i in range(5)]
+        self.assertEqual([self.service.peek(image) for image in images], [None] * 5)
+        futures = self.service.prefetch(images)
+        self.release.set()
+        results = [future.result(timeout=5) for future in futures]
+        self.assertEqual([thumbnail.data for thumbnail in results], [bytes([i]) * 8 for i in range(5)])
+        self.assertEqual(len(self.calls), 5)
+        self.assertIs(self.service.peek(images[0]), results[0])
+
+        copy = self.image(bytes([3]) * 1000)
+        copy.compute_integrity_check('SHA-256')
+        self.assertIs(copy.generate_thumbnail(wait=False, service=self.service), results[3])
+        self.assertEqual(self.image(b'x' * 100).generate_thumbnail(service=self.service).data, b'x' * 8)
+
+
+    def test_shared_requests(self):
+        self.service = ThumbnailService(maxsize=8, max_workers=2)
+        self.release.clear()
+        images = [self.image(b'same payload' * 100) for i in range(3)]
+        futures = self.service.prefetch(images) + [self.service.request(images[0])]
+        self.release.set()
+        results = [future.result(timeout=5) for future in futures]
+        self.assertEqual(len(self.calls), 1)
+        self.assertIs(results[3], results[0])
+        self.assertIs(results[1], results[0])
+        self.assertIs(images[2].thumbnail, results[0])
+
+    def test_late_generator(self):
+        video = DvMultimedia(data=b'frames' * 100, media_type=media_type('video/mp4'))
+        self.assertIsNone(self.service.thumbnail(video))
+        register_thumbnail_generator('video/*', lambda multimedia: self.image(b'frame'))
+        self.assertEqual(self.service.thumbnail(video).data, b'frame')
+
+        # the shared service forgets what it made with older generators
+        image = self.image(b'0123456789' * 100)
+        thumbnails.THUMBNAIL_SERVICE.thumbnail(image)
+        self.assertEqual(thumbnails.THUMBNAIL_SERVICE.info().currsize, 1)
+        register_thumbnail_generator('image/png', len)
+        self.assertEqual(thumbnails.THUMBNAIL_SERVICE.info().currsize, 0)
+
+
+    def test_integrity_check_key(self):
+        image = self.image(b'0123456789' * 100)
+        image.integrity_check = hashlib.sha256(b'0123456789' * 100).digest()
+        image.integrity_check_algorithm = CodePhrase("openehr_integrity_check_algorithms", "SHA-256")
+        thumbnail = self.service.thumbnail(image)
+        self.assertIs(self.service.thumbnail(self.image(b'0123456789' * 100)), thumbnail)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_media_type_and_options_in_key(self):
+        sizes = []
+        def sized(multimedia, size=None):
+            sizes.append(size)
+            return DvMultimedia(data=b'%r' % (size,), media_type=media_type('image/png'))
+        register_thumbnail_generator('image/gif', sized)
+        payload = b'0123456789' * 100
+        self.assertEqual(self.service.thumbnail(self.image(payload)).data, b'01234567')
+        self.assertEqual(self.service.thumbnail(self.image(payload, 'image/gif')).data, b'None')
+
+        gif = self.image(payload, 'image/gif')
+        self.assertEqual(self.service.thumbnail(gif, size=(64, 64)).data, b'(64, 64)')
+        self.assertIsNone(gif.thumbnail)
+        self.assertEqual(self.service.thumbnail(gif, size=(64, 64)).data, b'(64, 64)')
+        self.assertEqual(sizes, [None, (64, 64)])
+
+    def test_one_shot_data(self):
+        image = DvMultimedia(data=iter([b'0123', b'456789']), media_type=media_type('image/jpeg'))
+        self.assertEqual(self.service.request(image).result(timeout=5).data, b'01234567')
+        self.assertEqual(image.data, b'0123456789')
+
+
+if __name__ == '__main__':
+    unittest.main()
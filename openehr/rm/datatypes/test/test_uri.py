@@ -1,4 +1,6 @@
-from openehr.rm.datatypes.uri import DvURI, DvEHRURI
+from urllib.parse import urlparse
+
+from openehr.rm.datatypes.uri import DvURI, DvEHRURI, parse_uri
 import unittest
 
 class TestDvURI(unittest.TestCase):
@@ -20,6 +22,20 @@ class TestDvURI(unittest.TestCase):
         self.assertEqual(uri.query(), 'query')
         self.assertEqual(uri.fragments_id(), 'fragment')
 
+    def test_cached(self):
+        uri1 = DvURI("http://www.openehr.org/path?query")
+        uri2 = DvURI("http://www.openehr.org/path?query")
+        self.assertIs(uri1._components, uri2._components)
+        self.assertGreater(parse_uri.cache_info().hits, 0)
+
+        uri = DvURI.from_validated(value="http://www.openehr.org/path?query")
+        self.assertEqual(uri.path(), '/www.openehr.org/path')
+        self.assertEqual(uri.query(), 'query')
+
+        for value in ['', ' ', 'no scheme', 'http://a\nb', None, 42]:
+            with self.assertRaises(AttributeError):
+                DvURI(value)
+
     def test_equal(self):
         uri1 = DvURI("http://www.openehr.org/path1/path2/path3/")
         uri2 = DvURI("http://www.openehr.org/path1/path2/path3/")
@@ -53,3 +69,31 @@ class TestDvEHRURI(unittest.TestCase):
         uri.value = "ehr://www.openehr.org"
         uri.value = DvEHRURI("ehr://www.openehr.org")
         uri.value = DvURI("ehr://www.openehr.org")
+
+    def test_components(self):
+        uri = DvEHRURI("ehr://rmh.nhs.net/347a5490-55ee-4da9-b91a-9bba710f730e/content[at0001]/items")
+        self.assertEqual(uri.system_id(), 'rmh.nhs.net')
+        self.assertEqual(uri.object_id(), '347a5490-55ee-4da9-b91a-9bba710f730e')
+        self.assertEqual(uri.ehr_path(), 'content[at0001]/items')
+
+        # The form written by LocatableRef.as_uri
+        uri = DvEHRURI("ehr://8849182c-82ad-4088-a07f-48ead4180515::rmh.nhs.net::2/data/events[at0002]")
+        self.assertEqual(uri.system_id(), 'rmh.nhs.net')
+        self.assertEqual(uri.object_id(), '8849182c-82ad-4088-a07f-48ead4180515::rmh.nhs.net::2')
+        self.assertEqual(uri.ehr_path(), 'data/events[at0002]')
+
+        uri = DvEHRURI("ehr://www.openehr.org")
+        self.assertEqual(uri.system_id(), 'www.openehr.org')
+        self.assertIsNone(uri.object_id())
+        self.assertIsNone(uri.ehr_path())
+
+    def test_same_as_urlparse(self):
+        for value in ['ehr://www.openehr.org', 'ehr://a/b/c?q=1#f', 'ehr://x::sys::2/content[at0001]/items',
+                'ehr://s/', 'ehr:///x', 'ehr://a#b?c', 'EHR://a/b', 'ehr:relative/path']:
+            parsed = urlparse(value)
+            uri = DvEHRURI(value)
+            self.assertEqual(uri.scheme(), parsed.scheme)
+            self.assertEqual(uri.path(), ('/' + parsed.netloc if parsed.netloc else '') + parsed.path)
+            self.assertEqual(uri.query(), parsed.query)
+            self.assertEqual(uri.fragments_id(), parsed.fragment)
+            self.assertEqual(DvURI(value).path(), uri.path())
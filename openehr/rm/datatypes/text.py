@@ -1,4 +1,6 @@
 # -*- coding: UTF-8 -*-
+import sys
+import weakref
 
 from openehr.rm.datatypes.basic import DataValue
 from openehr.rm.support.terminology import TerminologyService
@@ -10,7 +12,103 @@ from openehr.rm.support.identification import TerminologyID
 
 
 # Implementation is in TerminologyService by spec publishes it from this package
-from openehr.rm.support.terminology import CodePhrase
+from openehr.rm.support.terminology import CodePhrase, OPENEHR_TERMINOLOGY_LANGUAGE, CODE_SET_CACHES, TERMINOLOGY_CACHES
+
+# Validated value strings of up to INTERN_MAX_LENGTH characters, mapped to
+# their interned copy. Short values (rubrics, labels) recur across documents:
+# seen again they skip validation and share one string object.
+INTERN_MAX_LENGTH = 64
+TEXT_VALUE_CACHE_SIZE = 65536
+TEXT_VALUES = {}
+
+
+def _checked_value(value):
+    """ A valid DvText value, interned if it is short """
+    try:
+        return TEXT_VALUES[value]
+    except (KeyError, TypeError):
+        pass
+    if not isinstance(value, str) or not value or value.isspace():
+        raise AttributeError('value attribute must not be None or empty')
+    if '\n' in value or '\r' in value:
+        raise AttributeError('carriage return and line feed characters not allowed in value attribute')
+    if len(value) <= INTERN_MAX_LENGTH and type(value) is str:
+        if len(TEXT_VALUES) >= TEXT_VALUE_CACHE_SIZE:
+            TEXT_VALUES.clear()
+        value = TEXT_VALUES[value] = sys.intern(value)
+    return value
+
+
+# Outcome of checking a DvText language and encoding against code sets:
+# (languages, character sets, language, encoding) -> None when valid, else
+# the error message. TEXT_CODE_SETS holds the (languages, character sets)
+# accessors of each terminology service instance still alive. Both are
+# emptied when a code set is registered.
+TEXT_CODE_CACHE_SIZE = 4096
+TEXT_CODE_CHECKS = {}
+TEXT_CODE_SETS = weakref.WeakKeyDictionary()
+CODE_SET_CACHES.extend((TEXT_CODE_CHECKS, TEXT_CODE_SETS))
+
+
+def _text_code_sets(terminology_service):
+    try:
+        return TEXT_CODE_SETS[terminology_service]
+    except (KeyError, TypeError):
+        pass
+    code_sets = (terminology_service.code_set_for_id(TerminologyService.CODE_SET_ID_LANGUAGES),
+            terminology_service.code_set_for_id(TerminologyService.CODE_SET_ID_CHARACTER_SETS))
+    try:
+        TEXT_CODE_SETS[terminology_service] = code_sets
+    except TypeError:
+        # services which cannot be weakly referenced resolve their code sets every time
+        pass
+    return code_sets
+
+
+def _text_code_error(languages, character_sets, language, encoding):
+    if language is not None and not languages.has_code(language):
+        return 'language must be in the language code set of the terminology service'
+    if encoding is not None and not character_sets.has_code(encoding):
+        return 'encoding must be in the character code set of the terminology service'
+    return None
+
+
+def _check_text_codes(terminology_service, language, encoding):
+    """ Raise AttributeError unless language and encoding are in their code sets """
+    languages, character_sets = _text_code_sets(terminology_service)
+    key = (languages, character_sets, language, encoding)
+    try:
+        error = TEXT_CODE_CHECKS[key]
+    except KeyError:
+        error = _text_code_error(languages, character_sets, language, encoding)
+        if len(TEXT_CODE_CHECKS) >= TEXT_CODE_CACHE_SIZE:
+            TEXT_CODE_CHECKS.clear()
+        TEXT_CODE_CHECKS[key] = error
+    if error is not None:
+        raise AttributeError(error)
+
+
+# Whether a TermMapping purpose is in the term mapping purpose group:
+# (terminology access, defining code) -> bool. Emptied when a terminology
+# is registered.
+TERM_MAPPING_PURPOSES = {}
+TERMINOLOGY_CACHES.append(TERM_MAPPING_PURPOSES)
+
+
+def _valid_purpose(terminology_service, purpose):
+    openehr_terminology = terminology_service.terminology(TerminologyService.TERMINOLOGY_ID)
+    key = (openehr_terminology, purpose.defining_code)
+    try:
+        return TERM_MAPPING_PURPOSES[key]
+    except KeyError:
+        pass
+    valid = openehr_terminology.has_code_for_group_id(TerminologyService.GROUP_ID_TERM_MAPPING_PURPOSE,
+            purpose.defining_code)
+    if len(TERM_MAPPING_PURPOSES) >= TEXT_CODE_CACHE_SIZE:
+        TERM_MAPPING_PURPOSES.clear()
+    TERM_MAPPING_PURPOSES[key] = valid
+    return valid
+
 
 class DvText(DataValue):
     """
@@ -23,7 +121,7 @@ class DvText(DataValue):
     going to make up paragraphs.
 
     """
-    _value = _mappings = _formatting = _hyperlink = _language = _encoding = None
+    __slots__ = ('_value', '_mappings', '_formatting', '_hyperlink', '_language', '_encoding', '_hash')
 
     @property
     def value(self):
@@ -51,11 +149,9 @@ class DvText(DataValue):
 
     @value.setter
     def value(self, value):
-        if value is None or len(value.strip()) == 0:
-            raise AttributeError('value attribute must not be None or empty')
-        if '\n' in value or '\r' in value:
-            raise AttributeError('carriage return and line feed characters not allowed in value attribute')
-        self._value = value
+        self._value = _checked_value(value)
+        if self._hash is not None:
+            self._hash = None
 
     @mappings.setter
     def mappings(self, value):
@@ -76,33 +172,35 @@ class DvText(DataValue):
     @language.setter
     def language (self, value):
         self._language = value
+        if self._hash is not None:
+            self._hash = None
 
     @encoding.setter
     def encoding(self, value):
         self._encoding = value
+        if self._hash is not None:
+            self._hash = None
 
 
     def __init__(self, value, mappings=None, formatting=None, hyperlink=None, language=None, encoding=None, terminology_service=None):
 
+        # Slots start as None, so only the attributes given go through the setters
         self.value=value
-        self.mappings=mappings
-        self.formatting = formatting
-        self.hyperlink = hyperlink
-
-        self.language = language
-        self.encoding = encoding
+        if mappings is not None:
+            self.mappings=mappings
+        if formatting is not None:
+            self.formatting = formatting
+        if hyperlink is not None:
+            self.hyperlink = hyperlink
+
+        if language is not None:
+            self.language = language
+        if encoding is not None:
+            self.encoding = encoding
 
         #TODO we need to remove this consistence when we finish the terminology_service
         if terminology_service is not None:
-            CODE_SET_ID_LANGUAGES = TerminologyService.CODE_SET_ID_LANGUAGES
-            code_set = terminology_service.code_set_for_id(CODE_SET_ID_LANGUAGES)
-            if language is not None and not code_set.has_code(language):
-                raise AttributeError('language must be in the language code set of the terminology service')
-
-            CODE_SET_ID_CHARACTER_SETS = TerminologyService.CODE_SET_ID_CHARACTER_SETS
-            code_set = terminology_service.code_set_for_id(CODE_SET_ID_CHARACTER_SETS)
-            if encoding is not None and not code_set.has_code(encoding):
-                raise AttributeError('encoding must be in the character code set of the terminology service')
+            _check_text_codes(terminology_service, language, encoding)
 
     def __eq__(self, obj):
         if obj is self:
@@ -112,11 +210,14 @@ class DvText(DataValue):
         return False
 
     def __hash__(self):
-        result = 17
-        result += 31 * result + hash(self.value)
-        result += 31 * result + hash(self.encoding)
-        result += 31 * result + hash(self.language)
-        return result
+        """ Computed once, the setters of the fields hashed reset it """
+        if self._hash is None:
+            result = 17
+            result += 31 * result + hash(self.value)
+            result += 31 * result + hash(self.encoding)
+            result += 31 * result + hash(self.language)
+            self._hash = result
+        return self._hash
 
     def __str__(self):
         return self.value
@@ -141,7 +242,7 @@ class DvCodedText(DvText):
     TERM_MAPPING to a CODE_PHRASE.
 
     """
-    _defining_code = None
+    __slots__ = ('_defining_code',)
 
     @property
     def defining_code(self):
@@ -156,6 +257,30 @@ class DvCodedText(DvText):
     def __init__(self, defining_code, value, mappings=None, formatting=None, hyperlink=None, language=None, encoding=None):
         self.defining_code = defining_code
         DvText.__init__(self, value, mappings, formatting, hyperlink, language,encoding)
+
+    @classmethod
+    def from_code(cls, defining_code, language=None, terminology_service=None, **kwargs):
+        """
+            A DvCodedText whose value is the rubric of defining_code in
+            'language' (an ISO_639-1 CodePhrase, the terminology language by
+            default). Finding the rubric is what validates the code: unknown
+            codes raise AttributeError. kwargs are passed on to __init__.
+        """
+        if not isinstance(defining_code, CodePhrase):
+            raise AttributeError('defining_code must be of type CodePhrase [%s]' % defining_code)
+        if terminology_service is None:
+            terminology_service = TerminologyService()
+        try:
+            terminology = terminology_service.terminology(defining_code.terminology_id.value)
+        except ValueError:
+            terminology = None
+        if terminology is None:
+            raise AttributeError('Unknown terminology [%s]' % defining_code.terminology_id)
+        lang = language.code_string if language is not None else OPENEHR_TERMINOLOGY_LANGUAGE
+        rubric = terminology.rubric_for_code(defining_code, lang)
+        if rubric is None:
+            raise AttributeError('No rubric for code [%s] in language %s' % (defining_code, lang))
+        return cls(defining_code, rubric, language=language, **kwargs)
  
 class TermMapping(DataValue):
     """
@@ -170,7 +295,7 @@ class TermMapping(DataValue):
     across nursing vocabularies).
 
     """
-    _target = _match = _purpose = None
+    __slots__ = ('_target', '_match', '_purpose')
 
     @property
     def target(self):
@@ -206,8 +331,7 @@ class TermMapping(DataValue):
         self.target = target
         self.match = match
         if purpose is not None:
-            openehr_terminology = terminologyService.terminology(TerminologyService.TERMINOLOGY_ID)
-            if not openehr_terminology.has_code_for_group_id(TerminologyService.GROUP_ID_TERM_MAPPING_PURPOSE, purpose.defining_code):
+            if not _valid_purpose(terminologyService, purpose):
                 raise AttributeError('Terminology service must have the purpose defining code')
         self.purpose = purpose
 
@@ -236,7 +360,7 @@ class DvParagraph(DataValue):
     ries, reports and so on.
 
     """
-    _items = None
+    __slots__ = ('_items',)
 
     @property
     def items(self):
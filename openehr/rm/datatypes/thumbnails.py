@@ -0,0 +1,207 @@
+# -*- coding: UTF-8 -*-
+"""
+    Deferred thumbnails for DvMultimedia.
+
+    Thumbnails are made from the parent data by generators registered per
+    media type, cached by the media type and digest of the parent (so
+    identical payloads share one thumbnail) and can be produced in a pool of
+    worker threads, so that listing many items never waits for full size
+    decoding.
+
+    A generator is a callable taking the parent DvMultimedia, and any
+    options given with the request (e.g. size=(128, 128)), and returning the
+    thumbnail DvMultimedia, or None if it cannot make one. Options must be
+    hashable as they are part of the cache key.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from openehr.rm.datatypes.media import integrity_hash
+
+#--------------------------------------------------------------
+# Injection Approach
+# media type code string ('image/png'), major type ('image/*') or '*'
+THUMBNAIL_GENERATORS = {}
+def register_thumbnail_generator(media_type, generator):
+    THUMBNAIL_GENERATORS[media_type] = generator
+    THUMBNAIL_SERVICE.clear()
+#--------------------------------------------------------------
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# Upper bound on the number of thumbnails remembered.
+THUMBNAIL_CACHE_SIZE = 512
+
+# Algorithm used to key payloads which have no integrity check
+DEFAULT_INTEGRITY_CHECK_ALGORITHM = 'SHA-256'
+
+
+def thumbnail_generator(media_type):
+    """ The generator registered for a media type code string, or None """
+    if media_type is None:
+        return THUMBNAIL_GENERATORS.get('*')
+    for key in (media_type, media_type.partition('/')[0] + '/*', '*'):
+        generator = THUMBNAIL_GENERATORS.get(key)
+        if generator is not None:
+            return generator
+    return None
+
+
+class ThumbnailService(object):
+    """
+        Generates thumbnails on demand, remembering the last maxsize of
+        them. Background work runs on a ThreadPoolExecutor of max_workers
+        threads, created when first needed. Payloads no generator could make
+        a thumbnail of are not remembered, so they are tried again later.
+    """
+
+    def __init__(self, maxsize=THUMBNAIL_CACHE_SIZE, max_workers=4):
+        self.maxsize = maxsize
+        self.max_workers = max_workers
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.hits = self.misses = 0
+
+    def _key(self, multimedia, options):
+        """
+            (media type, algorithm, digest, options) of a request. The digest
+            is the integrity check if there is one, otherwise the data is
+            hashed here, leaving the record untouched.
+        """
+        media_type = multimedia.media_type.code_string if multimedia.media_type is not None else None
+        if multimedia.integrity_check is not None and multimedia.integrity_check_algorithm is not None:
+            algorithm, digest = multimedia.integrity_check_algorithm.code_string, multimedia.integrity_check
+        else:
+            algorithm = DEFAULT_INTEGRITY_CHECK_ALGORITHM
+            source = multimedia.source
+            if source is not None and not source.repeatable:
+                # keep one-shot data readable by the generator
+                multimedia.data
+            digest = integrity_hash(algorithm)
+            for chunk in multimedia.chunks():
+                digest.update(chunk)
+            digest = digest.digest()
+        return (media_type, algorithm, digest, tuple(sorted(options.items())))
+
+    def _cached(self, key):
+        with self._lock:
+            try:
+                thumbnail = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return thumbnail
+
+    def _remember(self, key, thumbnail):
+        with self._lock:
+            self._cache[key] = thumbnail
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def _assign(self, multimedia, thumbnail, options):
+        """ Plain thumbnails (no options) are also assigned to multimedia.thumbnail """
+        if thumbnail is not None and not options and multimedia.thumbnail is None:
+            multimedia.thumbnail = thumbnail
+        return thumbnail
+
+    def _make(self, multimedia, key, options):
+        try:
+            return self._cached(key)
+        except KeyError:
+            pass
+        generator = thumbnail_generator(key[0])
+        thumbnail = generator(multimedia, **options) if generator is not None else None
+        if thumbnail is not None:
+            self._remember(key, thumbnail)
+        return thumbnail
+
+    def thumbnail(self, multimedia, **options):
+        """
+            The thumbnail of 'multimedia', generated now if it is not cached.
+            Without options it is also assigned to multimedia.thumbnail.
+            Returns None if no generator can make one.
+        """
+        if multimedia.thumbnail is not None and not options:
+            return multimedia.thumbnail
+        thumbnail = self._make(multimedia, self._key(multimedia, options), options)
+        return self._assign(multimedia, thumbnail, options)
+
+    def request(self, multimedia, **options):
+        """
+            A Future of thumbnail(multimedia, **options), computed in the
+            worker pool, where the data is hashed too. Requests for the same
+            payload, media type and options while one is being generated
+            share that generation.
+        """
+        if multimedia.thumbnail is not None and not options:
+            future = Future()
+            future.set_result(multimedia.thumbnail)
+            return future
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='thumbnail')
+            return self._executor.submit(self._generate, multimedia, options)
+
+    def _generate(self, multimedia, options):
+        key = self._key(multimedia, options)
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+        if not owner:
+            # generating in another worker, which is already running
+            return self._assign(multimedia, pending.result(), options)
+        try:
+            thumbnail = self._make(multimedia, key, options)
+        except BaseException as error:
+            pending.set_exception(error)
+            raise
+        else:
+            pending.set_result(thumbnail)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        return self._assign(multimedia, thumbnail, options)
+
+    def peek(self, multimedia, **options):
+        """
+            The thumbnail if it is already known, otherwise None after
+            requesting it in the background. Never waits: data without an
+            integrity check is only hashed in the worker pool.
+        """
+        if multimedia.thumbnail is not None and not options:
+            return multimedia.thumbnail
+        if multimedia.integrity_check is not None and multimedia.integrity_check_algorithm is not None:
+            try:
+                return self._assign(multimedia, self._cached(self._key(multimedia, options)), options)
+            except KeyError:
+                pass
+        self.request(multimedia, **options)
+        return None
+
+    def prefetch(self, items, **options):
+        """ Request the thumbnails of many items, returning their futures """
+        return [self.request(multimedia, **options) for multimedia in items]
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait)
+            self._executor = None
+
+
+THUMBNAIL_SERVICE = ThumbnailService()
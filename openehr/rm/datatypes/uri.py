@@ -1,15 +1,80 @@
 # -*- coding: UTF-8 -*-
-import re
+from collections import namedtuple
+from functools import lru_cache
 from urllib.parse import urlparse
 
+import re
+
 from openehr.rm.datatypes.basic import DataValue
 
 re_uri = r"[a-zA-z0-9+.-]+:" # scheme
 re_uri += r"\S*$" # non space (should be pickier)
 re_uri = re.compile(re_uri).match
 
+# Upper bound on the number of distinct URI strings remembered.
+URI_CACHE_SIZE = 4096
+
+# path is the DvURI.path() form: '/' + netloc + path
+UriComponents = namedtuple('UriComponents', ['scheme', 'path', 'query', 'fragment'])
+EhrUriComponents = namedtuple('EhrUriComponents', UriComponents._fields + ('system_id', 'object_id', 'ehr_path'))
+
+
+def _split_ehr_uri(value):
+    """
+        Split 'ehr://authority/path?query#fragment' the way urlparse does
+        for a scheme without parameters. The authority is either a system
+        id followed by the object id in the path (ehr://system/object/path),
+        or an object version id 'uid::system::version' as written by
+        LocatableRef.as_uri (ehr://uid::system::version/path).
+    """
+    rest, _, fragment = value[6:].partition('#')
+    rest, _, query = rest.partition('?')
+    netloc, slash, path = rest.partition('/')
+    if '::' in netloc:
+        system_id, object_id, ehr_path = netloc.split('::')[1], netloc, path
+    else:
+        object_id, _, ehr_path = path.partition('/')
+        system_id = netloc
+    return EhrUriComponents('ehr', ('/' + netloc if netloc else '') + slash + path, query, fragment,
+            system_id or None, object_id or None, ehr_path or None)
+
+
+@lru_cache(maxsize=URI_CACHE_SIZE)
+def parse_uri(value):
+    """
+        Validate a URI string and split it into UriComponents. Results are
+        cached per string; ehr:// URIs are split without urlparse and give
+        EhrUriComponents.
+    """
+    if len(value.strip()) == 0:
+        raise AttributeError('value attribute must not be None or empty')
+    if '\n' in value or '\r' in value:
+        raise AttributeError('carriage return and line feed characters not allowed in value attribute')
+    if not re_uri(value):
+        raise AttributeError('invalid uri [%s]' % value)
+    if value[:6].lower() == 'ehr://':
+        return _split_ehr_uri(value)
+    parsed = urlparse(value)
+    path = ('/' + parsed.netloc if parsed.netloc else '') + parsed.path
+    return UriComponents(parsed.scheme, path, parsed.query, parsed.fragment)
+
+
+@lru_cache(maxsize=URI_CACHE_SIZE)
+def parse_ehr_uri(value):
+    """ parse_uri() for DvEHRURI: the scheme must be ehr """
+    components = parse_uri(value)
+    if components.scheme != 'ehr':
+        raise AttributeError('Invalid scheme [%s], must be ehr' % components.scheme)
+    if not isinstance(components, EhrUriComponents):
+        components = EhrUriComponents(*components, system_id=None, object_id=None, ehr_path=None)
+    return components
+
+
 class DvURI(DataValue):
-    _uri_parsed = _value = None
+    __slots__ = ('_value', '_components')
+
+    # Validates and splits a value, see parse_uri
+    _parse = staticmethod(parse_uri)
 
     @property
     def value(self):
@@ -19,39 +84,35 @@ class DvURI(DataValue):
     def value(self, value):
         if isinstance(value, DvURI):
             value = value.value
-        if value is None or type(value) != str or len(value.strip()) == 0:
+        if value is None or type(value) != str:
             raise AttributeError('value attribute must not be None or empty')
-        if '\n' in value or '\r' in value:
-            raise AttributeError('carriage return and line feed characters not allowed in value attribute')
-        if not re_uri(value):
-            raise AttributeError('invalid uri [%s]' % value)
+        self._components = self._parse(value)
         self._value = value
-        self._uri_parsed = urlparse(value)
-
 
     def __init__(self, value):
         self.value = value
 
+    def _split(self):
+        """ Components of the value, split on demand for from_validated instances """
+        if self._components is None:
+            self._components = self._parse(self._value)
+        return self._components
+
     def scheme(self):
-        return self._uri_parsed.scheme
+        return self._split().scheme
 
     def path(self):
         """
             Not happy with this - seems to lose diffefence between relative and absolute paths.
             What should be done with parameters
         """
-        rv = []
-        if self._uri_parsed.netloc:
-            rv.append('/' + self._uri_parsed.netloc)
-        if self._uri_parsed.path:
-            rv.append( self._uri_parsed.path)
-        return ''.join(rv)
+        return self._split().path
 
     def fragments_id(self):
-        return self._uri_parsed.fragment
+        return self._split().fragment
 
     def query(self):
-        return self._uri_parsed.query
+        return self._split().query
 
     def __eq__(self, other):
         if isinstance(other, DvURI):
@@ -64,36 +125,24 @@ class DvURI(DataValue):
 class DvEHRURI(DvURI):
     """
     A DvEHRURI is a DvURI which has the scheme name ehr.
-
-    TODO: how to call baseclass getter/setter
     """
-    def __init__(self, value):
-        self.value = value
-
-    @property
-    def value(self):
-        return self._value
-
-    @value.setter
-    def value(self, value):
-        if isinstance(value, DvURI):
-            value = value.value
-        if value is None or type(value) != str or len(value.strip()) == 0:
-            raise AttributeError('value attribute must not be None or empty')
-        if '\n' in value or '\r' in value:
-            raise AttributeError('carriage return and line feed characters not allowed in value attribute')
-        if not re_uri(value):
-            raise AttributeError('invalid uri [%s]' % value)
-        self._value = value
-        self._uri_parsed = urlparse(value)
+    __slots__ = ()
 
-        if not self.scheme_is_ehr():
-            raise AttributeError('Invalid scheme [%s], must be ehr' % self.scheme())
+    _parse = staticmethod(parse_ehr_uri)
 
     def scheme_is_ehr(self):
         """ Never going to be false due to validator """
         return self.scheme() == 'ehr'
 
+    def system_id(self):
+        return self._split().system_id
+
+    def object_id(self):
+        return self._split().object_id
+
+    def ehr_path(self):
+        """ Path of the item within the referenced object, None for the object itself """
+        return self._split().ehr_path
+
     def __repr__(self):
         return 'DvEHRURI(%s)' % self._value
-
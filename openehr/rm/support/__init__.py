@@ -244,6 +244,8 @@ class Interval(object):
 
 
 class TimeDefinitions(object):
+    __slots__ = ()
+
 
     SECONDS_IN_MINUTES = 60;
     MINUTES_IN_HOUR = 60;
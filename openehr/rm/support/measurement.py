@@ -5,16 +5,111 @@
 
     Don't see any services implemented in oship. Class does not seem to 
     be implemented in the java lib at all.
+
+    Answers are memoised per units string (which services accept it) and,
+    for services that publish a property_id(units) method, units are
+    indexed by the measured property so equivalence checks are a dictionary
+    lookup. Registering a new service discards everything learnt so far.
 """
 
+from collections import OrderedDict, namedtuple
+
 #--------------------------------------------------------------
 # Injection Approach
 MEASUREMENT_INFO_SERVICES = []
 def register_measurement_info_service(s):
     if s not in MEASUREMENT_INFO_SERVICES:
         MEASUREMENT_INFO_SERVICES.append(s)
+        MEASUREMENT_CACHE.clear()
 #--------------------------------------------------------------
 
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# Upper bound on the number of distinct units strings remembered.
+MEASUREMENT_CACHE_SIZE = 1024
+
+
+class MeasurementCache(object):
+    """
+        Bounded memo of the answers given by the registered services.
+
+        _services maps a units string to the tuple of indexes (into
+        MEASUREMENT_INFO_SERVICES) of the services accepting it.
+        _properties is the equivalence class index: (service index, units)
+        to the canonical property id for services which can provide one.
+        _equivalent holds pairwise answers from services which cannot.
+        Each memo evicts its least recently used entry beyond maxsize.
+    """
+    def __init__(self, maxsize=MEASUREMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.clear()
+
+    def clear(self):
+        self._services = OrderedDict()
+        self._properties = OrderedDict()
+        self._equivalent = OrderedDict()
+        self.hits = self.misses = 0
+
+    def _remember(self, memo, key, value):
+        memo[key] = value
+        if len(memo) > self.maxsize:
+            memo.popitem(last=False)
+
+    def services_for(self, units):
+        """ Indexes of the services accepting 'units', oldest first. """
+        try:
+            indexes = self._services[units]
+        except KeyError:
+            self.misses += 1
+            indexes = tuple(i for i, service in enumerate(MEASUREMENT_INFO_SERVICES)
+                    if service.is_valid_units_string(units))
+            self._remember(self._services, units, indexes)
+            return indexes
+        self.hits += 1
+        self._services.move_to_end(units)
+        return indexes
+
+    def property_for(self, index, units):
+        """ Canonical property id of 'units' according to service 'index'. """
+        key = (index, units)
+        try:
+            property_id = self._properties[key]
+        except KeyError:
+            self.misses += 1
+            property_id = MEASUREMENT_INFO_SERVICES[index].property_id(units)
+            self._remember(self._properties, key, property_id)
+            return property_id
+        self.hits += 1
+        self._properties.move_to_end(key)
+        return property_id
+
+    def equivalent(self, index, units1, units2):
+        """ Pairwise answer for services without a property_id method. """
+        key = (index, units1, units2)
+        try:
+            result = self._equivalent[key]
+        except KeyError:
+            self.misses += 1
+            result = MEASUREMENT_INFO_SERVICES[index].units_equivalent(units1, units2)
+            self._remember(self._equivalent, key, result)
+            return result
+        self.hits += 1
+        self._equivalent.move_to_end(key)
+        return result
+
+    def info(self):
+        currsize = len(self._services) + len(self._properties) + len(self._equivalent)
+        return CacheInfo(self.hits, self.misses, self.maxsize, currsize)
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
+
+MEASUREMENT_CACHE = MeasurementCache()
+
+
 class MeasurementService(object):
     """Defines an object providing proxy access to a measurement
     information service."""
@@ -26,10 +121,7 @@ class MeasurementService(object):
         if type(units) != str or not units.strip():
             raise AttributeError('Invalid value for units: %s' % units)
 
-        for service in MEASUREMENT_INFO_SERVICES:
-            if service.is_valid_units_string(units):
-                return True
-        return False
+        return len(MEASUREMENT_CACHE.services_for(units)) > 0
 
 
     def units_equivalent(self, units1, units2):
@@ -40,10 +132,78 @@ class MeasurementService(object):
         if type(units2) != str or not units2.strip():
             raise AttributeError('Invalid value for units2: %s' % units2)
 
-        for service in MEASUREMENT_INFO_SERVICES:
-            units1_valid = service.is_valid_units_string(units1)
-            units2_valid = service.is_valid_units_string(units2)
-            if units1_valid and units2_valid:
-                return service.units_equivalent(units1, units2)
+        # The first service accepting both units strings answers the question
+        services2 = MEASUREMENT_CACHE.services_for(units2)
+        for index in MEASUREMENT_CACHE.services_for(units1):
+            if index in services2:
+                if hasattr(MEASUREMENT_INFO_SERVICES[index], 'property_id'):
+                    return (MEASUREMENT_CACHE.property_for(index, units1) ==
+                            MEASUREMENT_CACHE.property_for(index, units2))
+                return MEASUREMENT_CACHE.equivalent(index, units1, units2)
         return False
 
+    def conversion(self, from_units, to_units, molar_mass=None):
+        """ Return (scale, shift) converting magnitudes in from_units into
+        to_units, from the first service accepting both which can convert.
+        """
+        services2 = MEASUREMENT_CACHE.services_for(to_units)
+        for index in MEASUREMENT_CACHE.services_for(from_units):
+            service = MEASUREMENT_INFO_SERVICES[index]
+            if index in services2 and hasattr(service, 'conversion'):
+                return service.conversion(from_units, to_units, molar_mass)
+        raise ValueError('No service can convert [%s] to [%s]' % (from_units, to_units))
+
+    def convert(self, magnitude, from_units, to_units, molar_mass=None):
+        """ Convert 'magnitude' from one units string to an equivalent one.
+        """
+        scale, shift = self.conversion(from_units, to_units, molar_mass)
+        return magnitude * scale + shift
+
+    def cache_info(self):
+        """ Hits, misses and size of the shared measurement cache. """
+        return MEASUREMENT_CACHE.info()
+
+    def cache_hit_rate(self):
+        return MEASUREMENT_CACHE.hit_rate()
+
+    def cache_clear(self):
+        MEASUREMENT_CACHE.clear()
+
+
+class UnitConverter(object):
+    """
+        Converts magnitudes in equivalent units into one units string,
+        asking the measurement service once per units string. Magnitudes may
+        be numbers or numpy arrays.
+
+        molar_mass (g/mol) allows conversions between mass and substance
+        amounts of one analyte (e.g. mg/dL and mmol/L glucose).
+    """
+
+    def __init__(self, units, molar_mass=None):
+        if type(units) != str or not units.strip():
+            raise AttributeError('units attribute must be a String')
+        self.units = units
+        self.molar_mass = molar_mass
+        self._conversions = {units: (1, 0)}
+
+    def conversion(self, units):
+        """ (scale, shift) converting magnitudes in 'units' into ours """
+        try:
+            return self._conversions[units]
+        except KeyError:
+            conversion = MeasurementService().conversion(units, self.units, self.molar_mass)
+            self._conversions[units] = conversion
+            return conversion
+
+    def convert(self, magnitudes, units):
+        scale, shift = self.conversion(units)
+        if scale == 1 and shift == 0:
+            return magnitudes
+        return magnitudes * scale + shift
+
+
+# For now register the built-in UCUM service here, as the terminology
+# service is bootstrapped on import.
+from openehr.rm.support.ucum import UcumService
+register_measurement_info_service(UcumService())
@@ -26,6 +26,11 @@ except:
 AVAILABLE_CODE_SET={}
 AVAILABLE_TERMINOLOGY={}
 
+# Caches of lookups in the registered code sets and terminologies (dicts or
+# anything with clear()), emptied whenever one of them is registered.
+CODE_SET_CACHES=[]
+TERMINOLOGY_CACHES=[]
+
 def register_codeset(name, accessor):
     if not isinstance(accessor, CodeSetAccess):
         raise ValueError("Accessor does not implement CodeSetAccess interface.")
@@ -33,6 +38,8 @@ def register_codeset(name, accessor):
         raise ValueError('The value is not valid Code Set identifier.')
     name = name.strip()
     AVAILABLE_CODE_SET[name] = accessor
+    for cache in CODE_SET_CACHES:
+        cache.clear()
 
 def register_terminology(name, accessor):
     if not isinstance(accessor, TerminologyAccess):
@@ -41,6 +48,8 @@ def register_terminology(name, accessor):
         raise ValueError('The value is not valid Terminology identifier. [%s]' % name)
     name = name.strip()
     AVAILABLE_TERMINOLOGY[name] = accessor
+    for cache in TERMINOLOGY_CACHES:
+        cache.clear()
 
 class CodeSetAccess(metaclass=ABCMeta):
     """
@@ -109,8 +118,17 @@ class OpenEHRCodeSetIdentifiers(object):
         Boolean Validity function to test if an identifier is in
         the tuple defined by class OpenehrCodeSetIdentifiers.
         """
-        code_sets = ( member_value for member_name,member_value in getmembers(self) if member_name.startswith('CODE_SET_ID_'))
-        return an_id in code_sets
+        return an_id in self.code_set_ids()
+
+    @classmethod
+    def code_set_ids(cls):
+        """ The values of the CODE_SET_ID_ constants, collected once per class """
+        ids = cls.__dict__.get('_code_set_ids')
+        if ids is None:
+            ids = frozenset(member_value for member_name, member_value in getmembers(cls)
+                    if member_name.startswith('CODE_SET_ID_'))
+            cls._code_set_ids = ids
+        return ids
 
 
 class OpenEHRTerminologyGroupIdentifiers(object):
@@ -360,9 +378,17 @@ class CodePhrase(object):
         minology service (as distinct from a particular terminology).
 
         This is a rm.datatype - I am concerned about the cross package dependencies.
+
+        Instances are immutable: terminology_id and code_string are set once,
+        by __init__, as CodePhrases are hashed and used as dictionary keys.
     """
     _terminology_id = _code_string = None
 
+    def _set_once(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError('CodePhrase is immutable, %s cannot be changed' % name.lstrip('_'))
+        self.__dict__[name] = value
+
     @property
     def terminology_id(self):
         return self._terminology_id
@@ -377,13 +403,13 @@ class CodePhrase(object):
             value = TerminologyID(value)
         if not isinstance(value, TerminologyID):
             raise AttributeError('terminology_id must be of type TerminologyID [%s]' % value)
-        self._terminology_id = value
+        self._set_once('_terminology_id', value)
 
     @code_string.setter
     def code_string(self, value):
         if value is not None and (not isinstance(value, str) or len(value) == 0):
             raise AttributeError('code_string must not be empty')
-        self._code_string = value
+        self._set_once('_code_string', value)
 
     def __init__(self,terminology_id, code_string):
         self.terminology_id = terminology_id
@@ -397,6 +423,9 @@ class CodePhrase(object):
             return other.terminology_id == self.terminology_id and other.code_string == self.code_string
         return False
 
+    def __hash__(self):
+        return hash((self._terminology_id, self._code_string))
+
 
 class TerminologyService(TerminologyServiceMixIn, CodeSetServiceMixIn):
     @classmethod
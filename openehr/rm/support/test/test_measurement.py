@@ -26,8 +26,8 @@ From oship...
 """
 
 
-from openehr.rm.support.measurement import MeasurementService, \
-    register_measurement_info_service
+from openehr.rm.support.measurement import MeasurementService, MeasurementCache, \
+    register_measurement_info_service, MEASUREMENT_INFO_SERVICES
 
 import unittest
 
@@ -107,3 +107,57 @@ class TestVersionID(unittest.TestCase):
             ms.units_equivalent('centigram', '')
         with self.assertRaises(AttributeError):
             ms.units_equivalent(None, 'centigram')
+
+    def test_cache(self):
+        ms = MeasurementService()
+
+        class PropertyService:
+            calls = 0
+            units = {'millilitre': 'volume', 'litre': 'volume', 'milligram': 'mass'}
+            def is_valid_units_string(self, unit):
+                PropertyService.calls += 1
+                return unit in self.units
+            def units_equivalent(self, units1, units2):
+                return self.property_id(units1) == self.property_id(units2)
+            def property_id(self, unit):
+                return self.units[unit]
+
+        register_measurement_info_service(PropertyService())
+        self.assertEqual(ms.cache_info().hits, 0)
+
+        self.assertTrue(ms.units_equivalent('millilitre', 'litre'))
+        self.assertFalse(ms.units_equivalent('millilitre', 'milligram'))
+        calls = PropertyService.calls
+        misses = ms.cache_info().misses
+        for i in range(10):
+            self.assertTrue(ms.units_equivalent('millilitre', 'litre'))
+            self.assertTrue(ms.is_valid_units_string('milligram'))
+        self.assertEqual(PropertyService.calls, calls)
+        self.assertEqual(ms.cache_info().misses, misses)
+        self.assertTrue(ms.cache_hit_rate() > 0.8)
+
+        ms.cache_clear()
+        self.assertEqual(ms.cache_info().currsize, 0)
+
+    def test_cache_eviction(self):
+        class CountingService:
+            calls = 0
+            def is_valid_units_string(self, unit):
+                return False
+            def property_id(self, unit):
+                CountingService.calls += 1
+                return unit
+        register_measurement_info_service(CountingService())
+        index = len(MEASUREMENT_INFO_SERVICES) - 1
+        cache = MeasurementCache(maxsize=2)
+
+        cache.property_for(index, 'm')
+        cache.property_for(index, 'g')
+        cache.property_for(index, 'm')
+        cache.property_for(index, 's')
+        self.assertEqual(cache.info().currsize, 2)
+        calls = CountingService.calls
+        self.assertEqual(cache.property_for(index, 'm'), 'm')
+        self.assertEqual(CountingService.calls, calls)
+        cache.property_for(index, 'g')
+        self.assertEqual(CountingService.calls, calls + 1)
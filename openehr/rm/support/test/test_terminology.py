@@ -121,3 +121,12 @@ class TestCodePhrase(unittest.TestCase):
 
         with self.assertRaises(AttributeError):
             t2 = terminology.CodePhrase(None, "english")
+
+    def test_immutable(self):
+        t1 = terminology.CodePhrase('ISO_639-1', "en")
+        codes = {t1: 'english'}
+        with self.assertRaises(AttributeError):
+            t1.code_string = "de"
+        with self.assertRaises(AttributeError):
+            t1.terminology_id = 'ISO_639-2'
+        self.assertEqual(codes[terminology.CodePhrase('ISO_639-1', "en")], 'english')
@@ -0,0 +1,84 @@
+from openehr.rm.support.ucum import UcumService, UcumParseError, parse_units
+from openehr.rm.support.measurement import MeasurementService, UnitConverter
+from openehr.rm.datatypes.quantity import DvQuantity
+
+import unittest
+
+class TestUcum(unittest.TestCase):
+    def test_valid_units(self):
+        service = UcumService()
+        for units in ['m', 'mg/dL', 'mmol/L', '10*9/L', 'kg/m2', '/min', 'mm[Hg]',
+                '%', '[lb_av]', 'Cel', '{beats}/min', 'kg.m/s2', 'ug/(kg.h)', 'm-1', '1']:
+            self.assertTrue(service.is_valid_units_string(units), units)
+        for units in ['meter', 'gram', 'kg/', '(m', 'm[Hg', 'k m', 'Cel/s', 'mCel']:
+            self.assertFalse(service.is_valid_units_string(units), units)
+        with self.assertRaises(UcumParseError):
+            parse_units('xyz')
+
+    def test_dimensions(self):
+        self.assertEqual(parse_units('N').dimension, parse_units('kg.m.s-2').dimension)
+        self.assertEqual(parse_units('kPa'), parse_units('kPa'))
+        service = UcumService()
+        self.assertTrue(service.units_equivalent('mL', 'dm3'))
+        self.assertTrue(service.units_equivalent('mm[Hg]', 'kPa'))
+        self.assertTrue(service.units_equivalent('/min', 'Hz'))
+        self.assertFalse(service.units_equivalent('mg/dL', 'mmol/L'))
+        self.assertFalse(service.units_equivalent('kg', 'm'))
+
+    def test_convert(self):
+        service = UcumService()
+        self.assertAlmostEqual(service.convert(1, '[lb_av]', 'kg'), 0.45359237)
+        self.assertAlmostEqual(service.convert(1.5, 'L', 'mL'), 1500)
+        self.assertAlmostEqual(service.convert(100, 'mg/dL', 'g/L'), 1)
+        self.assertAlmostEqual(service.convert(37, 'Cel', '[degF]'), 98.6)
+        self.assertAlmostEqual(service.convert(0, 'Cel', 'K'), 273.15)
+        with self.assertRaises(ValueError):
+            service.convert(1, 'kg', 'm')
+
+    def test_registered(self):
+        ms = MeasurementService()
+        self.assertTrue(ms.is_valid_units_string('mmol/L'))
+        self.assertTrue(ms.units_equivalent('kg', '[lb_av]'))
+        self.assertAlmostEqual(ms.convert(2, 'h', 'min'), 120)
+
+        q = DvQuantity(1.5, 'L', precision=1).to_units('mL')
+        self.assertEqual(q.units, 'mL')
+        self.assertAlmostEqual(q.magnitude, 1500)
+        with self.assertRaises(ValueError):
+            DvQuantity(1.5, 'L').to_units('kg')
+
+    def test_unit_converter(self):
+        converter = UnitConverter('mL')
+        self.assertAlmostEqual(converter.convert(1.5, 'L'), 1500)
+        self.assertEqual(converter.conversion('mL'), (1, 0))
+        self.assertIs(converter.conversion('L'), converter.conversion('L'))
+        with self.assertRaises(ValueError):
+            converter.convert(1, 'kg')
+        with self.assertRaises(AttributeError):
+            UnitConverter(' ')
+
+    def test_to_units_precision(self):
+        self.assertEqual(DvQuantity(1.0, 'g', precision=0).to_units('kg').precision, 3)
+        self.assertEqual(DvQuantity(1.5, 'L', precision=1).to_units('mL').precision, 0)
+        self.assertEqual(DvQuantity(1.5, 'L', precision=2).to_units('dL').precision, 1)
+        self.assertIsNone(DvQuantity(1.5, 'L').to_units('mL').precision)
+
+    def test_to_units_accuracy(self):
+        q = DvQuantity(1.5, 'L', accuracy=0.1, accuracy_is_percent=False).to_units('mL')
+        self.assertAlmostEqual(q.accuracy, 100)
+        self.assertFalse(q.accuracy_is_percent)
+
+        q = DvQuantity(1.5, 'L', accuracy=5.0, accuracy_is_percent=True).to_units('mL')
+        self.assertAlmostEqual(q.accuracy, 5.0)
+        self.assertTrue(q.accuracy_is_percent)
+
+        q = DvQuantity(1.5, 'L').to_units('mL')
+        self.assertTrue(q.accuracy_unknown)
+
+        q = DvQuantity(20.0, 'Cel', accuracy=5.0, accuracy_is_percent=True).to_units('K')
+        self.assertAlmostEqual(q.accuracy, 1.0)
+        self.assertFalse(q.accuracy_is_percent)
+
+        q = DvQuantity(1.5, 'L')
+        q.magnitude_status = '<'
+        self.assertEqual(q.to_units('mL').magnitude_status, '<')
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Local implementation of a measurement information service for the
+    Unified Code for Units of Measure (UCUM, http://unitsofmeasure.org).
+
+    A units string is parsed into a scale factor relative to the UCUM base
+    units and a dimension vector over those base units. Two units strings
+    measure the same property when their dimension vectors are equal, and a
+    magnitude is converted by the ratio of their factors.
+
+    Only the case sensitive UCUM syntax is supported and the atom table
+    covers the SI, clinical and common customary units rather than the full
+    UCUM essence. Special units (Cel, [degF]) may only be used on their own.
+"""
+
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+
+class UcumParseError(ValueError):
+    """Raised when a units string is not valid UCUM"""
+
+
+# Dimension vector positions: the seven UCUM base units plus one slot for
+# arbitrary units ([iU]) which are only commensurable with themselves.
+BASE_UNITS = ('m', 's', 'g', 'rad', 'K', 'C', 'cd', '[iU]')
+DIMENSIONLESS = (0,) * len(BASE_UNITS)
+
+UcumUnit = namedtuple('UcumUnit', ['factor', 'dimension', 'offset'])
+
+PREFIXES = {
+    'Y': 1e24, 'Z': 1e21, 'E': 1e18, 'P': 1e15, 'T': 1e12, 'G': 1e9,
+    'M': 1e6, 'k': 1e3, 'h': 1e2, 'da': 1e1, 'd': 1e-1, 'c': 1e-2,
+    'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12, 'f': 1e-15, 'a': 1e-18,
+    'z': 1e-21, 'y': 1e-24,
+}
+
+# symbol: (value, definition, metric). The unit is value times the unit
+# expression in definition.
+ATOMS = {
+    # Dimensionless
+    '10*': (10, '1', False),
+    '10^': (10, '1', False),
+    '[pi]': (math.pi, '1', False),
+    '%': (1e-2, '1', False),
+    '[ppth]': (1e-3, '1', False),
+    '[ppm]': (1e-6, '1', False),
+    'mol': (6.0221367e23, '1', True),
+    'eq': (1, 'mol', True),
+    'osm': (1, 'mol', True),
+    'sr': (1, 'rad2', True),
+    'deg': (math.pi / 180, 'rad', False),
+    # SI derived
+    'Hz': (1, 's-1', True),
+    'N': (1, 'kg.m/s2', True),
+    'Pa': (1, 'N/m2', True),
+    'J': (1, 'N.m', True),
+    'W': (1, 'J/s', True),
+    'A': (1, 'C/s', True),
+    'V': (1, 'J/C', True),
+    'F': (1, 'C/V', True),
+    'Ohm': (1, 'V/A', True),
+    'S': (1, 'Ohm-1', True),
+    'Wb': (1, 'V.s', True),
+    'T': (1, 'Wb/m2', True),
+    'H': (1, 'Wb/A', True),
+    'lm': (1, 'cd.sr', True),
+    'lx': (1, 'lm/m2', True),
+    'Bq': (1, 's-1', True),
+    'Gy': (1, 'J/kg', True),
+    'Sv': (1, 'J/kg', True),
+    'kat': (1, 'mol/s', True),
+    'U': (1, 'umol/min', True),
+    # Time
+    'min': (60, 's', False),
+    'h': (60, 'min', False),
+    'd': (24, 'h', False),
+    'wk': (7, 'd', False),
+    'a': (365.25, 'd', False),
+    'mo': (1 / 12, 'a', False),
+    # Volume, mass, pressure, energy
+    'L': (1, 'dm3', True),
+    'l': (1, 'dm3', True),
+    't': (1e3, 'kg', True),
+    'bar': (1e5, 'Pa', True),
+    'atm': (101325, 'Pa', False),
+    'm[Hg]': (133.322, 'kPa', True),
+    'm[H2O]': (9.80665, 'kPa', True),
+    'cal': (4.184, 'J', True),
+    'g%': (1, 'g/dL', True),
+    # Customary
+    '[in_i]': (2.54, 'cm', False),
+    '[ft_i]': (12, '[in_i]', False),
+    '[yd_i]': (3, '[ft_i]', False),
+    '[mi_i]': (5280, '[ft_i]', False),
+    '[gr]': (64.79891, 'mg', False),
+    '[lb_av]': (7000, '[gr]', False),
+    '[oz_av]': (1 / 16, '[lb_av]', False),
+    '[foz_us]': (29.5735295625, 'mL', False),
+    '[IU]': (1, '[iU]', True),
+}
+
+# symbol: (factor, offset) relative to kelvin, K = (value + offset) * factor
+SPECIAL_UNITS = {
+    'Cel': (1, 273.15),
+    '[degF]': (5 / 9, 459.67),
+}
+
+
+def _multiply(unit1, unit2, exponent=1):
+    return UcumUnit(unit1.factor * unit2.factor ** exponent,
+            tuple(d1 + d2 * exponent for d1, d2 in zip(unit1.dimension, unit2.dimension)),
+            0)
+
+
+UNITY = UcumUnit(1, DIMENSIONLESS, 0)
+
+
+@lru_cache(maxsize=1024)
+def _atom(symbol):
+    """ Resolve a symbol, optionally prefixed, into a UcumUnit or None. """
+    if symbol in BASE_UNITS:
+        dimension = [0] * len(BASE_UNITS)
+        dimension[BASE_UNITS.index(symbol)] = 1
+        return UcumUnit(1, tuple(dimension), 0), True
+    if symbol in ATOMS:
+        value, definition, metric = ATOMS[symbol]
+        unit = parse_units(definition)
+        return UcumUnit(value * unit.factor, unit.dimension, 0), metric
+    for prefix in PREFIXES:
+        if symbol.startswith(prefix) and len(symbol) > len(prefix):
+            resolved = _atom(symbol[len(prefix):])
+            if resolved is not None and resolved[1]:
+                unit, metric = resolved
+                return UcumUnit(PREFIXES[prefix] * unit.factor, unit.dimension, 0), False
+    return None
+
+
+class _Parser(object):
+    """
+        Recursive descent parser for the UCUM grammar:
+
+            main      := '/' term | term
+            term      := component (('.' | '/') component)*
+            component := annotatable annotation? | annotation | factor
+                         | '(' term ')'
+    """
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def error(self, message):
+        return UcumParseError('%s at position %d in [%s]' % (message, self.pos, self.text))
+
+    def peek(self):
+        if self.pos < len(self.text):
+            return self.text[self.pos]
+        return ''
+
+    def parse(self):
+        if self.peek() == '/':
+            self.pos += 1
+            unit = _multiply(UNITY, self.term(), -1)
+        else:
+            unit = self.term()
+        if self.pos != len(self.text):
+            raise self.error('Unexpected character')
+        return unit
+
+    def term(self):
+        unit = self.component()
+        while self.peek() in ('.', '/'):
+            operator = self.peek()
+            self.pos += 1
+            unit = _multiply(unit, self.component(), 1 if operator == '.' else -1)
+        return unit
+
+    def component(self):
+        char = self.peek()
+        if char == '(':
+            self.pos += 1
+            unit = self.term()
+            if self.peek() != ')':
+                raise self.error('Missing )')
+            self.pos += 1
+            return unit
+        if char == '{':
+            self.annotation()
+            return UNITY
+        if char.isdigit():
+            start = self.pos
+            while self.peek().isdigit():
+                self.pos += 1
+            if self.peek() in ('*', '^'):
+                self.pos += 1
+                resolved = _atom(self.text[start:self.pos])
+                if resolved is None:
+                    raise self.error('Unknown unit')
+                unit = resolved[0]
+            else:
+                unit = UcumUnit(int(self.text[start:self.pos]), DIMENSIONLESS, 0)
+                self.annotation()
+                return unit
+        else:
+            unit = self.simple_unit()
+        exponent = self.exponent()
+        if exponent is not None:
+            unit = _multiply(UNITY, unit, exponent)
+        self.annotation()
+        return unit
+
+    def simple_unit(self):
+        start = self.pos
+        text = self.text
+        while self.pos < len(text):
+            char = text[self.pos]
+            if char == '[':
+                end = text.find(']', self.pos)
+                if end < 0:
+                    raise self.error('Missing ]')
+                self.pos = end + 1
+            elif char.isdigit() or char in '.(){}/' or (char in '+-' and
+                    self.pos + 1 < len(text) and text[self.pos + 1].isdigit()):
+                break
+            elif char.isspace():
+                raise self.error('Unexpected whitespace')
+            else:
+                self.pos += 1
+        symbol = text[start:self.pos]
+        if not symbol:
+            raise self.error('Expected a unit')
+        resolved = _atom(symbol)
+        if resolved is None:
+            raise UcumParseError('Unknown unit [%s] in [%s]' % (symbol, text))
+        return resolved[0]
+
+    def exponent(self):
+        start = self.pos
+        if self.peek() in ('+', '-'):
+            self.pos += 1
+        while self.peek().isdigit():
+            self.pos += 1
+        if self.pos == start:
+            return None
+        try:
+            return int(self.text[start:self.pos])
+        except ValueError:
+            raise self.error('Invalid exponent')
+
+    def annotation(self):
+        if self.peek() == '{':
+            end = self.text.find('}', self.pos)
+            if end < 0:
+                raise self.error('Missing }')
+            self.pos = end + 1
+
+
+@lru_cache(maxsize=4096)
+def parse_units(units):
+    """
+        Compile a UCUM units string into a UcumUnit (scale factor, dimension
+        vector, offset). Results are cached per units string.
+    """
+    if type(units) != str or not units:
+        raise UcumParseError('Invalid units string [%s]' % units)
+    if units in SPECIAL_UNITS:
+        factor, offset = SPECIAL_UNITS[units]
+        return UcumUnit(factor, _atom('K')[0].dimension, offset)
+    if units == '1':
+        return UNITY
+    return _Parser(units).parse()
+
+
+class UcumService(object):
+    """
+        Measurement information service backed by the local UCUM parser.
+        Register it with register_measurement_info_service.
+    """
+
+    def is_valid_units_string(self, units):
+        try:
+            parse_units(units)
+        except UcumParseError:
+            return False
+        return True
+
+    def units_equivalent(self, units1, units2):
+        return self.property_id(units1) == self.property_id(units2)
+
+    def property_id(self, units):
+        """ The dimension vector is the canonical id of the measured property. """
+        return parse_units(units).dimension
+
+    def conversion(self, from_units, to_units, molar_mass=None):
+        """
+            Return (scale, shift) such that a magnitude in from_units times
+            scale plus shift is the magnitude in to_units.
+
+            molar_mass (g/mol) bridges mass and substance amounts, e.g. mg/dL
+            and mmol/L for a given analyte.
+        """
+        source = parse_units(from_units)
+        target = parse_units(to_units)
+        factor, dimension = source.factor, source.dimension
+        if molar_mass is not None and dimension != target.dimension:
+            per_mole = parse_units('g/mol')
+            molar_factor = molar_mass * per_mole.factor
+            if _multiply(source, per_mole, -1).dimension == target.dimension:
+                factor, dimension = factor / molar_factor, target.dimension
+            elif _multiply(source, per_mole).dimension == target.dimension:
+                factor, dimension = factor * molar_factor, target.dimension
+        if dimension != target.dimension:
+            raise ValueError('Cannot convert [%s] to [%s]' % (from_units, to_units))
+        if from_units == to_units:
+            return 1, 0
+        scale = factor / target.factor
+        return scale, source.offset * scale - target.offset
+
+    def convert(self, magnitude, from_units, to_units, molar_mass=None):
+        """ Convert 'magnitude' expressed in from_units into to_units. """
+        scale, shift = self.conversion(from_units, to_units, molar_mass)
+        return magnitude * scale + shift